@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark: autocrop_image
+===============================
+
+Vergleicht die alte Pixel-Schleife mit der vektorisierten Version
+(utils.latex_renderer.autocrop_image) auf A4-Seiten bei 150/200/300 dpi
+und prüft, dass beide dieselbe Crop-Box liefern.
+
+Aufruf:
+    python benchmarks/bench_autocrop.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Projekt-Root zum Python-Path hinzufügen
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.latex_renderer import autocrop_image
+
+
+A4_CM = (21.0, 29.7)
+
+
+def autocrop_image_alt(img: Image.Image, threshold: int = 250) -> Image.Image:
+    """Bisherige Implementierung (Python-Doppelschleife) als Referenz"""
+
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    pixels = img.load()
+    width, height = img.size
+
+    left = width
+    right = 0
+    top = height
+    bottom = 0
+
+    for y in range(height):
+        for x in range(width):
+            r, g, b = pixels[x, y]
+
+            if r < threshold or g < threshold or b < threshold:
+                left = min(left, x)
+                right = max(right, x)
+                top = min(top, y)
+                bottom = max(bottom, y)
+
+    if left >= right or top >= bottom:
+        return img
+
+    padding = 10
+    left = max(0, left - padding)
+    right = min(width, right + padding)
+    top = max(0, top - padding)
+    bottom = min(height, bottom + padding)
+
+    return img.crop((left, top, right, bottom))
+
+
+def erzeuge_seite(dpi: int) -> Image.Image:
+    """Weiße A4-Seite mit 'Aufgaben-Inhalt' im oberen Drittel"""
+
+    breite = int(A4_CM[0] / 2.54 * dpi)
+    hoehe = int(A4_CM[1] / 2.54 * dpi)
+
+    img = Image.new('RGB', (breite, hoehe), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+
+    rand = int(dpi / 2.54)  # 1 cm Rand wie in den Vorschauen
+    for zeile in range(12):
+        y = rand + zeile * dpi // 5
+        draw.text((rand, y), "Aufgabe: Berechne das Integral von 0 bis 1", fill=(0, 0, 0))
+
+    # Fast-weißer Pixel (unter threshold=250 nur in einem Kanal)
+    img.putpixel((breite - rand, hoehe // 3), (255, 249, 255))
+
+    return img
+
+
+def messe(funktion, img: Image.Image, wiederholungen: int) -> float:
+    """Beste Laufzeit aus n Wiederholungen in Sekunden"""
+    beste = float('inf')
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        funktion(img)
+        beste = min(beste, time.perf_counter() - start)
+    return beste
+
+
+def main():
+    print(f"{'DPI':>5} {'Größe':>12} {'alt [s]':>10} {'neu [ms]':>10} {'Faktor':>8}  Box gleich")
+
+    for dpi in (150, 200, 300):
+        img = erzeuge_seite(dpi)
+
+        alt = messe(autocrop_image_alt, img, wiederholungen=1)
+        neu = messe(autocrop_image, img, wiederholungen=5)
+
+        # Gleiche Größe reicht nicht - eine verschobene Box hätte dieselbe
+        a, b = autocrop_image_alt(img), autocrop_image(img)
+        gleich = a.size == b.size and a.tobytes() == b.tobytes()
+
+        print(
+            f"{dpi:>5} {img.width:>5}x{img.height:<6} {alt:>10.2f} "
+            f"{neu * 1000:>10.1f} {alt / neu:>7.0f}x  {'✓' if gleich else '✗'}"
+        )
+
+
+if __name__ == '__main__':
+    main()
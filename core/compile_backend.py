@@ -0,0 +1,438 @@
+"""
+Compile-Backends
+================
+
+Austauschbare LaTeX → PDF Kompilierung:
+- RemoteCompileBackend: HTTP-API (latex.ytotech.com)
+- LocalCompileBackend: lokales pdflatex/latexmk im Temp-Verzeichnis
+
+Auswahl über config.json (Abschnitt "compile") oder Umgebungsvariablen:
+    KLAUSUR_COMPILE_BACKEND = "remote" | "local"
+    KLAUSUR_LATEX_ENGINE    = "pdflatex" | "latexmk"
+    KLAUSUR_LATEX_API_URL   = URL der Remote-API
+    KLAUSUR_COMPILE_CACHE   = "0" deaktiviert den PDF-Cache
+    KLAUSUR_LATEX_FORMAT    = "0" deaktiviert vorkompilierte Präambeln (lokal)
+"""
+
+import base64
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+import requests
+
+
+LATEX_API_URL = "https://latex.ytotech.com/builds/sync"
+
+# Projekt-Root (für config.json)
+PROJECT_ROOT = Path(__file__).parent.parent
+
+DEFAULT_COMPILE_CONFIG = {
+    'backend': 'remote',       # remote | local
+    'engine': 'pdflatex',      # pdflatex | latexmk
+    'api_url': LATEX_API_URL,
+    'timeout': 120,
+    'cache': True,             # Content-addressed PDF-Cache
+    'cache_dir': 'cache/compile',
+    'cache_max_mb': 200,
+    'klassensatz_modus': 'einzeldokument',  # einzeldokument | parallel | stempel
+    'max_workers': 0,          # 0 = automatisch
+    'preamble_format': True,   # Lokal: Präambel als .fmt vorkompilieren
+    'format_dir': 'cache/fmt',
+    'preview_workers': 2,      # Warme Vorschau-Prozesse (lokal)
+    'preview_cache': True,     # PNG-Vorschauen pro Aufgabe cachen
+    'preview_cache_dir': 'cache/preview',
+    'preview_cache_max_mb': 100,
+    'preview_prewarm': None,   # Schritt 2: Vorschauen vorrendern (None = nur bei backend 'local')
+    'preview_prewarm_remote_max': 20,  # Remote: höchstens so viele Aufgaben pro Vorwärm-Runde
+}
+
+
+class CompileError(Exception):
+    """Fehler bei der LaTeX-Kompilierung (mit Log-Auszug)"""
+
+    def __init__(self, message: str, log: str = ""):
+        super().__init__(message)
+        self.log = log
+
+
+class CompileBackend:
+    """
+    Basis-Klasse für LaTeX-Compile-Backends
+
+    Resources werden als Dict übergeben: relativer Pfad -> Bytes
+    (z.B. {"logo.png": b"...", "dreieck.png": b"..."}).
+    """
+
+    name = "base"
+
+    def __init__(self, engine: str = "pdflatex", timeout: int = 120):
+        self.engine = engine
+        self.timeout = timeout
+
+    def compile(
+        self,
+        latex_code: str,
+        resources: Optional[Dict[str, bytes]] = None,
+        timeout: Optional[int] = None
+    ) -> bytes:
+        """
+        Kompiliert LaTeX-Code zu PDF
+
+        Args:
+            latex_code: Inhalt von main.tex
+            resources: Zusätzliche Dateien (Pfad -> Bytes)
+            timeout: Optional - überschreibt Standard-Timeout
+
+        Returns:
+            PDF als bytes
+
+        Raises:
+            CompileError: bei Fehlern
+        """
+        raise NotImplementedError
+
+
+class RemoteCompileBackend(CompileBackend):
+    """Kompiliert via HTTP-API (latex.ytotech.com)"""
+
+    name = "remote"
+
+    def __init__(self, api_url: str = LATEX_API_URL, engine: str = "pdflatex", timeout: int = 120):
+        super().__init__(engine=engine, timeout=timeout)
+        self.api_url = api_url
+
+    def compile(
+        self,
+        latex_code: str,
+        resources: Optional[Dict[str, bytes]] = None,
+        timeout: Optional[int] = None
+    ) -> bytes:
+        """Kompiliert via API-Request"""
+
+        payload_resources = [{"main": True, "path": "main.tex", "content": latex_code}]
+
+        for path, blob in (resources or {}).items():
+            payload_resources.append({
+                "path": path,
+                "file": base64.b64encode(blob).decode("utf-8")
+            })
+
+        # Die API kennt latexmk nicht als eigenen Compiler
+        compiler = "pdflatex" if self.engine == "latexmk" else self.engine
+
+        try:
+            response = requests.post(
+                self.api_url,
+                json={"compiler": compiler, "resources": payload_resources},
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "application/pdf",
+                },
+                timeout=timeout or self.timeout,
+            )
+        except requests.exceptions.Timeout:
+            raise CompileError(f"Timeout nach {timeout or self.timeout} Sekunden")
+        except requests.exceptions.RequestException as e:
+            raise CompileError(f"Netzwerk-Fehler: {e}")
+
+        if response.status_code in (200, 201):
+            ct = response.headers.get("Content-Type", "")
+            if ("application/pdf" in ct) or response.content.startswith(b"%PDF"):
+                return response.content
+
+        raise CompileError(
+            f"LaTeX-API Error: HTTP {response.status_code}",
+            log=response.text[:2000]
+        )
+
+
+class LocalCompileBackend(CompileBackend):
+    """Kompiliert lokal mit pdflatex oder latexmk"""
+
+    name = "local"
+
+    def __init__(self, engine: str = "pdflatex", timeout: int = 120, format_cache=None):
+        """
+        Args:
+            engine: pdflatex | latexmk
+            timeout: Standard-Timeout in Sekunden
+            format_cache: Optional - FormatCache für vorkompilierte Präambeln
+        """
+        super().__init__(engine=engine, timeout=timeout)
+        self.format_cache = format_cache
+
+    def compile(
+        self,
+        latex_code: str,
+        resources: Optional[Dict[str, bytes]] = None,
+        timeout: Optional[int] = None
+    ) -> bytes:
+        """Schreibt main.tex + Resources in Temp-Verzeichnis und kompiliert"""
+
+        timeout = timeout or self.timeout
+
+        fmt_path = None
+        if self.format_cache is not None:
+            fmt_path = self.format_cache.get_format(latex_code, timeout)
+
+        with tempfile.TemporaryDirectory(prefix="klausur_tex_") as tmpdir:
+            workdir = Path(tmpdir)
+
+            self._write_resources(workdir, latex_code, resources)
+
+            fmt_name = self._link_format(workdir, fmt_path) if fmt_path else None
+
+            result = self._run_engine(workdir, timeout, fmt_name)
+
+            pdf_file = workdir / "main.pdf"
+            if not pdf_file.exists() and fmt_name:
+                # Format evtl. inkompatibel → verwerfen, ohne Format wiederholen
+                print("⚠️ Kompilierung mit Format fehlgeschlagen, wiederhole ohne Format")
+                self.format_cache.invalidate(fmt_path)
+                result = self._run_engine(workdir, timeout)
+
+            if not pdf_file.exists():
+                raise CompileError(
+                    f"{self.engine} hat kein PDF erzeugt (Exit-Code {result.returncode})",
+                    log=self._read_log(workdir, result)
+                )
+
+            return pdf_file.read_bytes()
+
+    @staticmethod
+    def _link_format(workdir: Path, fmt_path: Path) -> Optional[str]:
+        """Format ins Arbeitsverzeichnis verlinken (Fallback: kopieren)"""
+
+        target = workdir / fmt_path.name
+        try:
+            os.link(fmt_path, target)
+        except OSError:
+            try:
+                shutil.copyfile(fmt_path, target)
+            except OSError:
+                return None
+        return fmt_path.stem
+
+    def _write_resources(
+        self,
+        workdir: Path,
+        latex_code: str,
+        resources: Optional[Dict[str, bytes]]
+    ):
+        """main.tex, logo.png und Grafiken ins Arbeitsverzeichnis schreiben"""
+
+        (workdir / "main.tex").write_text(latex_code, encoding="utf-8")
+
+        for path, blob in (resources or {}).items():
+            target = (workdir / path).resolve()
+            # Keine Pfade außerhalb des Arbeitsverzeichnisses
+            if workdir.resolve() not in target.parents:
+                raise CompileError(f"Ungültiger Resource-Pfad: {path}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(blob)
+
+    def _build_command(self, fmt_name: Optional[str] = None) -> list:
+        """Kommandozeile für die gewählte Engine (optional mit Format)"""
+
+        if self.engine == "latexmk":
+            command = ["latexmk", "-pdf"]
+            if fmt_name:
+                command.append(f"-pdflatex=pdflatex -fmt={fmt_name} %O %S")
+            return command + [
+                "-interaction=nonstopmode", "-halt-on-error", "main.tex"
+            ]
+
+        command = [self.engine]
+        if fmt_name:
+            command.append(f"-fmt={fmt_name}")
+        return command + [
+            "-interaction=nonstopmode", "-halt-on-error", "main.tex"
+        ]
+
+    def _run_engine(
+        self,
+        workdir: Path,
+        timeout: int,
+        fmt_name: Optional[str] = None
+    ) -> subprocess.CompletedProcess:
+        """Engine-Prozess starten"""
+
+        command = self._build_command(fmt_name)
+
+        if shutil.which(command[0]) is None:
+            raise CompileError(f"{command[0]} nicht gefunden! Bitte LaTeX installieren.")
+
+        try:
+            return subprocess.run(
+                command,
+                cwd=workdir,
+                capture_output=True,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise CompileError(f"Timeout nach {timeout} Sekunden")
+
+    @staticmethod
+    def _read_log(workdir: Path, result: subprocess.CompletedProcess) -> str:
+        """Letzte Zeilen aus main.log (oder stdout)"""
+
+        log_file = workdir / "main.log"
+        if log_file.exists():
+            text = log_file.read_text(encoding="utf-8", errors="ignore")
+        else:
+            text = result.stdout.decode("utf-8", errors="ignore")
+        return text[-2000:]
+
+
+def load_compile_config() -> Dict[str, Any]:
+    """
+    Compile-Konfiguration laden
+
+    Reihenfolge: Defaults < config.json ("compile") < Umgebungsvariablen
+
+    Returns:
+        Dictionary mit backend, engine, api_url, timeout, cache*
+    """
+    config = dict(DEFAULT_COMPILE_CONFIG)
+
+    config_file = PROJECT_ROOT / "config.json"
+    if config_file.exists():
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config.update(json.load(f).get('compile', {}))
+        except Exception as e:
+            print(f"⚠️ config.json konnte nicht gelesen werden: {e}")
+
+    env_map = {
+        'KLAUSUR_COMPILE_BACKEND': 'backend',
+        'KLAUSUR_LATEX_ENGINE': 'engine',
+        'KLAUSUR_LATEX_API_URL': 'api_url',
+    }
+    for env_name, key in env_map.items():
+        if os.environ.get(env_name):
+            config[key] = os.environ[env_name]
+    
+    if os.environ.get('KLAUSUR_COMPILE_CACHE'):
+        config['cache'] = os.environ['KLAUSUR_COMPILE_CACHE'] not in ('0', 'false', 'no')
+    
+    if os.environ.get('KLAUSUR_LATEX_FORMAT'):
+        config['preamble_format'] = os.environ['KLAUSUR_LATEX_FORMAT'] not in ('0', 'false', 'no')
+
+    return config
+
+
+def create_compile_backend(config: Optional[Dict[str, Any]] = None) -> CompileBackend:
+    """
+    Backend anhand der Konfiguration erzeugen
+
+    Args:
+        config: Optional - sonst load_compile_config()
+
+    Returns:
+        CompileBackend-Instanz
+    """
+    if config is None:
+        config = load_compile_config()
+
+    backend = config.get('backend', 'remote')
+    engine = config.get('engine', 'pdflatex')
+    timeout = int(config.get('timeout', 120))
+
+    if backend == 'local':
+        instance = LocalCompileBackend(
+            engine=engine, timeout=timeout, format_cache=create_format_cache(config)
+        )
+    else:
+        if backend != 'remote':
+            print(f"⚠️ Unbekanntes Compile-Backend '{backend}', verwende 'remote'")
+        
+        instance = RemoteCompileBackend(
+            api_url=config.get('api_url', LATEX_API_URL),
+            engine=engine,
+            timeout=timeout
+        )
+    
+    return wrap_with_cache(instance, config)
+
+
+def create_format_cache(config: Dict[str, Any]):
+    """
+    FormatCache für vorkompilierte Präambeln (nur lokales Backend)
+
+    Returns:
+        FormatCache-Instanz oder None (abgeschaltet / nicht verfügbar)
+    """
+    if not config.get('preamble_format', True):
+        return None
+    
+    # Lazy-Import wie beim Compile-Cache
+    from core.format_cache import FormatCache
+    
+    format_dir = Path(config.get('format_dir', 'cache/fmt'))
+    if not format_dir.is_absolute():
+        format_dir = PROJECT_ROOT / format_dir
+    
+    try:
+        # Formate werden immer mit pdflatex gedumpt (auch für latexmk)
+        return FormatCache(str(format_dir), engine="pdflatex")
+    except OSError as e:
+        print(f"⚠️ Format-Cache nicht verfügbar: {e}")
+        return None
+
+
+def wrap_with_cache(instance: CompileBackend, config: Dict[str, Any]) -> CompileBackend:
+    """Backend mit CompileCache umhüllen (falls in der Konfiguration aktiv)"""
+    if not config.get('cache', True):
+        return instance
+    
+    # Lazy-Import (compile_cache importiert dieses Modul)
+    from core.compile_cache import CompileCache, CachingCompileBackend
+    
+    cache_dir = Path(config.get('cache_dir', 'cache/compile'))
+    if not cache_dir.is_absolute():
+        cache_dir = PROJECT_ROOT / cache_dir
+    
+    try:
+        cache = CompileCache(
+            str(cache_dir),
+            max_bytes=int(float(config.get('cache_max_mb', 200)) * 1024 * 1024)
+        )
+        return CachingCompileBackend(instance, cache)
+    except OSError as e:
+        print(f"⚠️ Compile-Cache nicht verfügbar: {e}")
+        return instance
+
+
+# Singleton-Instanz
+_backend_instance: Optional[CompileBackend] = None
+
+
+def get_compile_backend() -> CompileBackend:
+    """
+    Globales Compile-Backend holen (Singleton-Pattern)
+
+    Returns:
+        CompileBackend-Instanz
+    """
+    global _backend_instance
+
+    if _backend_instance is None:
+        _backend_instance = create_compile_backend()
+
+    return _backend_instance
+
+
+def set_compile_backend(backend: Optional[CompileBackend]):
+    """
+    Globales Compile-Backend ersetzen (None = neu aus Konfiguration)
+
+    Args:
+        backend: CompileBackend-Instanz oder None
+    """
+    global _backend_instance
+    _backend_instance = backend
@@ -0,0 +1,210 @@
+"""
+Compile-Cache
+=============
+
+Content-addressed Festplatten-Cache für kompilierte PDFs.
+
+Schlüssel: SHA-256 über main.tex, Compiler-Name und alle Resources
+(Pfad + Bytes). Identische Kompilierungen werden so in Millisekunden
+aus dem Cache beantwortet statt erneut kompiliert.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from core.compile_backend import CompileBackend
+
+
+class CompileCache:
+    """
+    Größenbeschränkter LRU-Cache für PDFs auf der Festplatte
+
+    Jeder Eintrag ist eine Datei <sha256>.pdf. Die Zugriffsreihenfolge
+    wird über die mtime der Datei abgebildet (Treffer → touch), beim
+    Überschreiten von max_bytes werden die ältesten Einträge gelöscht.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Verzeichnis für Cache-Dateien
+            max_bytes: Maximale Gesamtgröße in Bytes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        latex_code: str,
+        compiler: str,
+        resources: Optional[Dict[str, bytes]] = None
+    ) -> str:
+        """
+        Cache-Schlüssel berechnen
+
+        Args:
+            latex_code: Inhalt von main.tex
+            compiler: Name des Compilers (z.B. "pdflatex")
+            resources: Pfad -> Bytes
+
+        Returns:
+            SHA-256 als Hex-String
+        """
+        h = hashlib.sha256()
+        h.update(b"main.tex\0")
+        h.update(latex_code.encode("utf-8"))
+        h.update(b"\0compiler\0")
+        h.update(compiler.encode("utf-8"))
+
+        # Sortiert, damit die Reihenfolge der Resources egal ist
+        for path in sorted(resources or {}):
+            blob = resources[path]
+            h.update(b"\0path\0")
+            h.update(path.encode("utf-8"))
+            h.update(b"\0len\0")
+            h.update(str(len(blob)).encode("ascii"))
+            h.update(b"\0")
+            h.update(blob)
+
+        return h.hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """PDF aus Cache holen (None bei Miss)"""
+        path = self._path_for(key)
+
+        try:
+            data = path.read_bytes()
+        except (FileNotFoundError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # LRU: Zugriff vermerken
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, pdf_bytes: bytes):
+        """PDF im Cache ablegen (atomar) und ggf. alte Einträge verdrängen"""
+        if len(pdf_bytes) > self.max_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, self._path_for(key))
+        except OSError as e:
+            print(f"⚠️ Compile-Cache: Schreiben fehlgeschlagen: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Älteste Einträge löschen, bis max_bytes eingehalten ist"""
+        with self._lock:
+            entries = []
+            total = 0
+
+            for path in self.cache_dir.glob("*.pdf"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()  # älteste zuerst
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Cache komplett leeren"""
+        with self._lock:
+            for path in self.cache_dir.glob("*.pdf"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Treffer-/Fehlschlag-Zähler und aktuelle Größe"""
+        files = list(self.cache_dir.glob("*.pdf"))
+        size = 0
+        for path in files:
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'eintraege': len(files),
+                'groesse_bytes': size,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class CachingCompileBackend(CompileBackend):
+    """Wrapper: fragt zuerst den CompileCache, sonst das eigentliche Backend"""
+
+    def __init__(self, backend: CompileBackend, cache: CompileCache):
+        super().__init__(engine=backend.engine, timeout=backend.timeout)
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+
+    def compile(
+        self,
+        latex_code: str,
+        resources: Optional[Dict[str, bytes]] = None,
+        timeout: Optional[int] = None
+    ) -> bytes:
+        """Kompiliert mit Cache-Lookup (Fehler werden nicht gecacht)"""
+
+        key = CompileCache.make_key(latex_code, self.backend.engine, resources)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        pdf_bytes = self.backend.compile(latex_code, resources=resources, timeout=timeout)
+        self.cache.put(key, pdf_bytes)
+
+        return pdf_bytes
@@ -5,11 +5,232 @@ Datenbank-Verwaltung
 SQLite-Anbindung für sus.db - v1.0.8 Mit get_all_grafiken()
 """
 
+import itertools
+import os
+import re
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from contextlib import contextmanager
 
+from core.db_pool import get_connection_pool
+from core.preview_cache import get_preview_cache
+from core.thumbnails import THUMBNAIL_GROESSEN, erzeuge_thumbnails
+
+
+# Spalten des Volltext-Index (Reihenfolge = Gewichte in FTS_GEWICHTE)
+FTS_SPALTEN = ("titel", "themengebiet", "schlagwoerter", "kompetenzen", "latex_code")
+FTS_GEWICHTE = "10.0, 5.0, 5.0, 2.0, 1.0"
+
+_spalten = ", ".join(FTS_SPALTEN)
+_neu = ", ".join(f"new.{spalte}" for spalte in FTS_SPALTEN)
+_alt = ", ".join(f"old.{spalte}" for spalte in FTS_SPALTEN)
+
+# External-Content-Tabelle: speichert nur den Index, der Text bleibt in
+# aufgaben. unicode61 + remove_diacritics: Groß-/Kleinschreibung und
+# Umlaute egal ("Flache" findet "Fläche"); Präfix-Indizes für "wort*"
+FTS_SCHEMA = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS aufgaben_fts USING fts5(
+        {_spalten},
+        content='aufgaben',
+        content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3 4'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS aufgaben_fts_insert AFTER INSERT ON aufgaben BEGIN
+        INSERT INTO aufgaben_fts(rowid, {_spalten}) VALUES (new.id, {_neu});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS aufgaben_fts_delete AFTER DELETE ON aufgaben BEGIN
+        INSERT INTO aufgaben_fts(aufgaben_fts, rowid, {_spalten}) VALUES ('delete', old.id, {_alt});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS aufgaben_fts_update AFTER UPDATE OF {_spalten} ON aufgaben BEGIN
+        INSERT INTO aufgaben_fts(aufgaben_fts, rowid, {_spalten}) VALUES ('delete', old.id, {_alt});
+        INSERT INTO aufgaben_fts(rowid, {_spalten}) VALUES (new.id, {_neu});
+    END;
+"""
+
+# Indizes für die heißen Abfragen (Filter + Sortierung aus dem Index).
+# Nicht abdeckend: get_aufgaben liest a.* - pro Treffer folgt ein Zugriff
+# auf die Tabellenzeile, aber nur für Zeilen, die alle Filter erfüllen.
+INDEX_SCHEMA = """
+    -- get_aufgaben: Step 2 filtert immer nach Fach + Stufe, neueste zuerst;
+    -- Schwierigkeit/AFB (optional) hinter erstellt_am, damit die Sortierung
+    -- aus dem Index kommt und die Filter trotzdem im Index geprüft werden
+    CREATE INDEX IF NOT EXISTS idx_aufgaben_fach_stufe_erstellt
+        ON aufgaben(fach, jahrgangsstufe, erstellt_am, schwierigkeit, anforderungsbereich);
+
+    -- get_aufgaben ohne Filter (Aufgaben-Tab)
+    CREATE INDEX IF NOT EXISTS idx_aufgaben_erstellt
+        ON aufgaben(erstellt_am);
+
+    -- get_schueler_by_klasse / get_schueler_count_by_klasse / get_klassen_by_schule
+    CREATE INDEX IF NOT EXISTS idx_schueler_klasse_name
+        ON schueler(schuljahr, schule, klasse, nachname, rufname);
+
+    -- Grafiken pro Aufgabe (Namen/Typ ohne Zugriff auf die BLOB-Zeile)
+    CREATE INDEX IF NOT EXISTS idx_aufgaben_grafiken_aufgabe
+        ON aufgaben_grafiken(aufgabe_id, latex_name, dateityp);
+
+    -- get_recent_klausuren / Klausuren-Verwaltung
+    CREATE INDEX IF NOT EXISTS idx_klausuren_erstellt
+        ON klausuren(erstellt_am);
+"""
+
+# Spalten für Aufgaben-Tabellen (ohne die großen Spalten latex_code und aufgaben_daten)
+AUFGABEN_LISTEN_SPALTEN = (
+    "id", "titel", "fach", "themengebiet", "schwierigkeit", "punkte",
+    "anforderungsbereich", "jahrgangsstufe", "kompetenzen", "erstellt_am"
+)
+
+# Tabellen mit Spalte grafik_blob (für stream_grafik_blob)
+GRAFIK_TABELLEN = ("aufgaben_grafiken", "grafiken_pool")
+
+# Verkleinerte Vorschauen (core/thumbnails.py) für beide Grafik-Tabellen;
+# original_bytes erkennt extern ersetzte Originale (Backfill erneuert dann).
+# Neues/ersetztes/gelöschtes Original: Thumbnails sofort verwerfen - auch
+# wenn die Grafik außerhalb dieser Klasse geschrieben wird (aufgaben_grafiken
+# kommen aus dem Aufgaben-Import); get_grafik_thumbnail erzeugt neu
+THUMBNAIL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS grafik_thumbnails (
+        id INTEGER PRIMARY KEY,
+        tabelle TEXT NOT NULL,
+        grafik_id INTEGER NOT NULL,
+        groesse INTEGER NOT NULL,
+        breite_px INTEGER,
+        hoehe_px INTEGER,
+        original_bytes INTEGER,
+        daten BLOB NOT NULL,
+        UNIQUE (tabelle, grafik_id, groesse)
+    );
+""" + "".join(f"""
+    CREATE TRIGGER IF NOT EXISTS {tabelle}_thumbnails_insert
+    AFTER INSERT ON {tabelle} BEGIN
+        DELETE FROM grafik_thumbnails WHERE tabelle = '{tabelle}' AND grafik_id = new.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {tabelle}_thumbnails_update
+    AFTER UPDATE OF grafik_blob ON {tabelle} BEGIN
+        DELETE FROM grafik_thumbnails WHERE tabelle = '{tabelle}' AND grafik_id = new.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {tabelle}_thumbnails_delete
+    AFTER DELETE ON {tabelle} BEGIN
+        DELETE FROM grafik_thumbnails WHERE tabelle = '{tabelle}' AND grafik_id = old.id;
+    END;
+""" for tabelle in GRAFIK_TABELLEN)
+
+# Dashboard-Zähler (Statistik-Name -> Tabelle); Trigger halten die Anzahl
+# bei INSERT/DELETE aktuell, get_statistics liest nur noch eine kleine Tabelle
+STATISTIK_TABELLEN = {
+    "aufgaben": "aufgaben",
+    "klausuren": "klausuren",
+    "grafiken": "grafiken_pool",
+    "schueler": "schueler",
+}
+
+STATISTIK_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS statistik_zaehler (
+        name TEXT PRIMARY KEY,
+        anzahl INTEGER NOT NULL DEFAULT 0
+    );
+""" + "".join(f"""
+    CREATE TRIGGER IF NOT EXISTS statistik_{tabelle}_insert AFTER INSERT ON {tabelle} BEGIN
+        UPDATE statistik_zaehler SET anzahl = anzahl + 1 WHERE name = '{name}';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS statistik_{tabelle}_delete AFTER DELETE ON {tabelle} BEGIN
+        UPDATE statistik_zaehler SET anzahl = anzahl - 1 WHERE name = '{name}';
+    END;
+
+    INSERT OR REPLACE INTO statistik_zaehler (name, anzahl)
+        SELECT '{name}', COUNT(*) FROM {tabelle};
+""" for name, tabelle in STATISTIK_TABELLEN.items())
+
+# Versionierte Schema-Migrationen: (Version, Beschreibung, SQL, optional)
+# Optionale Migrationen dürfen fehlschlagen (z.B. SQLite ohne FTS5) und
+# werden beim nächsten Start erneut versucht.
+MIGRATIONEN = [
+    (1, "Volltext-Index aufgaben_fts",
+     FTS_SCHEMA + "INSERT INTO aufgaben_fts(aufgaben_fts) VALUES ('rebuild');", True),
+    (2, "Indizes für Filter- und Sortierspalten", INDEX_SCHEMA, False),
+    (3, "Thumbnail-Tabelle für Grafiken", THUMBNAIL_SCHEMA, False),
+    (4, "Zähler-Tabelle für Dashboard-Statistiken", STATISTIK_SCHEMA, False),
+]
+
+# Datenbank-Datei -> FTS5 verfügbar? (Migration nur einmal pro Datei)
+_schema_status: Dict[str, bool] = {}
+_schema_lock = threading.Lock()
+
+# Entwicklung/CI: KLAUSUR_DB_CHECK=1 prüft nach der Migration die
+# Query-Pläne und bricht bei einem Full Scan ab (einmal pro Datei)
+_plaene_geprueft: set = set()
+
+
+def _migriere_schema(db: "Database") -> bool:
+    """
+    Fehlende Migrationen in Versions-Reihenfolge anwenden
+
+    Jede Migration läuft in einer eigenen BEGIN-IMMEDIATE-Transaktion und
+    wird in schema_migrationen eingetragen.
+
+    Returns:
+        True wenn die Suche FTS5 nutzen kann
+    """
+    key = str(db.pool.db_path)
+
+    with _schema_lock:
+        if key in _schema_status:
+            return _schema_status[key]
+
+        with db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrationen (
+                    version INTEGER PRIMARY KEY,
+                    beschreibung TEXT,
+                    angewendet_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+
+            angewendet = {
+                row[0] for row in conn.execute("SELECT version FROM schema_migrationen")
+            }
+
+            for version, beschreibung, sql, optional in MIGRATIONEN:
+                if version in angewendet:
+                    continue
+
+                eintrag = beschreibung.replace("'", "''")
+                try:
+                    conn.executescript(
+                        "BEGIN IMMEDIATE;"
+                        + sql
+                        + "INSERT OR IGNORE INTO schema_migrationen (version, beschreibung) "
+                        + f"VALUES ({version}, '{eintrag}');"
+                        + "COMMIT;"
+                    )
+                    print(f"✅ Schema-Migration {version}: {beschreibung}")
+                except sqlite3.Error as e:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    print(f"⚠️ Schema-Migration {version} ({beschreibung}) fehlgeschlagen: {e}")
+                    if not optional:
+                        break
+
+            fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'aufgaben_fts'"
+            ).fetchone()
+
+        if not fts:
+            print("⚠️ Volltextsuche nicht verfügbar - Suche über LIKE")
+
+        _schema_status[key] = bool(fts)
+        return _schema_status[key]
+
 
 class Database:
     """Zentrale Datenbank-Klasse"""
@@ -29,23 +250,52 @@ class Database:
                 f"Datenbank nicht gefunden: {self.db_path}\n"
                 f"Bitte kopiere sus.db in den Ordner database/"
             )
+        
+        # Eine Verbindung pro Thread (WAL + Pragmas, siehe core/db_pool.py)
+        self.pool = get_connection_pool(self.db_path)
+        
+        # Schema-Migrationen (Volltext-Index, Indizes) einmal pro Datei
+        self.fts_verfuegbar = _migriere_schema(self)
+        
+        if os.environ.get('KLAUSUR_DB_CHECK', '0') not in ('0', 'false', 'no'):
+            self.pruefe_schema()
+    
+    def pruefe_schema(self):
+        """
+        Strikte Query-Plan-Prüfung nach der Migration (einmal pro Datei)
+        
+        Raises:
+            RuntimeError: eine heiße Abfrage scannt eine Tabelle komplett
+        """
+        key = str(self.pool.db_path)
+        if key in _plaene_geprueft:
+            return
+        
+        self.check_query_plans(strikt=True)
+        _plaene_geprueft.add(key)
+        print(f"✅ Schema v{self.get_schema_version()}: heiße Abfragen ohne Full Scan")
     
     @contextmanager
     def get_connection(self):
         """
         Context Manager für Datenbankverbindung
         
+        Liefert die wiederverwendete Verbindung des aktuellen Threads aus
+        dem Pool - sie wird danach nicht geschlossen. Bei Fehlern wird eine
+        offene Transaktion zurückgerollt.
+        
         Verwendung:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT ...")
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Zugriff über Spaltennamen
+        conn = self.pool.connection()  # row_factory = sqlite3.Row
         try:
             yield conn
-        finally:
-            conn.close()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """
@@ -104,6 +354,106 @@ class Database:
             conn.commit()
             return cursor.lastrowid
     
+    # ============================================================
+    # SCHEMA
+    # ============================================================
+    
+    def get_schema_version(self) -> int:
+        """Höchste angewendete Schema-Migration (0 = keine)"""
+        result = self.execute_query(
+            "SELECT COALESCE(MAX(version), 0) as version FROM schema_migrationen"
+        )
+        return result[0]['version'] if result else 0
+    
+    def get_data_version(self) -> Tuple[int, int]:
+        """
+        Änderungszähler der Datenbank aus Sicht des aktuellen Threads
+        
+        PRAGMA data_version ändert sich nur bei Commits anderer Verbindungen
+        (andere Threads/Prozesse), total_changes zählt die eigenen Änderungen.
+        Gleiches Tupel = seitdem nichts geschrieben, Neuladen unnötig.
+        """
+        with self.get_connection() as conn:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            return (version, conn.total_changes)
+    
+    # Vollständiger Tabellen-Scan im Plan: "SCAN aufgaben" bzw. "SCAN TABLE aufgaben"
+    # (ein Index-Scan heißt "SCAN ... USING INDEX ...")
+    _FULL_SCAN = re.compile(r"^SCAN (TABLE )?(\w+)( AS \w+)?$")
+    
+    def check_query_plans(self, strikt: bool = True) -> Dict[str, List[str]]:
+        """
+        EXPLAIN QUERY PLAN für die heißen Abfragen
+        
+        Args:
+            strikt: True = RuntimeError, wenn eine Abfrage die Tabelle
+                    komplett scannt (fehlender/ungenutzter Index)
+        
+        Returns:
+            Abfrage-Name -> Zeilen des Query-Plans
+        """
+        aufgaben_query, aufgaben_params = self._baue_aufgaben_query(
+            fach="Mathematik", jahrgangsstufe=11
+        )
+        aufgaben_filter_query, aufgaben_filter_params = self._baue_aufgaben_query(
+            fach="Mathematik", jahrgangsstufe=11,
+            schwierigkeit="mittel", anforderungsbereich="II"
+        )
+        
+        abfragen = {
+            "get_aufgaben": (aufgaben_query, aufgaben_params),
+            "get_aufgaben (alle Filter)": (aufgaben_filter_query, aufgaben_filter_params),
+            "get_aufgaben (ohne Filter)": self._baue_aufgaben_query(),
+            "get_schueler_by_klasse": (
+                """
+                SELECT * FROM schueler
+                WHERE schuljahr = ? AND schule = ? AND klasse = ?
+                ORDER BY nachname, rufname
+                """,
+                ("2024/2025", "gyd", "8a")
+            ),
+            "aufgaben_grafiken IN": (
+                """
+                SELECT DISTINCT latex_name, grafik_blob
+                FROM aufgaben_grafiken
+                WHERE aufgabe_id IN (?, ?, ?)
+                """,
+                (1, 2, 3)
+            ),
+            "get_recent_klausuren": (
+                "SELECT * FROM klausuren ORDER BY erstellt_am DESC LIMIT ?",
+                (10,)
+            ),
+        }
+        
+        plaene = {}
+        scans = []
+        
+        # Eigene Verbindung ohne Statement-Cache: ein gecachtes EXPLAIN wird
+        # nach Schema-Änderungen (neuer/gelöschter Index) nicht neu geplant
+        conn = sqlite3.connect(str(self.db_path), cached_statements=0)
+        try:
+            for name, (query, params) in abfragen.items():
+                zeilen = [
+                    row[3]  # detail
+                    for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+                ]
+                plaene[name] = zeilen
+                
+                for detail in zeilen:
+                    if self._FULL_SCAN.match(detail):
+                        scans.append(f"{name}: {detail}")
+        finally:
+            conn.close()
+        
+        if scans:
+            meldung = "Abfragen ohne Index (Full Scan):\n" + "\n".join(scans)
+            if strikt:
+                raise RuntimeError(meldung)
+            print(f"⚠️ {meldung}")
+        
+        return plaene
+    
     # ============================================================
     # SCHULEN
     # ============================================================
@@ -220,35 +570,150 @@ class Database:
             jahrgangsstufe: 5-13
             schwierigkeit: "leicht", "mittel", "schwer"
             anforderungsbereich: "I", "II", "III"
-            suchtext: Volltext-Suche in Titel/Themengebiet
+            suchtext: Volltext-Suche (Titel, Themengebiet, Schlagwörter,
+                      Kompetenzen, LaTeX-Code) mit Präfix-Suche, nach
+                      Relevanz sortiert
         """
-        query = "SELECT * FROM aufgaben WHERE 1=1"
-        params = []
+        query, params = self._baue_aufgaben_query(
+            fach, jahrgangsstufe, schwierigkeit, anforderungsbereich, suchtext
+        )
+        return self.execute_query(query, params)
+    
+    def get_aufgaben_liste(
+        self,
+        fach: Optional[str] = None,
+        jahrgangsstufe: Optional[int] = None,
+        schwierigkeit: Optional[str] = None,
+        anforderungsbereich: Optional[str] = None,
+        suchtext: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aufgaben für Tabellen-Ansichten - nur Übersichts-Spalten
+        (AUFGABEN_LISTEN_SPALTEN), ohne latex_code/aufgaben_daten
+        
+        Filter wie get_aufgaben. Vollständige Datensätze bei Bedarf über
+        get_aufgabe_by_id / get_aufgaben_by_ids nachladen.
+        """
+        query, params = self._baue_aufgaben_query(
+            fach, jahrgangsstufe, schwierigkeit, anforderungsbereich, suchtext,
+            spalten=", ".join(f"a.{spalte}" for spalte in AUFGABEN_LISTEN_SPALTEN)
+        )
+        return self.execute_query(query, params)
+    
+    def _baue_aufgaben_query(
+        self,
+        fach: Optional[str] = None,
+        jahrgangsstufe: Optional[int] = None,
+        schwierigkeit: Optional[str] = None,
+        anforderungsbereich: Optional[str] = None,
+        suchtext: Optional[str] = None,
+        spalten: str = "a.*"
+    ) -> tuple:
+        """SQL + Parameter für get_aufgaben/get_aufgaben_liste (auch für check_query_plans)"""
+        fts_query = self._fts_query(suchtext) if suchtext else None
+        
+        if fts_query and self.fts_verfuegbar:
+            # Volltext: Treffer nach Relevanz (bm25, Titel am stärksten gewichtet)
+            query = f"""
+                SELECT {spalten} FROM aufgaben_fts
+                JOIN aufgaben a ON a.id = aufgaben_fts.rowid
+                WHERE aufgaben_fts MATCH ?
+            """
+            params = [fts_query]
+        else:
+            query = f"SELECT {spalten} FROM aufgaben a WHERE 1=1"
+            params = []
         
         if fach:
-            query += " AND fach = ?"
+            query += " AND a.fach = ?"
             params.append(fach)
         
         if jahrgangsstufe:
-            query += " AND jahrgangsstufe = ?"
+            query += " AND a.jahrgangsstufe = ?"
             params.append(jahrgangsstufe)
         
         if schwierigkeit:
-            query += " AND schwierigkeit = ?"
+            query += " AND a.schwierigkeit = ?"
             params.append(schwierigkeit)
         
         if anforderungsbereich:
-            query += " AND anforderungsbereich = ?"
+            query += " AND a.anforderungsbereich = ?"
             params.append(anforderungsbereich)
         
-        if suchtext:
-            query += " AND (titel LIKE ? OR themengebiet LIKE ?)"
-            search_pattern = f"%{suchtext}%"
-            params.extend([search_pattern, search_pattern])
+        if fts_query and self.fts_verfuegbar:
+            query += f" ORDER BY bm25(aufgaben_fts, {FTS_GEWICHTE}), a.erstellt_am DESC"
+        else:
+            if suchtext:
+                # Ohne FTS5: Teilstring-Suche wie bisher
+                query += " AND (a.titel LIKE ? OR a.themengebiet LIKE ?)"
+                search_pattern = f"%{suchtext}%"
+                params.extend([search_pattern, search_pattern])
+            query += " ORDER BY a.erstellt_am DESC"
         
-        query += " ORDER BY erstellt_am DESC"
+        return query, tuple(params)
+    
+    @staticmethod
+    def _fts_query(suchtext: str) -> Optional[str]:
+        """
+        Suchtext → FTS5-Ausdruck: jedes Wort als Präfix, alle Wörter müssen
+        vorkommen ("Integ rech" findet "Integralrechnung mit Rechteck...")
         
-        return self.execute_query(query, tuple(params))
+        Sonderzeichen werden verworfen, damit Eingaben wie "f(x)" oder
+        "AND" keine FTS-Syntaxfehler auslösen. Umlaute/ß werden um die
+        Ersatzschreibung erweitert (siehe _schreibvarianten).
+        """
+        woerter = re.findall(r"\w+", suchtext)
+        if not woerter:
+            return None
+        
+        teile = []
+        for wort in woerter:
+            varianten = Database._schreibvarianten(wort)
+            if len(varianten) == 1:
+                teile.append(f'"{varianten[0]}"*')
+            else:
+                teile.append("(" + " OR ".join(f'"{v}"*' for v in varianten) + ")")
+        return " AND ".join(teile)
+    
+    # Umlaut/ß ↔ Ersatzschreibung (Tokenizer faltet nur ä → a, nicht ä → ae)
+    _UMSCHREIBUNG = {"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"}
+    _UMSCHREIBUNG_MUSTER = re.compile("ae|oe|ue|ss|ä|ö|ü|ß")
+    
+    @staticmethod
+    def _schreibvarianten(wort: str) -> List[str]:
+        """
+        Deutsche Schreibvarianten eines Suchworts ("Flaeche" ↔ "Fläche",
+        "Mass" ↔ "Maß") - der Index enthält beide Schreibweisen
+        
+        Jede Stelle wird einzeln umgeschrieben (bis 4 Stellen alle
+        Kombinationen, sonst nur ganz/gar nicht), damit auch gemischte
+        Schreibungen wie "Strasse" → "Straße" gefunden werden.
+        """
+        wort = wort.lower()
+        stellen = list(Database._UMSCHREIBUNG_MUSTER.finditer(wort))
+        if not stellen:
+            return [wort]
+        
+        rueck = {v: k for k, v in Database._UMSCHREIBUNG.items()}
+        
+        def ersetze(auswahl) -> str:
+            teile, pos = [], 0
+            for stelle, tauschen in zip(stellen, auswahl):
+                teile.append(wort[pos:stelle.start()])
+                text = stelle.group()
+                if tauschen:
+                    text = Database._UMSCHREIBUNG.get(text) or rueck[text]
+                teile.append(text)
+                pos = stelle.end()
+            teile.append(wort[pos:])
+            return "".join(teile)
+        
+        if len(stellen) <= 4:
+            auswahlen = itertools.product((False, True), repeat=len(stellen))
+        else:
+            auswahlen = [(False,) * len(stellen), (True,) * len(stellen)]
+        
+        return list(dict.fromkeys(ersetze(auswahl) for auswahl in auswahlen))
     
     def get_aufgabe_by_id(self, aufgabe_id: int) -> Optional[Dict[str, Any]]:
         """Einzelne Aufgabe laden"""
@@ -258,6 +723,32 @@ class Database:
         )
         return results[0] if results else None
     
+    def get_aufgaben_by_ids(
+        self,
+        aufgaben_ids: List[int],
+        nur_liste: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Mehrere Aufgaben in einer Abfrage laden (Reihenfolge wie aufgaben_ids,
+        nicht gefundene IDs fehlen)
+        
+        Args:
+            aufgaben_ids: IDs der Aufgaben
+            nur_liste: True = nur AUFGABEN_LISTEN_SPALTEN
+        """
+        if not aufgaben_ids:
+            return []
+        
+        spalten = ", ".join(AUFGABEN_LISTEN_SPALTEN) if nur_liste else "*"
+        placeholders = ','.join('?' * len(aufgaben_ids))
+        results = self.execute_query(
+            f"SELECT {spalten} FROM aufgaben WHERE id IN ({placeholders})",
+            tuple(aufgaben_ids)
+        )
+        
+        by_id = {aufgabe['id']: aufgabe for aufgabe in results}
+        return [by_id[aufgabe_id] for aufgabe_id in aufgaben_ids if aufgabe_id in by_id]
+    
     def create_aufgabe(self, data: Dict[str, Any]) -> int:
         """
         Neue Aufgabe erstellen
@@ -322,14 +813,30 @@ class Database:
             data['id']
         )
         
-        return self.execute_update(query, params)
+        result = self.execute_update(query, params)
+        self._invalidiere_previews(data['id'])
+        return result
     
     def delete_aufgabe(self, aufgabe_id: int) -> int:
         """Aufgabe löschen"""
-        return self.execute_update(
+        result = self.execute_update(
             "DELETE FROM aufgaben WHERE id = ?",
             (aufgabe_id,)
         )
+        self._invalidiere_previews(aufgabe_id)
+        return result
+    
+    def _invalidiere_previews(self, aufgabe_id: int):
+        """
+        Gecachte Vorschau-PNGs einer Aufgabe verwerfen
+        
+        Geänderte Grafiken (aufgaben_grafiken) brauchen keinen Aufruf: der
+        Cache-Schlüssel enthält den Hash jeder Grafik, veraltete Einträge
+        werden nicht mehr getroffen und fallen per LRU heraus.
+        """
+        cache = get_preview_cache()
+        if cache is not None:
+            cache.invalidate_aufgabe(aufgabe_id)
     
     # ============================================================
     # TEMPLATES
@@ -387,6 +894,46 @@ class Database:
         
         return self.execute_query(query, (limit,))
     
+    def get_klausuren(
+        self,
+        suchtext: Optional[str] = None,
+        fach: Optional[str] = None,
+        typ: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Klausuren für die Verwaltung laden (neueste zuerst)
+        
+        Args:
+            suchtext: Teilstring in Titel, Fach oder Klasse
+            fach: Filter Fach (None = alle)
+            typ: Filter Typ (None = alle)
+        
+        Returns:
+            (gefilterte Klausuren, Anzahl aller Klausuren)
+        """
+        query = "SELECT * FROM klausuren WHERE 1=1"
+        params = []
+        
+        if suchtext:
+            query += " AND (titel LIKE ? OR fach LIKE ? OR klasse LIKE ?)"
+            search_pattern = f"%{suchtext}%"
+            params.extend([search_pattern, search_pattern, search_pattern])
+        
+        if fach:
+            query += " AND fach = ?"
+            params.append(fach)
+        
+        if typ:
+            query += " AND typ = ?"
+            params.append(typ)
+        
+        query += " ORDER BY erstellt_am DESC"
+        
+        klausuren = self.execute_query(query, tuple(params))
+        gesamt = self.execute_query("SELECT COUNT(*) as count FROM klausuren")[0]['count']
+        
+        return klausuren, gesamt
+    
     def create_klausur(self, data: Dict[str, Any]) -> int:
         """
         Neue Klausur erstellen
@@ -516,40 +1063,66 @@ class Database:
     
     def get_next_kasusid(self) -> int:
         """Nächste KasusID generieren"""
+        return self.reserve_kasusid_range(1)[0]
+    
+    def reserve_kasusid_range(self, n: int) -> range:
+        """
+        Zusammenhängenden Block von n KasusIDs reservieren
+        
+        Eine einzige BEGIN-IMMEDIATE-Transaktion: die Schreibsperre wird
+        vor dem Lesen des Zählers geholt, daher erhalten gleichzeitige
+        Generierungen (andere Threads oder Prozesse) nie dieselbe ID.
+        
+        Args:
+            n: Anzahl IDs (z.B. Schüler einer Klasse)
+            
+        Returns:
+            range der reservierten IDs (aufsteigend)
+        """
+        if n < 0:
+            raise ValueError(f"Ungültige Anzahl KasusIDs: {n}")
+        if n == 0:
+            return range(0)
+        
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            # Die Pool-Verbindung wird wiederverwendet: eine noch offene
+            # implizite Transaktion (DML ohne commit) würde BEGIN scheitern lassen
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
             
-            # Aktuellen Wert holen
-            cursor.execute(
+            row = conn.execute(
                 "SELECT letzter_wert FROM kasusid_counter WHERE id = 1"
-            )
-            result = cursor.fetchone()
+            ).fetchone()
             
-            if not result:
+            if row is None:
                 # Counter initialisieren
-                cursor.execute(
-                    "INSERT INTO kasusid_counter (id, letzter_wert) VALUES (1, 100000)"
-                )
                 current = 100000
+                conn.execute(
+                    "INSERT INTO kasusid_counter (id, letzter_wert) VALUES (1, ?)",
+                    (current + n,)
+                )
             else:
-                current = result[0]
-            
-            # Inkrementieren
-            next_id = current + 1
-            cursor.execute(
-                "UPDATE kasusid_counter SET letzter_wert = ?, aktualisiert_am = CURRENT_TIMESTAMP WHERE id = 1",
-                (next_id,)
-            )
+                current = row[0]
+                conn.execute(
+                    "UPDATE kasusid_counter SET letzter_wert = ?, aktualisiert_am = CURRENT_TIMESTAMP WHERE id = 1",
+                    (current + n,)
+                )
             
             conn.commit()
-            return next_id
+            return range(current + 1, current + n + 1)
     
     # ============================================================
     # GRAFIKEN
     # ============================================================
     
     def get_all_grafiken(self) -> List[Dict[str, Any]]:
-        """Alle Grafiken aus aufgaben_grafiken Tabelle laden"""
+        """
+        Alle Grafiken aus aufgaben_grafiken Tabelle laden - nur Metadaten
+        
+        Die Bilddaten selbst (grafik_blob) werden nicht geladen, siehe
+        get_grafik_blob / stream_grafik_blob.
+        """
         return self.execute_query(
             """
             SELECT 
@@ -558,7 +1131,6 @@ class Database:
                 latex_name,
                 dateiname,
                 dateityp,
-                grafik_blob,
                 breite_px,
                 hoehe_px,
                 groesse_bytes,
@@ -569,6 +1141,68 @@ class Database:
             """
         )
     
+    def stream_grafik_blob(
+        self,
+        grafik_id: int,
+        tabelle: str = "aufgaben_grafiken",
+        chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        """
+        Bilddaten einer Grafik stückweise lesen (inkrementelles BLOB-I/O,
+        die Zeile wird nie komplett als Python-Objekt geladen)
+        
+        Args:
+            grafik_id: ID der Grafik
+            tabelle: "aufgaben_grafiken" oder "grafiken_pool"
+            chunk_size: Bytes pro Stück
+            
+        Yields:
+            Datenblöcke (leer, wenn keine Grafik/kein BLOB vorhanden)
+        """
+        if tabelle not in GRAFIK_TABELLEN:
+            raise ValueError(f"Unbekannte Grafik-Tabelle: {tabelle}")
+        
+        with self.get_connection() as conn:
+            row = conn.execute(
+                f"SELECT rowid, grafik_blob IS NOT NULL FROM {tabelle} WHERE id = ?",
+                (grafik_id,)
+            ).fetchone()
+            
+            if not row or not row[1]:
+                return
+            
+            if not hasattr(conn, "blobopen"):
+                # Python < 3.11: kein inkrementelles BLOB-I/O
+                daten = conn.execute(
+                    f"SELECT grafik_blob FROM {tabelle} WHERE rowid = ?", (row[0],)
+                ).fetchone()[0]
+                for start in range(0, len(daten), chunk_size):
+                    yield daten[start:start + chunk_size]
+                return
+            
+            with conn.blobopen(tabelle, "grafik_blob", row[0], readonly=True) as blob:
+                while True:
+                    chunk = blob.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+    
+    def get_grafik_blob(
+        self,
+        grafik_id: int,
+        tabelle: str = "aufgaben_grafiken"
+    ) -> Optional[bytes]:
+        """
+        Bilddaten einer einzelnen Grafik laden (für die ausgewählte Zeile)
+        
+        Returns:
+            Bytes oder None
+        """
+        daten = bytearray()
+        for chunk in self.stream_grafik_blob(grafik_id, tabelle):
+            daten += chunk
+        return bytes(daten) if daten else None
+    
     def get_grafiken(self) -> List[Dict[str, Any]]:
         """Alle Grafiken laden (Alias für get_grafiken_pool)"""
         return self.get_grafiken_pool()
@@ -619,7 +1253,9 @@ class Database:
             data.get('tags', '')
         )
         
-        return self.execute_insert(query, params)
+        grafik_id = self.execute_insert(query, params)
+        self._speichere_thumbnails("grafiken_pool", grafik_id, data['grafik_blob'])
+        return grafik_id
     
     def delete_grafik(self, grafik_id: int) -> int:
         """Grafik löschen"""
@@ -629,30 +1265,182 @@ class Database:
         )
     
     # ============================================================
-    # STATISTIKEN
+    # THUMBNAILS
     # ============================================================
     
-    def get_statistics(self) -> Dict[str, int]:
-        """Allgemeine Statistiken"""
-        stats = {}
+    def get_grafik_thumbnail(
+        self,
+        grafik_id: int,
+        groesse: int,
+        tabelle: str = "aufgaben_grafiken"
+    ) -> Optional[bytes]:
+        """
+        Vorberechnetes Thumbnail (PNG) laden
+        
+        Fehlt es oder passt es nicht mehr zum Original (original_bytes !=
+        Länge des BLOBs), wird es einmalig aus dem Original neu erzeugt.
+        
+        Args:
+            grafik_id: ID der Grafik
+            groesse: gewünschte Breite (siehe THUMBNAIL_GROESSEN) - geliefert
+                     wird die kleinste gespeicherte Stufe >= groesse, sonst
+                     die größte vorhandene
+            tabelle: "aufgaben_grafiken" oder "grafiken_pool"
+            
+        Returns:
+            PNG-Bytes oder None (kein Thumbnail möglich, z.B. SVG/PDF)
+        """
+        if tabelle not in GRAFIK_TABELLEN:
+            raise ValueError(f"Unbekannte Grafik-Tabelle: {tabelle}")
+        
+        query = f"""
+            SELECT t.daten FROM grafik_thumbnails t
+            JOIN {tabelle} g ON g.id = t.grafik_id
+            WHERE t.tabelle = ? AND t.grafik_id = ?
+              AND t.original_bytes = length(g.grafik_blob)
+            ORDER BY t.groesse < ?, CASE WHEN t.groesse >= ? THEN t.groesse ELSE -t.groesse END
+            LIMIT 1
+        """
+        params = (tabelle, grafik_id, groesse, groesse)
         
-        # Anzahl Aufgaben
-        result = self.execute_query("SELECT COUNT(*) as count FROM aufgaben")
-        stats['aufgaben'] = result[0]['count'] if result else 0
+        results = self.execute_query(query, params)
+        if results:
+            return results[0]['daten']
         
-        # Anzahl Klausuren (aus klausuren Tabelle!)
-        result = self.execute_query("SELECT COUNT(*) as count FROM klausuren")
-        stats['klausuren'] = result[0]['count'] if result else 0
+        if not self._thumbnail_moeglich(grafik_id, tabelle):
+            return None
+        if not self._speichere_thumbnails(tabelle, grafik_id, self.get_grafik_blob(grafik_id, tabelle)):
+            return None
         
-        # Anzahl Grafiken
-        result = self.execute_query("SELECT COUNT(*) as count FROM grafiken_pool")
-        stats['grafiken'] = result[0]['count'] if result else 0
+        results = self.execute_query(query, params)
+        return results[0]['daten'] if results else None
+    
+    def _thumbnail_moeglich(self, grafik_id: int, tabelle: str) -> bool:
+        """Original vorhanden und kein SVG/PDF (Pillow kann es öffnen)"""
+        results = self.execute_query(
+            f"""
+            SELECT 1 FROM {tabelle}
+            WHERE id = ? AND grafik_blob IS NOT NULL
+              AND upper(COALESCE(dateityp, '')) NOT IN ('SVG', 'PDF')
+            """,
+            (grafik_id,)
+        )
+        return bool(results)
+    
+    def _speichere_thumbnails(self, tabelle: str, grafik_id: int, daten: Optional[bytes]) -> bool:
+        """Thumbnails erzeugen und speichern (Fehler brechen den Aufrufer nicht ab)"""
+        if not daten:
+            return False
         
-        # Anzahl Schüler
-        result = self.execute_query("SELECT COUNT(*) as count FROM schueler")
-        stats['schueler'] = result[0]['count'] if result else 0
+        thumbnails = erzeuge_thumbnails(daten)
+        if not thumbnails:
+            return False
+        
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO grafik_thumbnails
+                        (tabelle, grafik_id, groesse, breite_px, hoehe_px, original_bytes, daten)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (tabelle, grafik_id, groesse, breite, hoehe, len(daten), png)
+                        for groesse, (png, breite, hoehe) in thumbnails.items()
+                    ]
+                )
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ Thumbnails für Grafik {grafik_id} nicht gespeichert: {e}")
+            return False
+    
+    def backfill_thumbnails(self, progress_callback=None) -> int:
+        """
+        Fehlende oder veraltete Thumbnails für alle Grafiken nachberechnen
+        (Batch-Job, läuft z.B. im Hintergrund-Thread des Grafiken-Tabs)
+        
+        Veraltet = Original hat eine andere Größe als beim Erzeugen.
+        Originale werden einzeln über stream_grafik_blob gelesen; SVG/PDF
+        werden übersprungen (kein Thumbnail möglich).
+        
+        Args:
+            progress_callback: optional, callback(erledigt, gesamt)
+            
+        Returns:
+            Anzahl neu erzeugter Thumbnail-Sätze
+        """
+        anzahl_stufen = len(THUMBNAIL_GROESSEN)
+        offen = []
+        
+        for tabelle in GRAFIK_TABELLEN:
+            try:
+                rows = self.execute_query(
+                    f"""
+                    SELECT g.id FROM {tabelle} g
+                    WHERE g.grafik_blob IS NOT NULL
+                      AND upper(COALESCE(g.dateityp, '')) NOT IN ('SVG', 'PDF')
+                      AND (
+                        SELECT COUNT(*) FROM grafik_thumbnails t
+                        WHERE t.tabelle = ? AND t.grafik_id = g.id
+                          AND t.original_bytes = length(g.grafik_blob)
+                      ) < ?
+                    """,
+                    (tabelle, anzahl_stufen)
+                )
+            except sqlite3.Error as e:
+                print(f"⚠️ Thumbnail-Backfill: {tabelle} nicht lesbar: {e}")
+                continue
+            offen.extend((tabelle, row['id']) for row in rows)
+        
+        erzeugt = 0
+        for i, (tabelle, grafik_id) in enumerate(offen, start=1):
+            if self._speichere_thumbnails(tabelle, grafik_id, self.get_grafik_blob(grafik_id, tabelle)):
+                erzeugt += 1
+            if progress_callback:
+                progress_callback(i, len(offen))
+        
+        if offen:
+            print(f"✅ Thumbnails: {erzeugt} von {len(offen)} Grafiken nachberechnet")
+        return erzeugt
+    
+    # ============================================================
+    # STATISTIKEN
+    # ============================================================
+    
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        Allgemeine Statistiken (eine Abfrage)
+        
+        Liest die von Triggern gepflegte Tabelle statistik_zaehler; ohne
+        Migration 4 zählt eine einzelne Abfrage mit Unterabfragen.
+        """
+        try:
+            zeilen = self.execute_query("SELECT name, anzahl FROM statistik_zaehler")
+            stats = {row['name']: row['anzahl'] for row in zeilen}
+        except sqlite3.OperationalError:
+            stats = {}
+        
+        if len(stats) < len(STATISTIK_TABELLEN):
+            spalten = ", ".join(
+                f"(SELECT COUNT(*) FROM {tabelle}) AS {name}"
+                for name, tabelle in STATISTIK_TABELLEN.items()
+            )
+            stats = self.execute_query(f"SELECT {spalten}")[0]
         
         return stats
+    
+    def get_dashboard_daten(self, limit: int = 10) -> Dict[str, Any]:
+        """
+        Alles für das Dashboard in einem Aufruf (für den Hintergrund-Thread)
+        
+        Returns:
+            {'statistik': get_statistics(), 'letzte_klausuren': get_recent_klausuren(limit)}
+        """
+        return {
+            'statistik': self.get_statistics(),
+            'letzte_klausuren': self.get_recent_klausuren(limit),
+        }
 
 
 # Singleton-Instanz
@@ -0,0 +1,153 @@
+"""
+SQLite-Verbindungspool
+======================
+
+Eine wiederverwendbare Verbindung pro Thread und Datenbank-Datei statt
+eines neuen sqlite3.connect() bei jeder Abfrage.
+
+- WAL-Modus: Leser (Vorschau-Threads, GUI) blockieren den Schreiber nicht
+- Pragmas pro Verbindung: Page-Cache, Memory-Mapping, Temp-Tabellen im RAM
+- row_factory = sqlite3.Row (Zugriff per Spaltenname und Tupel-Entpacken)
+
+Verwendung:
+    pool = get_connection_pool(db_path)
+    with pool.transaction() as conn:
+        conn.execute("UPDATE ...")
+
+    conn = pool.connection()   # nur lesen, nicht schließen!
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Union
+
+
+class ConnectionPool:
+    """Thread-lokale SQLite-Verbindungen für eine Datenbank-Datei"""
+
+    # Werden auf jeder neuen Verbindung gesetzt (journal_mode gilt für die Datei)
+    PRAGMAS = (
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),      # mit WAL sicher, deutlich weniger fsync
+        ("cache_size", -20000),         # ~20 MB Page-Cache (negativ = KiB)
+        ("mmap_size", 268435456),       # 256 MB memory-mapped I/O
+        ("temp_store", "MEMORY"),
+        ("busy_timeout", 5000),         # ms warten statt "database is locked"
+    )
+
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        Args:
+            db_path: Pfad zur SQLite-Datenbank
+        """
+        self.db_path = Path(db_path)
+
+        self._lokal = threading.local()
+        self._lock = threading.Lock()
+        # Thread -> Verbindung (für close_all und Aufräumen beendeter Threads)
+        self._verbindungen: Dict[threading.Thread, sqlite3.Connection] = {}
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Verbindung des aktuellen Threads (wird beim ersten Zugriff geöffnet)
+
+        Die Verbindung gehört dem Pool und darf nicht geschlossen werden.
+        """
+        conn = getattr(self._lokal, 'conn', None)
+        if conn is None:
+            conn = self._oeffnen()
+            self._lokal.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Verbindung des Threads mit commit am Ende bzw. rollback bei Fehlern
+
+        Verwendung:
+            with pool.transaction() as conn:
+                conn.execute("INSERT ...")
+        """
+        conn = self.connection()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    def close_all(self):
+        """Alle Verbindungen schließen (beim Beenden der Anwendung)"""
+        with self._lock:
+            verbindungen, self._verbindungen = self._verbindungen, {}
+
+        for conn in verbindungen.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+        # Verbindung dieses Threads wird beim nächsten Zugriff neu geöffnet
+        self._lokal = threading.local()
+
+    def _oeffnen(self) -> sqlite3.Connection:
+        # check_same_thread=False nur, damit close_all() aus dem GUI-Thread
+        # schließen darf - benutzt wird jede Verbindung von genau einem Thread
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+
+        for name, wert in self.PRAGMAS:
+            try:
+                conn.execute(f"PRAGMA {name} = {wert}")
+            except sqlite3.Error as e:
+                print(f"⚠️ SQLite-Pragma {name} nicht gesetzt: {e}")
+
+        with self._lock:
+            # Verbindungen beendeter Threads (z.B. Executor-Worker) freigeben
+            for thread in [t for t in self._verbindungen if not t.is_alive()]:
+                try:
+                    self._verbindungen.pop(thread).close()
+                except sqlite3.Error:
+                    pass
+            self._verbindungen[threading.current_thread()] = conn
+
+        return conn
+
+
+# Ein Pool pro Datenbank-Datei
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: Union[str, Path]) -> ConnectionPool:
+    """
+    Pool für eine Datenbank-Datei holen (Singleton pro Pfad)
+
+    Args:
+        db_path: Pfad zur SQLite-Datenbank
+
+    Returns:
+        ConnectionPool-Instanz
+    """
+    key = str(Path(db_path).resolve())
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key)
+            _pools[key] = pool
+
+    return pool
+
+
+def close_connection_pools():
+    """Alle Pools schließen (beim Schließen des Hauptfensters)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,186 @@
+"""
+Format-Cache
+============
+
+Vorkompilierte LaTeX-Formate (.fmt) für das lokale Compile-Backend.
+
+Die Präambel (exam, tikz, pgfplots, siunitx, qrcode, ...) wird bei jedem
+Lauf neu eingelesen und dominiert bei kleinen Dokumenten (Vorschau einer
+Aufgabe) die Kompilierzeit. Mit mylatexformat wird die Präambel einmal
+als Format gedumpt; folgende Läufe starten direkt bei \\begin{document}.
+
+Schlüssel: SHA-256 über Präambel und Engine-Pfad. Ändert sich der Header,
+entsteht automatisch ein neues Format.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+
+class FormatCache:
+    """
+    Verzeichnis mit <name>.fmt Dateien, eine pro Präambel
+
+    Formate, deren Erzeugung fehlschlägt (z.B. mylatexformat nicht
+    installiert), werden für die Laufzeit gemerkt und nicht erneut versucht.
+    """
+
+    BEGIN_DOCUMENT = "\\begin{document}"
+
+    def __init__(self, format_dir: str, engine: str = "pdflatex", max_formate: int = 10):
+        """
+        Args:
+            format_dir: Verzeichnis für .fmt Dateien
+            engine: TeX-Engine, mit der das Format erzeugt wird
+            max_formate: Maximale Anzahl aufbewahrter Formate
+        """
+        self.format_dir = Path(format_dir)
+        self.format_dir.mkdir(parents=True, exist_ok=True)
+        self.engine = engine
+        self.max_formate = max_formate
+
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._fehlgeschlagen: Set[str] = set()
+
+    @classmethod
+    def split_praeambel(cls, latex_code: str) -> Optional[str]:
+        """Präambel (alles vor \\begin{document}) oder None"""
+        pos = latex_code.find(cls.BEGIN_DOCUMENT)
+        if pos < 0:
+            return None
+        return latex_code[:pos]
+
+    def make_name(self, praeambel: str) -> str:
+        """
+        Format-Name (= jobname) für eine Präambel
+
+        Der Pfad der Engine geht mit ein, damit ein TeX-Update
+        (anderes Binary) kein inkompatibles Format wiederverwendet.
+        """
+        h = hashlib.sha256()
+        h.update(praeambel.encode("utf-8"))
+        h.update(b"\0engine\0")
+        h.update(str(shutil.which(self.engine) or self.engine).encode("utf-8"))
+        return "klausur_" + h.hexdigest()[:24]
+
+    def _path_for(self, name: str) -> Path:
+        return self.format_dir / f"{name}.fmt"
+
+    def get_format(self, latex_code: str, timeout: int = 120) -> Optional[Path]:
+        """
+        Passendes Format holen (wird bei Bedarf erzeugt)
+
+        Args:
+            latex_code: Vollständiges Dokument
+            timeout: Timeout für die Format-Erzeugung
+
+        Returns:
+            Pfad zur .fmt Datei oder None (ohne Format kompilieren)
+        """
+        praeambel = self.split_praeambel(latex_code)
+        if praeambel is None:
+            return None
+
+        name = self.make_name(praeambel)
+        path = self._path_for(name)
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+
+        # Paralleler Klassensatz: nur ein Thread erzeugt das Format
+        with build_lock:
+            if name in self._fehlgeschlagen:
+                return None
+
+            if path.exists():
+                try:
+                    os.utime(path, None)
+                except OSError:
+                    pass
+                return path
+
+            if self._build(name, praeambel, timeout):
+                self._evict()
+                return path
+
+            with self._lock:
+                self._fehlgeschlagen.add(name)
+            return None
+
+    def invalidate(self, path: Path):
+        """Format verwerfen (z.B. nach Fehler beim Laden)"""
+        with self._lock:
+            self._fehlgeschlagen.add(path.stem)
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _build(self, name: str, praeambel: str, timeout: int) -> bool:
+        """Präambel mit mylatexformat als Format dumpen"""
+
+        if shutil.which(self.engine) is None:
+            return False
+
+        with tempfile.TemporaryDirectory(prefix="klausur_fmt_") as tmpdir:
+            workdir = Path(tmpdir)
+            (workdir / "praeambel.tex").write_text(
+                praeambel + self.BEGIN_DOCUMENT + "\n\\end{document}\n",
+                encoding="utf-8"
+            )
+
+            command = [
+                self.engine, "-ini", "-interaction=nonstopmode",
+                f"-jobname={name}", f"&{self.engine}",
+                "mylatexformat.ltx", "praeambel.tex"
+            ]
+
+            try:
+                subprocess.run(command, cwd=workdir, capture_output=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                print(f"⚠️ Format-Erzeugung: Timeout nach {timeout} Sekunden")
+                return False
+
+            fmt_file = workdir / f"{name}.fmt"
+            if not fmt_file.exists():
+                print("⚠️ Format-Erzeugung fehlgeschlagen (mylatexformat installiert?)")
+                return False
+
+            # Atomar ins Cache-Verzeichnis verschieben
+            fd, tmp_path = tempfile.mkstemp(dir=self.format_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(fmt_file, tmp_path)
+                os.replace(tmp_path, self._path_for(name))
+            except OSError as e:
+                print(f"⚠️ Format-Cache: Schreiben fehlgeschlagen: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return False
+
+        return True
+
+    def _evict(self):
+        """Nur die zuletzt benutzten max_formate Formate behalten"""
+        entries = []
+        for path in self.format_dir.glob("*.fmt"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+
+        entries.sort(reverse=True)  # neueste zuerst
+        for _, path in entries[self.max_formate:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
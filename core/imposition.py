@@ -0,0 +1,330 @@
+"""
+Ausschießen (Imposition)
+========================
+
+Seitenreihenfolgen für den Druck von Klassensätzen - für beliebig viele
+Seiten pro Schüler statt des festen 4-1-2-3-Musters:
+
+- LAYOUT_DUPLEX: Seiten in Originalreihenfolge, pro Schüler auf eine
+  gerade Seitenzahl aufgefüllt (jeder Schüler beginnt auf einem neuen Blatt)
+- LAYOUT_BROSCHUERE: Rückstichheftung, pro Schüler auf ein Vielfaches von
+  4 aufgefüllt; der Drucker druckt 2 Seiten pro A3-Seite (bei 4 Seiten
+  genau das bisherige 4-1-2-3)
+- LAYOUT_A3: wie LAYOUT_BROSCHUERE, aber die A4-Seiten werden schon in
+  der PDF paarweise auf A3-Bögen gesetzt (kein 2-up im Druckertreiber)
+
+Eine Seitenfolge ist eine Liste von 0-basierten Seitenindizes, LEER steht
+für eine eingefügte Leerseite. Umsortiert wird nur über die
+Seiten-Referenzen: Inhaltsströme werden weder geparst noch neu
+geschrieben, Fonts/Bilder eines Readers nur einmal übernommen.
+
+Die Seitenbereiche der Schüler kommen entweder aus einer festen
+Seitenzahl (gleiche_bereiche) oder aus Marken, die der Generator beim
+Kompilieren setzt (bereiche_aus_marken) - dann passt die Umsortierung
+auch, wenn eine Aufgabe eine zusätzliche Seite braucht.
+
+Verwendung:
+    folge = seitenfolge(gleiche_bereiche(len(reader.pages), 6), LAYOUT_BROSCHUERE)
+    writer = impositioniere(reader.pages, folge)
+    writer.write(out)
+"""
+
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject
+)
+
+from core.pdf_stream import atomar_schreiben, mmap_reader
+
+
+LAYOUT_DUPLEX = "duplex"
+LAYOUT_BROSCHUERE = "broschuere"
+LAYOUT_A3 = "a3"
+
+LAYOUTS = (LAYOUT_DUPLEX, LAYOUT_BROSCHUERE, LAYOUT_A3)
+
+# Platzhalter für eine eingefügte Leerseite in einer Seitenfolge
+LEER = None
+
+Seitenfolge = List[Optional[int]]
+
+
+# ============================================================================
+# SEITENFOLGEN (reine Index-Rechnung, ohne PDF)
+# ============================================================================
+
+def aufgefuellt(anzahl: int, vielfaches: int) -> int:
+    """Kleinstes Vielfaches von vielfaches >= anzahl"""
+    return -(-anzahl // vielfaches) * vielfaches
+
+
+def duplex_folge(anzahl: int) -> Seitenfolge:
+    """1, 2, ..., n - bei ungerader Seitenzahl mit Leerseite am Ende"""
+    folge: Seitenfolge = list(range(anzahl))
+    folge.extend([LEER] * (aufgefuellt(anzahl, 2) - anzahl))
+    return folge
+
+
+def broschueren_folge(anzahl: int) -> Seitenfolge:
+    """
+    Rückstichheftung: pro Bogen (außen, innen) - Vorderseite, Rückseite
+
+    Bogen b von n Seiten (n auf Vielfaches von 4 aufgefüllt):
+        Vorderseite: n-1-2b, 2b     Rückseite: 2b+1, n-2-2b
+    Bei n = 4 ergibt das 3, 0, 1, 2 (4-1-2-3). Leerseiten landen am
+    Ende des Hefts, also auf den letzten Innenseiten.
+    """
+    n = aufgefuellt(max(anzahl, 1), 4)
+    folge: Seitenfolge = []
+
+    for bogen in range(n // 4):
+        folge.extend((
+            n - 1 - 2 * bogen,
+            2 * bogen,
+            2 * bogen + 1,
+            n - 2 - 2 * bogen,
+        ))
+
+    return [i if i < anzahl else LEER for i in folge]
+
+
+def gleiche_bereiche(total_pages: int, pages_per_student: int) -> List[range]:
+    """
+    Seitenbereiche bei fester Seitenzahl pro Schüler
+
+    Ein unvollständiger Rest wird als eigener (kürzerer) Bereich
+    angehängt und damit ebenfalls aufgefüllt statt verschoben.
+    """
+    if pages_per_student < 1:
+        raise ValueError(f"Ungültige Seitenzahl pro Schüler: {pages_per_student}")
+
+    return [
+        range(start, min(start + pages_per_student, total_pages))
+        for start in range(0, total_pages, pages_per_student)
+    ]
+
+
+def seitenfolge(bereiche: Sequence[range], layout: str = LAYOUT_BROSCHUERE) -> Seitenfolge:
+    """Gesamtfolge für alle Schüler (Indizes in der Original-PDF)"""
+    if layout == LAYOUT_DUPLEX:
+        lokal = duplex_folge
+    elif layout in (LAYOUT_BROSCHUERE, LAYOUT_A3):
+        lokal = broschueren_folge
+    else:
+        raise ValueError(f"Unbekanntes Layout: {layout}")
+
+    folge: Seitenfolge = []
+    for bereich in bereiche:
+        # Leerer Bereich = Schüler ohne Seiten (z.B. fehlgeschlagen)
+        if not bereich:
+            continue
+        folge.extend(
+            LEER if i is LEER else bereich[i]
+            for i in lokal(len(bereich))
+        )
+    return folge
+
+
+def muster_folge(total_pages: int, pattern: Sequence[int]) -> Seitenfolge:
+    """
+    Festes Muster blockweise (altes PDFReorderer-Verhalten)
+
+    Rest-Seiten, die keinen vollen Block ergeben, bleiben unverändert.
+    """
+    laenge = len(pattern)
+    folge: Seitenfolge = []
+
+    num_blocks = total_pages // laenge
+    for block in range(num_blocks):
+        base = block * laenge
+        folge.extend(base + i for i in pattern if base + i < total_pages)
+
+    folge.extend(range(num_blocks * laenge, total_pages))
+    return folge
+
+
+def boegen(folge: Seitenfolge) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Seitenfolge paarweise (links, rechts) für 2-up-Bögen"""
+    if len(folge) % 2:
+        folge = list(folge) + [LEER]
+    return list(zip(folge[0::2], folge[1::2]))
+
+
+# ============================================================================
+# ANWENDEN AUF PDF-SEITEN
+# ============================================================================
+
+def _groesse(seite: PageObject) -> Tuple[float, float]:
+    box = seite.mediabox
+    return float(box.width), float(box.height)
+
+
+def impositioniere(
+    pages: Sequence[PageObject],
+    folge: Seitenfolge,
+    writer: Optional[PdfWriter] = None,
+    zwei_auf: bool = False
+) -> PdfWriter:
+    """
+    Seitenfolge auf die Seiten eines Readers anwenden
+
+    Args:
+        pages: reader.pages
+        folge: Seitenfolge (LEER = Leerseite in der Größe der Nachbarseite)
+        writer: vorhandener Writer (zum Anhängen), sonst ein neuer
+        zwei_auf: je zwei Seiten nebeneinander auf einen Bogen (LAYOUT_A3)
+
+    Returns:
+        Der Writer (noch nicht geschrieben)
+    """
+    if writer is None:
+        writer = PdfWriter()
+
+    if not folge:
+        return writer
+
+    # Leerseiten-Größe: letzte echte Seite davor (am Anfang: erste echte Seite)
+    erste = next((i for i in folge if i is not LEER), None)
+    if erste is None:
+        return writer
+    groesse = _groesse(pages[erste])
+
+    if not zwei_auf:
+        for i in folge:
+            if i is LEER:
+                writer.add_blank_page(*groesse)
+            else:
+                seite = pages[i]
+                groesse = _groesse(seite)
+                writer.add_page(seite)
+        return writer
+
+    for links, rechts in boegen(folge):
+        if links is not LEER:
+            groesse = _groesse(pages[links])
+        elif rechts is not LEER:
+            groesse = _groesse(pages[rechts])
+        _setze_bogen(
+            writer,
+            None if links is LEER else pages[links],
+            None if rechts is LEER else pages[rechts],
+            groesse
+        )
+
+    return writer
+
+
+def _als_form_xobject(writer: PdfWriter, seite: PageObject):
+    """
+    Seite als Form-XObject im Writer (für 2-up)
+
+    Ein einzelner Inhaltsstrom wird samt Kompression übernommen, nur bei
+    mehreren Strömen werden diese entpackt und aneinandergehängt.
+    """
+    inhalt = seite.raw_get('/Contents') if '/Contents' in seite else None
+    inhalt_obj = inhalt.get_object() if inhalt is not None else None
+
+    if isinstance(inhalt_obj, ArrayObject):
+        form = DecodedStreamObject()
+        form.set_data(b"\n".join(s.get_object().get_data() for s in inhalt_obj))
+    elif inhalt_obj is not None:
+        form = inhalt_obj.clone(writer, force_duplicate=True)
+    else:
+        form = DecodedStreamObject()
+
+    box = seite.mediabox
+    form[NameObject('/Type')] = NameObject('/XObject')
+    form[NameObject('/Subtype')] = NameObject('/Form')
+    form[NameObject('/BBox')] = ArrayObject(
+        FloatObject(float(v)) for v in (box.left, box.bottom, box.right, box.top)
+    )
+    if '/Resources' in seite:
+        # Über die Writer-Übersetzung: gemeinsame Fonts/Bilder nur einmal
+        form[NameObject('/Resources')] = seite.raw_get('/Resources').clone(writer)
+
+    return writer._add_object(form) if form.indirect_reference is None else form.indirect_reference
+
+
+def _setze_bogen(
+    writer: PdfWriter,
+    links: Optional[PageObject],
+    rechts: Optional[PageObject],
+    groesse: Tuple[float, float]
+):
+    """Einen A3-Bogen (Breite = 2 × Seitenbreite) mit bis zu zwei Seiten anhängen"""
+    breite, hoehe = groesse
+    bogen = PageObject.create_blank_page(None, 2 * breite, hoehe)
+
+    xobjects = DictionaryObject()
+    befehle = []
+
+    for name, seite, x in (('/L', links, 0.0), ('/R', rechts, breite)):
+        if seite is None:
+            continue
+        box = seite.mediabox
+        xobjects[NameObject(name)] = _als_form_xobject(writer, seite)
+        befehle.append(
+            f"q 1 0 0 1 {x - float(box.left):.4f} {-float(box.bottom):.4f} cm {name} Do Q"
+        )
+
+    if befehle:
+        inhalt = DecodedStreamObject()
+        inhalt.set_data("\n".join(befehle).encode('ascii'))
+
+        bogen[NameObject('/Resources')] = DictionaryObject({NameObject('/XObject'): xobjects})
+        bogen[NameObject('/Contents')] = writer._add_object(inhalt)
+
+    writer.add_page(bogen)
+
+
+def bereiche_aus_marken(reader: PdfReader, praefix: str) -> List[range]:
+    """
+    Seitenbereiche aus benannten PDF-Zielen praefix1, praefix2, ...
+
+    Jede Marke steht auf der ersten Seite eines Schülers (\\pdfdest beim
+    Kompilieren), ein Bereich reicht bis vor die nächste Marke. Leere Liste,
+    wenn die PDF keine (oder widersprüchliche) Marken enthält.
+    """
+    starts = []
+
+    for name, dest in reader.named_destinations.items():
+        name = str(name)
+        if not name.startswith(praefix) or not name[len(praefix):].isdigit():
+            continue
+        try:
+            starts.append((int(name[len(praefix):]), reader.get_destination_page_number(dest)))
+        except Exception:
+            continue
+
+    starts.sort()
+    seiten = [seite for _, seite in starts]
+
+    # Marken müssen lückenlos nummeriert sein und vorwärts laufen
+    if not seiten or [nr for nr, _ in starts] != list(range(1, len(starts) + 1)):
+        return []
+    if any(a >= b for a, b in zip(seiten, seiten[1:])):
+        return []
+
+    enden = seiten[1:] + [len(reader.pages)]
+    return [range(start, ende) for start, ende in zip(seiten, enden)]
+
+
+def impositioniere_datei(
+    quelle: Union[str, Path],
+    ziel: Union[str, Path],
+    bereiche: Sequence[range],
+    layout: str = LAYOUT_BROSCHUERE
+) -> int:
+    """
+    PDF-Datei → umsortierte PDF-Datei (Quelle per mmap, Ziel atomar)
+
+    Returns:
+        Seitenzahl der Ausgabe
+    """
+    with mmap_reader(quelle) as reader, atomar_schreiben(ziel) as out:
+        writer = impositioniere(reader.pages, seitenfolge(bereiche, layout), zwei_auf=(layout == LAYOUT_A3))
+        writer.write(out)
+        return len(writer.pages)
@@ -2,22 +2,26 @@
 PDF-Compiler
 ============
 
-Kompiliert LaTeX zu PDF via API
+Kompiliert LaTeX zu PDF via Compile-Backend (API oder lokal)
 """
 
-import requests
 from typing import Optional
 from pathlib import Path
 
+from core.compile_backend import (
+    CompileBackend, CompileError, LATEX_API_URL, get_compile_backend
+)
+
 
 class PDFCompiler:
     """Kompiliert LaTeX-Code zu PDF"""
     
-    # LaTeX-API Endpoint
-    API_URL = "https://latex.ytotech.com/builds/sync"
+    # LaTeX-API Endpoint (Standard für RemoteCompileBackend)
+    API_URL = LATEX_API_URL
     
-    def __init__(self):
+    def __init__(self, backend: Optional[CompileBackend] = None):
         self.timeout = 120  # 2 Minuten Timeout für große Dokumente
+        self.backend = backend or get_compile_backend()
         
     def compile_latex(self, latex_code: str) -> Optional[bytes]:
         """
@@ -31,37 +35,17 @@ class PDFCompiler:
         """
         
         try:
-            print(f"Kompiliere LaTeX ({len(latex_code)} Zeichen)...")
+            print(f"Kompiliere LaTeX ({len(latex_code)} Zeichen, Backend: {self.backend.name})...")
             
-            # API-Request
-            response = requests.post(
-                self.API_URL,
-                json={
-                    "compiler": "pdflatex",
-                    "resources": [
-                        {
-                            "main": True,
-                            "file": "main.tex",
-                            "content": latex_code
-                        }
-                    ]
-                },
-                timeout=self.timeout
-            )
+            pdf_data = self.backend.compile(latex_code, timeout=self.timeout)
             
-            if response.status_code == 200:
-                print("✅ PDF erfolgreich kompiliert!")
-                return response.content
-            else:
-                print(f"❌ API-Fehler: {response.status_code}")
-                print(f"Response: {response.text[:500]}")  # Erste 500 Zeichen
-                return None
+            print("✅ PDF erfolgreich kompiliert!")
+            return pdf_data
                 
-        except requests.exceptions.Timeout:
-            print(f"❌ Timeout nach {self.timeout} Sekunden")
-            return None
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Netzwerk-Fehler: {e}")
+        except CompileError as e:
+            print(f"❌ Kompilier-Fehler: {e}")
+            if e.log:
+                print(f"Log: {e.log[:500]}")  # Erste 500 Zeichen
             return None
         except Exception as e:
             print(f"❌ Fehler bei PDF-Kompilierung: {e}")
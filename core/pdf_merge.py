@@ -0,0 +1,182 @@
+"""
+PDF-Zusammenführung mit Ressourcen-Deduplizierung
+=================================================
+
+Mehrere PDFs (z.B. alle Klassensätze eines Jahrgangs) zu einer Druckdatei
+zusammenführen, ohne Schul-Logo, Grafiken und Fonts einmal pro
+Eingabedatei zu kopieren:
+
+- Die Eingaben werden per mmap geöffnet und parallel analysiert: für jedes
+  indirekte Objekt unter den Seiten-/Resources ein Inhalts-Hash (Streams
+  über die Rohdaten, Verweise rekursiv über den Hash des Ziels)
+- Beim Übernehmen in den Writer zeigen Objekte mit schon bekanntem Hash
+  direkt auf die vorhandene Kopie (über die Objekt-Übersetzung des
+  PdfWriter), werden also gar nicht erst geklont
+
+Verwendung:
+    seiten, gespart = fuege_zusammen(["8a.pdf", "8b.pdf"], "jahrgang8.pdf")
+"""
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from core.pdf_stream import atomar_schreiben, mmap_reader
+
+
+# Schlüssel, die auf den Seitenbaum zeigen: solche Objekte nie zusammenlegen
+_BAUM_SCHLUESSEL = ('/Parent', '/P', '/Kids')
+
+
+def fingerabdruecke(reader: PdfReader) -> Dict[int, bytes]:
+    """
+    Inhalts-Hash je indirektem Objekt unter den /Resources aller Seiten
+
+    Returns:
+        Objektnummer im reader → SHA-256 (Objekte im Zyklus oder mit
+        Verweis auf den Seitenbaum fehlen)
+    """
+    memo: Dict[int, Optional[bytes]] = {}
+    aktiv: Set[int] = set()
+
+    for page in reader.pages:
+        if '/Resources' in page:
+            _abdruck(page.raw_get('/Resources'), memo, aktiv)
+
+    return {idnum: abdruck for idnum, abdruck in memo.items() if abdruck is not None}
+
+
+def _abdruck(obj, memo: Dict[int, Optional[bytes]], aktiv: Set[int]) -> Optional[bytes]:
+    """Hash eines Objekts samt allem, worauf es verweist (None = nicht vergleichbar)"""
+
+    if isinstance(obj, IndirectObject):
+        idnum = obj.idnum
+        if idnum in memo:
+            return memo[idnum]
+        if idnum in aktiv:
+            return None
+
+        aktiv.add(idnum)
+        try:
+            abdruck = _abdruck(obj.get_object(), memo, aktiv)
+        finally:
+            aktiv.discard(idnum)
+
+        memo[idnum] = abdruck
+        return abdruck
+
+    if isinstance(obj, DictionaryObject):
+        if any(schluessel in obj for schluessel in _BAUM_SCHLUESSEL):
+            return None
+
+        h = hashlib.sha256(b'S' if isinstance(obj, StreamObject) else b'D')
+        for schluessel in sorted(obj.keys()):
+            if schluessel == '/Length':
+                continue
+            teil = _abdruck(dict.__getitem__(obj, schluessel), memo, aktiv)
+            if teil is None:
+                return None
+            h.update(schluessel.encode('utf-8', 'replace'))
+            h.update(teil)
+
+        if isinstance(obj, StreamObject):
+            # Rohdaten (noch komprimiert) - hashlib gibt dabei den GIL frei
+            h.update(obj._data or b'')
+        return h.digest()
+
+    if isinstance(obj, ArrayObject):
+        h = hashlib.sha256(b'A')
+        for eintrag in obj:
+            teil = _abdruck(eintrag, memo, aktiv)
+            if teil is None:
+                return None
+            h.update(teil)
+        return h.digest()
+
+    return type(obj).__name__.encode() + b':' + obj.hash_value_data()
+
+
+class RessourcenDedup:
+    """
+    Gleiche Ressourcen mehrerer Reader nur einmal im Writer
+
+    Pro Reader: vorbereiten() vor dem Anhängen seiner Seiten,
+    merken() danach.
+    """
+
+    def __init__(self, writer: PdfWriter):
+        self.writer = writer
+        self._bekannt: Dict[bytes, int] = {}
+        self.gespart = 0
+
+    def vorbereiten(self, reader: PdfReader, abdruecke: Dict[int, bytes]):
+        """Objekte mit bekanntem Hash auf die vorhandene Writer-Kopie umleiten"""
+        uebersetzt = self.writer._id_translated.setdefault(id(reader), {})
+
+        for idnum, abdruck in abdruecke.items():
+            ziel = self._bekannt.get(abdruck)
+            if ziel is not None and idnum not in uebersetzt:
+                uebersetzt[idnum] = ziel
+                self.gespart += 1
+
+    def merken(self, reader: PdfReader, abdruecke: Dict[int, bytes]):
+        """Neu übernommene Objekte für die folgenden Reader registrieren"""
+        uebersetzt = self.writer._id_translated.get(id(reader), {})
+
+        for idnum, abdruck in abdruecke.items():
+            if abdruck not in self._bekannt and idnum in uebersetzt:
+                self._bekannt[abdruck] = uebersetzt[idnum]
+
+
+def _alle_seiten(reader: PdfReader, writer: PdfWriter):
+    for page in reader.pages:
+        writer.add_page(page)
+
+
+def fuege_zusammen(
+    pfade: Sequence[Union[str, Path]],
+    ziel: Union[str, Path],
+    anordnen: Optional[Callable[[PdfReader, PdfWriter], None]] = None,
+    max_workers: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    PDFs in Reihenfolge zu einer Datei zusammenführen (Ziel atomar)
+
+    Args:
+        pfade: Eingabe-PDFs
+        ziel: Ausgabe-PDF
+        anordnen: Optional - hängt die Seiten eines Readers an den Writer an
+                  (z.B. umsortiert), Standard: alle Seiten unverändert
+        max_workers: Optional - parallele Analyse (Standard: CPU-Kerne)
+
+    Returns:
+        (Seiten der Ausgabe, Anzahl eingesparter Objekte)
+    """
+    anordnen = anordnen or _alle_seiten
+    workers = max(1, min(max_workers or os.cpu_count() or 2, len(pfade) or 1))
+
+    with ExitStack() as stack:
+        readers: List[PdfReader] = [stack.enter_context(mmap_reader(pfad)) for pfad in pfade]
+
+        # Analyse parallel (jeder Reader nur in einem Thread), Übernahme in Reihenfolge
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            alle_abdruecke = list(pool.map(fingerabdruecke, readers))
+
+        writer = PdfWriter()
+        dedup = RessourcenDedup(writer)
+
+        for reader, abdruecke in zip(readers, alle_abdruecke):
+            dedup.vorbereiten(reader, abdruecke)
+            anordnen(reader, writer)
+            dedup.merken(reader, abdruecke)
+
+        with atomar_schreiben(ziel) as out:
+            writer.write(out)
+
+        return len(writer.pages), dedup.gespart
@@ -2,13 +2,20 @@
 PDF-Reorderer
 =============
 
-Sortiert PDF-Seiten für optimalen Duplex-Druck um (4-1-2-3 Muster)
+Sortiert PDF-Seiten für optimalen Duplex-Druck um (4-1-2-3 Muster,
+allgemein: Broschüre/Duplex/A3 über core/imposition.py)
 """
 
 from PyPDF2 import PdfReader, PdfWriter
 from pathlib import Path
 from typing import List, Optional
 
+from core.imposition import (
+    LAYOUT_A3, LAYOUT_BROSCHUERE, Seitenfolge,
+    gleiche_bereiche, impositioniere, muster_folge, seitenfolge
+)
+from core.pdf_merge import fuege_zusammen
+
 
 class PDFReorderer:
     """
@@ -25,10 +32,38 @@ class PDFReorderer:
     - Rückseite Blatt 2: Seite 3
     
     Beim Falten in der Mitte: Perfekte Reihenfolge!
+    
+    Andere Seitenzahlen pro Schüler werden als Broschüre ausgeschossen und
+    mit Leerseiten aufgefüllt (siehe core/imposition.py).
     """
     
-    def __init__(self):
-        self.page_pattern = [3, 0, 1, 2]  # 4-1-2-3 (0-indiziert)
+    def __init__(self, seiten_pro_schueler: int = 4, layout: str = LAYOUT_BROSCHUERE):
+        self.seiten_pro_schueler = seiten_pro_schueler
+        self.layout = layout
+        
+    def _folge(self, total_pages: int, pattern: Optional[List[int]]) -> Seitenfolge:
+        """Seitenfolge: eigenes Muster blockweise, sonst Layout pro Schüler"""
+        if pattern is not None:
+            if total_pages % len(pattern) != 0:
+                print(f"⚠️ Warnung: {total_pages} Seiten passen nicht zu Pattern-Länge {len(pattern)}")
+            return muster_folge(total_pages, pattern)
+        
+        if total_pages % self.seiten_pro_schueler != 0:
+            print(f"⚠️ Warnung: {total_pages} Seiten sind kein Vielfaches von "
+                  f"{self.seiten_pro_schueler} - letzter Block wird aufgefüllt")
+        return seitenfolge(gleiche_bereiche(total_pages, self.seiten_pro_schueler), self.layout)
+    
+    def _impositioniere(
+        self,
+        reader: PdfReader,
+        pattern: Optional[List[int]],
+        writer: Optional[PdfWriter] = None
+    ) -> PdfWriter:
+        folge = self._folge(len(reader.pages), pattern)
+        return impositioniere(
+            reader.pages, folge, writer,
+            zwei_auf=(pattern is None and self.layout == LAYOUT_A3)
+        )
         
     def reorder_pdf(
         self, 
@@ -55,33 +90,8 @@ class PDFReorderer:
             
             print(f"PDF laden: {total_pages} Seiten")
             
-            # Pattern verwenden
-            if pattern is None:
-                pattern = self.page_pattern
-            
-            # Prüfe ob Pattern passt
-            if total_pages % len(pattern) != 0:
-                print(f"⚠️ Warnung: {total_pages} Seiten passen nicht zu Pattern-Länge {len(pattern)}")
-            
-            # Neue PDF erstellen
-            writer = PdfWriter()
-            
-            # Seiten umsortieren
-            num_blocks = total_pages // len(pattern)
-            remainder = total_pages % len(pattern)
-            
-            for block in range(num_blocks):
-                for pattern_idx in pattern:
-                    page_idx = block * len(pattern) + pattern_idx
-                    if page_idx < total_pages:
-                        writer.add_page(reader.pages[page_idx])
-                        print(f"  Block {block+1}: Füge Seite {page_idx+1} hinzu")
-            
-            # Rest-Seiten anhängen (falls vorhanden)
-            if remainder > 0:
-                print(f"⚠️ {remainder} Rest-Seiten werden unverändert angehängt")
-                for i in range(num_blocks * len(pattern), total_pages):
-                    writer.add_page(reader.pages[i])
+            # Seiten umsortieren (nur Referenzen, Inhalte bleiben unangetastet)
+            writer = self._impositioniere(reader, pattern)
             
             # PDF speichern
             output_path = Path(output_pdf)
@@ -118,38 +128,14 @@ class PDFReorderer:
         try:
             from io import BytesIO
             
-            # PDF aus bytes laden
-            reader = PdfReader(BytesIO(pdf_bytes))
-            total_pages = len(reader.pages)
-            
-            # Pattern verwenden
-            if pattern is None:
-                pattern = self.page_pattern
-            
-            # Neue PDF erstellen
-            writer = PdfWriter()
-            
-            # Seiten umsortieren
-            num_blocks = total_pages // len(pattern)
-            
-            for block in range(num_blocks):
-                for pattern_idx in pattern:
-                    page_idx = block * len(pattern) + pattern_idx
-                    if page_idx < total_pages:
-                        writer.add_page(reader.pages[page_idx])
-            
-            # Rest-Seiten
-            remainder = total_pages % len(pattern)
-            if remainder > 0:
-                for i in range(num_blocks * len(pattern), total_pages):
-                    writer.add_page(reader.pages[i])
+            # PDF aus bytes laden und umsortieren
+            writer = self._impositioniere(PdfReader(BytesIO(pdf_bytes)), pattern)
             
             # Als bytes zurückgeben
             output = BytesIO()
             writer.write(output)
-            output.seek(0)
             
-            return output.read()
+            return output.getvalue()
             
         except Exception as e:
             print(f"❌ Fehler beim Umsortieren (bytes): {e}")
@@ -159,7 +145,8 @@ class PDFReorderer:
         self,
         input_pdfs: List[str],
         output_pdf: str,
-        pattern: Optional[List[int]] = None
+        pattern: Optional[List[int]] = None,
+        deduplizieren: bool = False
     ) -> bool:
         """
         Sortiert mehrere PDFs um und fügt sie zusammen
@@ -168,36 +155,24 @@ class PDFReorderer:
             input_pdfs: Liste von Input-PDF-Pfaden
             output_pdf: Pfad zur Output-PDF
             pattern: Optional - Sortier-Muster
+            deduplizieren: Eingaben parallel analysieren und gleiche
+                           Fonts/Bilder nur einmal übernehmen
             
         Returns:
             True bei Erfolg
         """
         
+        if deduplizieren:
+            return self._reorder_multiple_dedupliziert(input_pdfs, output_pdf, pattern)
+        
         try:
             writer = PdfWriter()
             
-            if pattern is None:
-                pattern = self.page_pattern
-            
             for input_pdf in input_pdfs:
                 print(f"Verarbeite: {input_pdf}")
                 
-                reader = PdfReader(input_pdf)
-                total_pages = len(reader.pages)
-                num_blocks = total_pages // len(pattern)
-                
-                # Seiten umsortieren
-                for block in range(num_blocks):
-                    for pattern_idx in pattern:
-                        page_idx = block * len(pattern) + pattern_idx
-                        if page_idx < total_pages:
-                            writer.add_page(reader.pages[page_idx])
-                
-                # Rest-Seiten
-                remainder = total_pages % len(pattern)
-                if remainder > 0:
-                    for i in range(num_blocks * len(pattern), total_pages):
-                        writer.add_page(reader.pages[i])
+                # An denselben Writer anhängen
+                self._impositioniere(PdfReader(input_pdf), pattern, writer)
             
             # Speichern
             output_path = Path(output_pdf)
@@ -214,6 +189,29 @@ class PDFReorderer:
             print(f"❌ Fehler beim Zusammenführen: {e}")
             return False
     
+    def _reorder_multiple_dedupliziert(
+        self,
+        input_pdfs: List[str],
+        output_pdf: str,
+        pattern: Optional[List[int]]
+    ) -> bool:
+        """reorder_multiple_pdfs mit gemeinsamen Ressourcen (core/pdf_merge.py)"""
+        
+        try:
+            seiten, gespart = fuege_zusammen(
+                input_pdfs, output_pdf,
+                anordnen=lambda reader, writer: self._impositioniere(reader, pattern, writer)
+            )
+            
+            print(f"✅ {len(input_pdfs)} PDFs zusammengeführt: {output_pdf}")
+            print(f"   {seiten} Seiten, {gespart} doppelte Objekte eingespart")
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ Fehler beim Zusammenführen: {e}")
+            return False
+    
     def validate_pdf(self, pdf_path: str) -> tuple[bool, int]:
         """
         Validiert PDF und gibt Seitenzahl zurück
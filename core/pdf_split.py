@@ -0,0 +1,77 @@
+"""
+PDF-Aufteilung
+==============
+
+Einzel-PDFs pro Schüler aus einer kompilierten Klassensatz-PDF - per
+Seitenbereich, ohne erneutes Kompilieren (für Rückgabe/LMS-Upload).
+
+Verwendung:
+    dateien = teile_auf(roh_pfad, latex_gen.schueler_bereiche, ziele)
+    packe_zip(dateien, "8a_einzeln.zip")
+"""
+
+import re
+import zipfile
+from pathlib import Path
+from typing import List, Sequence, Union
+
+from PyPDF2 import PdfWriter
+
+from core.pdf_stream import atomar_schreiben, mmap_reader
+
+
+def sicherer_dateiname(text: str) -> str:
+    """Nur Buchstaben (auch Umlaute), Ziffern, '-', '_' und '.' - Rest wird '_'"""
+    name = re.sub(r'[^\w.\-]+', '_', text.strip())
+    return name.strip('._') or 'unbenannt'
+
+
+def teile_auf(
+    quelle: Union[str, Path],
+    bereiche: Sequence[range],
+    ziele: Sequence[Union[str, Path]]
+) -> List[Path]:
+    """
+    Seitenbereiche einer PDF als eigene Dateien schreiben
+
+    Args:
+        quelle: Gesamt-PDF (wird per mmap gelesen)
+        bereiche: Seitenbereich je Ziel (leer = Ziel wird übersprungen)
+        ziele: Ausgabe-Pfade, gleiche Reihenfolge wie bereiche
+
+    Returns:
+        Tatsächlich geschriebene Dateien
+    """
+    if len(bereiche) != len(ziele):
+        raise ValueError(f"{len(bereiche)} Seitenbereiche, aber {len(ziele)} Ziele")
+
+    geschrieben = []
+
+    with mmap_reader(quelle) as reader:
+        for bereich, ziel in zip(bereiche, ziele):
+            if not bereich:
+                continue
+
+            writer = PdfWriter()
+            for i in bereich:
+                writer.add_page(reader.pages[i])
+
+            with atomar_schreiben(ziel) as out:
+                writer.write(out)
+            geschrieben.append(Path(ziel))
+
+    return geschrieben
+
+
+def packe_zip(dateien: Sequence[Union[str, Path]], zip_pfad: Union[str, Path]) -> Path:
+    """
+    Dateien flach in ein ZIP (atomar)
+
+    PDFs sind bereits komprimiert - ZIP_STORED spart die CPU-Zeit.
+    """
+    with atomar_schreiben(zip_pfad) as out:
+        with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED) as zf:
+            for datei in dateien:
+                zf.write(datei, arcname=Path(datei).name)
+
+    return Path(zip_pfad)
@@ -0,0 +1,291 @@
+"""
+PDF-Stamper
+===========
+
+Erzeugt Schüler-Exemplare aus EINER kompilierten Vorlage:
+Die Vorlage enthält benannte PDF-Ziele (\\pdfdest) an den Stellen,
+an denen Name, QR-Code und Kopfzeile stehen sollen. Pro Schüler wird
+nur eine kleine reportlab-Ebene erzeugt und über die Vorlagen-Seite gelegt.
+
+Jede Vorlagen-Seite wird genau einmal als Form-XObject ins Ausgabe-PDF
+übernommen; die Schüler-Seiten referenzieren sie nur (kein Kopieren
+des Seiteninhalts pro Schüler).
+
+Text wird mit einer eingebetteten TrueType-Schrift gesetzt (Unicode,
+z.B. ğ/ş/ł in Namen) - die Standard-14-Schriften können nur WinAnsi.
+"""
+
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject,
+    NameObject, NumberObject
+)
+
+import qrcode
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+
+# PDF-Punkte pro Zentimeter
+CM = 72 / 2.54
+
+# Serifen-TTF (normal, fett) - erste vorhandene wird eingebettet
+SCHRIFT_KANDIDATEN = [
+    (Path(__file__).parent.parent / "resources" / "fonts" / "StempelSerif.ttf",
+     Path(__file__).parent.parent / "resources" / "fonts" / "StempelSerif-Bold.ttf"),
+    (Path("C:/Windows/Fonts/times.ttf"), Path("C:/Windows/Fonts/timesbd.ttf")),
+    (Path("/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf"),
+     Path("/usr/share/fonts/truetype/dejavu/DejaVuSerif-Bold.ttf")),
+    (Path("/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf"),
+     Path("/usr/share/fonts/truetype/liberation/LiberationSerif-Bold.ttf")),
+    (Path("/usr/share/fonts/dejavu/DejaVuSerif.ttf"),
+     Path("/usr/share/fonts/dejavu/DejaVuSerif-Bold.ttf")),
+    (Path("/Library/Fonts/Times New Roman.ttf"),
+     Path("/Library/Fonts/Times New Roman Bold.ttf")),
+    (Path("/System/Library/Fonts/Supplemental/Times New Roman.ttf"),
+     Path("/System/Library/Fonts/Supplemental/Times New Roman Bold.ttf")),
+]
+
+# Ohne TTF: Standard-14 (nur WinAnsi)
+_FALLBACK = ("Times-Roman", "Times-Bold")
+
+_schriften: Optional[Tuple[str, str]] = None
+
+
+def stempel_schriften() -> Tuple[str, str]:
+    """
+    Registrierte Schriftnamen (normal, fett) für die Schüler-Ebene
+
+    Registriert die erste vorhandene TTF aus SCHRIFT_KANDIDATEN einmalig
+    bei reportlab (eingebettet als Teilmenge). Fehlt die fette Variante,
+    wird die normale auch für fett verwendet.
+    """
+    global _schriften
+    if _schriften is not None:
+        return _schriften
+
+    for normal, fett in SCHRIFT_KANDIDATEN:
+        if not normal.is_file():
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont("Stempel", str(normal)))
+            if fett.is_file():
+                pdfmetrics.registerFont(TTFont("Stempel-Bold", str(fett)))
+                _schriften = ("Stempel", "Stempel-Bold")
+            else:
+                _schriften = ("Stempel", "Stempel")
+            return _schriften
+        except Exception as e:
+            print(f"⚠️  Schrift {normal} nicht nutzbar: {e}")
+
+    print("⚠️  Keine TrueType-Schrift gefunden - Stempel nur mit WinAnsi-Zeichen")
+    _schriften = _FALLBACK
+    return _schriften
+
+
+@dataclass
+class Stempel:
+    """Ein Eintrag der Schüler-Ebene an einer benannten Marke der Vorlage"""
+
+    feld: str                       # Name der \pdfdest-Marke
+    text: str = ""
+    qr_daten: Optional[str] = None  # gesetzt → QR-Code statt Text
+    schrift: Optional[str] = None   # None → eingebettete Stempel-Schrift
+    fett: bool = False
+    groesse: float = 12
+    ausrichtung: str = "links"      # links | mitte | rechts
+    breite: float = 0               # Feldbreite in pt (mitte/rechts, QR)
+    hoehe: float = 0                # Feldhöhe in pt (QR)
+
+
+class PDFStamper:
+    """
+    Legt pro Schüler eine Text-/QR-Ebene über eine gemeinsame Vorlage
+
+    Verwendung:
+        stamper = PDFStamper(vorlage_pdf)
+        for schueler in ...:
+            stamper.add_exemplar([Stempel("name", "Max Muster"), ...])
+        pdf_bytes = stamper.write()
+    """
+
+    def __init__(self, vorlage_pdf: bytes):
+        """
+        Args:
+            vorlage_pdf: Kompilierte Vorlage mit \\pdfdest-Marken
+        """
+        self.reader = PdfReader(io.BytesIO(vorlage_pdf))
+        self.writer = PdfWriter()
+        self.felder = self._lese_felder()
+
+        # Vorlagen-Seiten: lazy als Form-XObjects übernommen
+        self._formulare: Dict[int, object] = {}
+
+    @property
+    def seitenanzahl(self) -> int:
+        return len(self.reader.pages)
+
+    def _lese_felder(self) -> Dict[str, Tuple[int, float, float]]:
+        """Benannte Ziele → (Seitenindex, x, y) der Marke"""
+        felder = {}
+
+        for name, dest in self.reader.named_destinations.items():
+            try:
+                seite = self.reader.get_destination_page_number(dest)
+                x = float(dest.left or 0)
+                y = float(dest.top or 0)
+            except Exception:
+                continue
+            felder[str(name)] = (seite, x, y)
+
+        return felder
+
+    def fehlende_felder(self, namen: List[str]) -> List[str]:
+        """Marken, die in der Vorlage nicht gefunden wurden"""
+        return [n for n in namen if n not in self.felder]
+
+    def add_exemplar(self, stempel: List[Stempel]):
+        """
+        Hängt ein Exemplar (alle Vorlagen-Seiten + Schüler-Ebene) an
+
+        Args:
+            stempel: Einträge dieses Schülers; unbekannte Felder werden ignoriert
+        """
+        ebene = PdfReader(io.BytesIO(self._zeichne_ebene(stempel)))
+
+        for seite_idx in range(self.seitenanzahl):
+            self._fuege_seite_hinzu(seite_idx, ebene.pages[seite_idx])
+
+    def write(self) -> bytes:
+        """Alle Exemplare als PDF-Bytes"""
+        out = io.BytesIO()
+        self.write_to(out)
+        return out.getvalue()
+
+    def write_to(self, out: BinaryIO):
+        """Alle Exemplare direkt in eine geöffnete Binär-Datei schreiben"""
+        self.writer.write(out)
+
+    # ------------------------------------------------------------------
+    # Interna
+    # ------------------------------------------------------------------
+
+    def _zeichne_ebene(self, stempel: List[Stempel]) -> bytes:
+        """Schüler-Ebene mit reportlab zeichnen (eine Seite je Vorlagen-Seite)"""
+
+        pro_seite: Dict[int, List[Stempel]] = {}
+        for s in stempel:
+            if s.feld in self.felder:
+                pro_seite.setdefault(self.felder[s.feld][0], []).append(s)
+
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer)
+
+        for seite_idx, seite in enumerate(self.reader.pages):
+            box = seite.mediabox
+            c.setPageSize((float(box.width), float(box.height)))
+
+            for s in pro_seite.get(seite_idx, []):
+                _, x, y = self.felder[s.feld]
+
+                if s.qr_daten is not None:
+                    self._zeichne_qr(c, s, x, y)
+                    continue
+
+                c.setFont(s.schrift or stempel_schriften()[s.fett], s.groesse)
+                if s.ausrichtung == "mitte":
+                    c.drawCentredString(x + s.breite / 2, y, s.text)
+                elif s.ausrichtung == "rechts":
+                    c.drawRightString(x + s.breite, y, s.text)
+                else:
+                    c.drawString(x, y, s.text)
+
+            c.showPage()
+
+        c.save()
+        return buffer.getvalue()
+
+    @staticmethod
+    def _zeichne_qr(c: canvas.Canvas, s: Stempel, x: float, y: float):
+        """QR-Code (ohne Rand, wie \\qrcode) mit Grundlinie bei y"""
+        qr = qrcode.QRCode(border=0)
+        qr.add_data(s.qr_daten)
+        qr.make(fit=True)
+
+        image = qr.make_image(fill_color="black", back_color="white").get_image()
+        seite = s.hoehe or s.breite
+        c.drawImage(ImageReader(image), x, y, width=seite, height=seite)
+
+    def _formular(self, seite_idx: int):
+        """Vorlagen-Seite einmalig als Form-XObject übernehmen"""
+
+        if seite_idx in self._formulare:
+            return self._formulare[seite_idx]
+
+        seite = self.reader.pages[seite_idx]
+        inhalt = seite.get_contents()
+        daten = inhalt.get_data() if inhalt is not None else b""
+
+        # flate_encode() übernimmt nur /Filter - Einträge danach setzen
+        form = DecodedStreamObject()
+        form.set_data(daten)
+        form = form.flate_encode()
+        form.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/BBox"): ArrayObject(
+                [FloatObject(v) for v in seite.mediabox]
+            ),
+        })
+
+        ressourcen = seite.get("/Resources")
+        if ressourcen is not None:
+            form[NameObject("/Resources")] = ressourcen.get_object().clone(self.writer)
+
+        ref = self.writer._add_object(form)
+        self._formulare[seite_idx] = ref
+        return ref
+
+    def _fuege_seite_hinzu(self, seite_idx: int, ebenen_seite):
+        """Neue Seite: Vorlage (Form-XObject) + Schüler-Ebene darüber"""
+
+        vorlage = self.reader.pages[seite_idx]
+
+        # Ressourcen der Ebene (Schrift, QR-Bild) ins Ausgabe-PDF klonen
+        ebenen_res = ebenen_seite.get("/Resources")
+        if ebenen_res is not None:
+            ressourcen = ebenen_res.get_object().clone(self.writer)
+        else:
+            ressourcen = DictionaryObject()
+
+        xobjects = ressourcen.get("/XObject")
+        xobjects = xobjects.get_object() if xobjects is not None else DictionaryObject()
+        xobjects[NameObject("/Vorlage")] = self._formular(seite_idx)
+        ressourcen[NameObject("/XObject")] = xobjects
+
+        ebene = ebenen_seite.get_contents()
+        ebenen_daten = ebene.get_data() if ebene is not None else b""
+
+        # Vorlage in eigenem Grafikzustand, Ebene darüber
+        inhalt = DecodedStreamObject()
+        inhalt.set_data(b"q /Vorlage Do Q\n" + ebenen_daten)
+
+        seite = PageObject.create_blank_page(
+            width=vorlage.mediabox.width, height=vorlage.mediabox.height
+        )
+        seite[NameObject("/MediaBox")] = vorlage.mediabox
+        seite[NameObject("/Resources")] = ressourcen
+        seite[NameObject("/Contents")] = self.writer._add_object(inhalt.flate_encode())
+
+        rotation = vorlage.get("/Rotate")
+        if rotation:
+            seite[NameObject("/Rotate")] = NumberObject(rotation)
+
+        self.writer.add_page(seite)
@@ -0,0 +1,80 @@
+"""
+PDF-Dateien ohne Vollkopie im RAM
+=================================
+
+Hilfen für die Klassensatz-Pipeline (kompilieren → umsortieren →
+Zieldatei), damit große Klassensätze nicht mehrfach als bytes im
+Speicher liegen:
+
+- mmap_reader: PdfReader über eine memory-mapped Datei (PyPDF2 liest
+  bei einem Pfad die ganze Datei in ein BytesIO, bei mmap liefert das
+  Betriebssystem die Seiten nach Bedarf aus dem Page-Cache)
+- atomar_schreiben: Ausgabe in eine Temp-Datei im Zielordner, erst bei
+  Erfolg per os.replace an den Zielnamen - nie eine halbe PDF am Ziel
+
+Verwendung:
+    with mmap_reader(quelle) as reader, atomar_schreiben(ziel) as out:
+        writer = PdfWriter()
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.write(out)
+"""
+
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Union
+
+from PyPDF2 import PdfReader
+
+
+@contextmanager
+def mmap_reader(pfad: Union[str, Path]) -> Iterator[PdfReader]:
+    """
+    PdfReader über eine memory-mapped PDF-Datei
+
+    Der Reader (und alle Seiten daraus) darf nur innerhalb des
+    with-Blocks benutzt werden - auch PdfWriter.write() gehört hinein.
+    """
+    with open(pfad, 'rb') as f:
+        daten = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield PdfReader(daten)
+        finally:
+            try:
+                daten.close()
+            except BufferError:
+                # Noch referenzierte Puffer: mmap wird mit dem letzten Verweis frei
+                pass
+
+
+@contextmanager
+def atomar_schreiben(ziel: Union[str, Path]) -> Iterator[BinaryIO]:
+    """
+    Binär-Datei zum Schreiben, die erst am Ende an den Zielnamen wandert
+
+    Bei einer Exception wird die Temp-Datei gelöscht, ein vorhandenes
+    Ziel bleibt unverändert.
+    """
+    ziel = Path(ziel)
+    ziel.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, temp_pfad = tempfile.mkstemp(suffix='.part', prefix=ziel.stem + '_', dir=ziel.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.replace(temp_pfad, ziel)
+    except BaseException:
+        try:
+            os.unlink(temp_pfad)
+        except OSError:
+            pass
+        raise
+
+
+def schreibe_pdf(pdf_bytes: bytes, ziel: Union[str, Path]):
+    """Kompilierte PDF-Bytes atomar in eine Datei schreiben"""
+    with atomar_schreiben(ziel) as f:
+        f.write(pdf_bytes)
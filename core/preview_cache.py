@@ -0,0 +1,242 @@
+"""
+Preview-Cache
+=============
+
+Persistenter Cache für Aufgaben-Vorschauen (PNG) im Verzeichnis
+cache/preview.
+
+Schlüssel: Aufgaben-ID + SHA-256 über LaTeX-Code, Header, Grafik-Blobs,
+DPI und mit_loesung. Dateiname <aufgabe_id>_<hash>.png - damit lassen
+sich alle Vorschauen einer Aufgabe gezielt löschen (update_aufgabe,
+Grafik-Änderungen).
+
+Größenbeschränkt wie der CompileCache: Zugriffe setzen die mtime, beim
+Überschreiten von max_bytes werden die ältesten PNGs gelöscht (auch
+verwaiste Vorschauen bearbeiteter Aufgaben).
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from core.compile_backend import PROJECT_ROOT, load_compile_config
+
+
+class PreviewCache:
+    """PNG-Vorschauen pro Aufgabe auf der Festplatte"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 100 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Verzeichnis für PNG-Dateien
+            max_bytes: Maximale Gesamtgröße in Bytes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # Geschätzte Gesamtgröße (None = noch nicht gezählt) - spart das
+        # Verzeichnis-Scannen bei jedem put, solange das Limit weit weg ist
+        self._groesse: Optional[int] = None
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        latex_code: str,
+        grafiken: Optional[Dict[str, bytes]] = None,
+        dpi: int = 150,
+        mit_loesung: bool = False,
+        header: str = ""
+    ) -> str:
+        """
+        Cache-Schlüssel (ohne Aufgaben-ID) berechnen
+
+        Args:
+            latex_code: LaTeX-Code der Aufgabe
+            grafiken: Dateiname -> Bytes
+            dpi: Auflösung
+            mit_loesung: Lösungen sichtbar?
+            header: Präambel des Vorschau-Dokuments
+
+        Returns:
+            SHA-256 als Hex-String
+        """
+        h = hashlib.sha256()
+        h.update(latex_code.encode("utf-8"))
+        h.update(b"\0header\0")
+        h.update(header.encode("utf-8"))
+        h.update(f"\0dpi={dpi}\0loesung={int(bool(mit_loesung))}".encode("ascii"))
+
+        for name in sorted(grafiken or {}):
+            h.update(b"\0grafik\0")
+            h.update(name.encode("utf-8"))
+            h.update(b"\0")
+            h.update(hashlib.sha256(grafiken[name]).digest())
+
+        return h.hexdigest()
+
+    def _path_for(self, aufgabe_id: int, key: str) -> Path:
+        return self.cache_dir / f"{int(aufgabe_id)}_{key}.png"
+
+    def get(self, aufgabe_id: int, key: str) -> Optional[bytes]:
+        """PNG aus Cache holen (None bei Miss)"""
+        path = self._path_for(aufgabe_id, key)
+
+        try:
+            data = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # LRU: Zugriff vermerken
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def contains(self, aufgabe_id: int, key: str) -> bool:
+        return self._path_for(aufgabe_id, key).exists()
+
+    def put(self, aufgabe_id: int, key: str, png_bytes: bytes):
+        """PNG atomar ablegen und ggf. alte Einträge verdrängen"""
+        if len(png_bytes) > self.max_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png_bytes)
+            os.replace(tmp_path, self._path_for(aufgabe_id, key))
+        except OSError as e:
+            print(f"⚠️ Preview-Cache: Schreiben fehlgeschlagen: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self._groesse is not None:
+                self._groesse += len(png_bytes)
+            voll = self._groesse is None or self._groesse > self.max_bytes
+
+        if voll:
+            self.evict()
+
+    def evict(self):
+        """Älteste Einträge löschen, bis max_bytes eingehalten ist"""
+        with self._lock:
+            entries = []
+            total = 0
+
+            for path in self.cache_dir.glob("*.png"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            if total > self.max_bytes:
+                entries.sort()  # älteste zuerst
+                for _, size, path in entries:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        path.unlink()
+                        total -= size
+                    except OSError:
+                        pass
+
+            self._groesse = total
+
+    def invalidate_aufgabe(self, aufgabe_id: int) -> int:
+        """
+        Alle Vorschauen einer Aufgabe löschen
+
+        Returns:
+            Anzahl gelöschter Dateien
+        """
+        geloescht = 0
+        for path in self.cache_dir.glob(f"{int(aufgabe_id)}_*.png"):
+            try:
+                path.unlink()
+                geloescht += 1
+            except OSError:
+                pass
+        return geloescht
+
+    def clear(self):
+        """Cache komplett leeren"""
+        for path in self.cache_dir.glob("*.png"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self._groesse = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Treffer-/Fehlschlag-Zähler und aktuelle Größe"""
+        files = list(self.cache_dir.glob("*.png"))
+        size = 0
+        for path in files:
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'eintraege': len(files),
+                'groesse_bytes': size,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Singleton-Instanz
+_cache_instance: Optional[PreviewCache] = None
+
+
+def get_preview_cache() -> Optional[PreviewCache]:
+    """
+    Globalen Preview-Cache holen (Singleton-Pattern)
+
+    Returns:
+        PreviewCache-Instanz oder None (abgeschaltet / nicht verfügbar)
+    """
+    global _cache_instance
+
+    if _cache_instance is None:
+        config = load_compile_config()
+        if not config.get('preview_cache', True):
+            return None
+
+        cache_dir = Path(config.get('preview_cache_dir', 'cache/preview'))
+        if not cache_dir.is_absolute():
+            cache_dir = PROJECT_ROOT / cache_dir
+
+        try:
+            _cache_instance = PreviewCache(
+                str(cache_dir),
+                max_bytes=int(float(config.get('preview_cache_max_mb', 100)) * 1024 * 1024)
+            )
+        except OSError as e:
+            print(f"⚠️ Preview-Cache nicht verfügbar: {e}")
+            return None
+
+    return _cache_instance
@@ -0,0 +1,72 @@
+"""
+Thumbnails für Grafiken
+=======================
+
+Erzeugt verkleinerte Vorschau-Versionen (800 px breit, PNG) aus den
+Original-Bilddaten. Gespeichert werden sie von core.database in der
+Tabelle grafik_thumbnails - Listen und Detailansichten dekodieren dann
+nur noch wenige KB statt des Originals.
+
+PNG statt WebP: Qt liest PNG ohne Zusatz-Plugin (qtimageformats).
+SVG und PDF kann Pillow nicht öffnen - dafür gibt es keine Thumbnails.
+"""
+
+import io
+from typing import Dict, Iterable, Tuple
+
+from PIL import Image, ImageOps
+
+
+# Maximale Breite in Pixeln (Höhe folgt dem Seitenverhältnis - wie
+# scaledToWidth in der Detailansicht, hohe Grafiken bleiben lesbar).
+# Nur Stufen, die auch gelesen werden - derzeit die Detailansicht im Grafiken-Tab
+THUMBNAIL_GROESSEN = (800,)
+
+
+def erzeuge_thumbnails(
+    daten: bytes,
+    groessen: Iterable[int] = THUMBNAIL_GROESSEN
+) -> Dict[int, Tuple[bytes, int, int]]:
+    """
+    Verkleinerte PNG-Versionen eines Bildes erzeugen
+
+    Kleine Bilder werden nicht vergrößert - ist das Original schon kleiner
+    als eine Stufe, enthält diese Stufe das Bild in Originalgröße.
+
+    Args:
+        daten: Original-Bilddaten (PNG, JPEG, GIF, ...)
+        groessen: maximale Breiten in Pixeln
+
+    Returns:
+        Größe -> (PNG-Bytes, Breite, Höhe); leer wenn das Format nicht
+        lesbar ist
+    """
+    groessen = sorted(set(groessen), reverse=True)
+    if not groessen:
+        return {}
+
+    try:
+        img = Image.open(io.BytesIO(daten))
+        # JPEG: direkt verkleinert dekodieren (DCT-Skalierung, viel schneller)
+        img.draft("RGB", (groessen[0], 1))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    except Exception:
+        return {}
+
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+    thumbnails = {}
+
+    # Von groß nach klein: jede Stufe wird aus der vorherigen berechnet
+    for groesse in groessen:
+        if img.width > groesse:
+            hoehe = max(1, round(img.height * groesse / img.width))
+            img = img.resize((groesse, hoehe), Image.Resampling.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", optimize=True)
+        thumbnails[groesse] = (buffer.getvalue(), img.width, img.height)
+
+    return thumbnails
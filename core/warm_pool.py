@@ -0,0 +1,212 @@
+"""
+Warmer TeX-Worker-Pool
+======================
+
+Hält einige pdflatex-Prozesse vorgestartet bereit, die das Präambel-Format
+(siehe format_cache.py) bereits geladen haben und am "**"-Prompt auf ihr
+Dokument warten. Ein Vorschau-Job muss so weder Prozessstart noch
+Präambel abwarten - nur noch den eigentlichen Aufgaben-Body setzen.
+
+Jeder Prozess bearbeitet genau einen Job (TeX endet bei \\end{document});
+direkt danach wird ein Ersatz-Prozess gestartet, der im Hintergrund warm wird.
+
+Ohne lokale TeX-Installation oder ohne Format wird an ein normales
+CompileBackend (fallback) delegiert.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.compile_backend import CompileBackend, CompileError
+
+
+class _WarmProzess:
+    """Ein vorgestarteter pdflatex-Prozess mit eigenem Arbeitsverzeichnis"""
+
+    def __init__(self, engine: str, fmt_path: Path):
+        self.fmt_name = fmt_path.stem
+        self.workdir = Path(tempfile.mkdtemp(prefix="klausur_warm_"))
+
+        try:
+            os.link(fmt_path, self.workdir / fmt_path.name)
+        except OSError:
+            shutil.copyfile(fmt_path, self.workdir / fmt_path.name)
+
+        # Ohne Datei-Argument lädt TeX das Format und wartet auf stdin
+        self.process = subprocess.Popen(
+            [engine, f"-fmt={self.fmt_name}", "-jobname=main"],
+            cwd=self.workdir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def lebt(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, latex_code: str, resources: Optional[Dict[str, bytes]], timeout: int) -> bytes:
+        """Dokument schreiben, an den wartenden Prozess übergeben, PDF lesen"""
+
+        (self.workdir / "main.tex").write_text(latex_code, encoding="utf-8")
+
+        for path, blob in (resources or {}).items():
+            target = (self.workdir / path).resolve()
+            if self.workdir.resolve() not in target.parents:
+                raise CompileError(f"Ungültiger Resource-Pfad: {path}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(blob)
+
+        try:
+            # stdin wird danach geschlossen: bei Fehlern bricht TeX ab statt zu warten
+            self.process.communicate(
+                input=b"\\nonstopmode\\input{main.tex}\n",
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+            raise CompileError(f"Timeout nach {timeout} Sekunden")
+
+        pdf_file = self.workdir / "main.pdf"
+        if not pdf_file.exists():
+            log_file = self.workdir / "main.log"
+            log = log_file.read_text(encoding="utf-8", errors="ignore")[-2000:] if log_file.exists() else ""
+            raise CompileError(
+                f"Warmer Worker hat kein PDF erzeugt (Exit-Code {self.process.returncode})",
+                log=log
+            )
+
+        return pdf_file.read_bytes()
+
+    def beenden(self):
+        """Prozess stoppen und Arbeitsverzeichnis löschen"""
+        if self.lebt():
+            self.process.kill()
+            self.process.wait()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class WarmWorkerPool(CompileBackend):
+    """
+    CompileBackend mit vorgewärmten pdflatex-Prozessen (für Vorschauen)
+
+    Pro Präambel-Format werden bis zu `groesse` Prozesse warm gehalten.
+    """
+
+    name = "warm"
+
+    def __init__(
+        self,
+        format_cache,
+        fallback: CompileBackend,
+        groesse: int = 2,
+        engine: str = "pdflatex",
+        timeout: int = 60
+    ):
+        """
+        Args:
+            format_cache: FormatCache (liefert .fmt pro Präambel)
+            fallback: Backend für Jobs ohne warmen Worker
+            groesse: Anzahl warm gehaltener Prozesse
+            engine: TeX-Engine (muss das Format laden können)
+            timeout: Standard-Timeout in Sekunden
+        """
+        super().__init__(engine=engine, timeout=timeout)
+        self.format_cache = format_cache
+        self.fallback = fallback
+        self.groesse = max(1, groesse)
+
+        self._lock = threading.Lock()
+        self._bereit: List[_WarmProzess] = []
+        self._verfuegbar = shutil.which(engine) is not None
+
+    def prewarm(self, latex_code: str):
+        """Format für diese Präambel erzeugen und Prozesse vorstarten"""
+        if not self._verfuegbar:
+            return
+
+        fmt_path = self.format_cache.get_format(latex_code, self.timeout)
+        if fmt_path is not None:
+            self._auffuellen(fmt_path)
+
+    def compile(
+        self,
+        latex_code: str,
+        resources: Optional[Dict[str, bytes]] = None,
+        timeout: Optional[int] = None
+    ) -> bytes:
+        """Kompiliert mit einem warmen Prozess (sonst über fallback)"""
+
+        timeout = timeout or self.timeout
+
+        fmt_path = None
+        if self._verfuegbar:
+            fmt_path = self.format_cache.get_format(latex_code, timeout)
+
+        if fmt_path is None:
+            return self.fallback.compile(latex_code, resources=resources, timeout=timeout)
+
+        try:
+            worker = self._hole_worker(fmt_path)
+        except OSError as e:
+            print(f"⚠️ Warmer Worker nicht verfügbar: {e}")
+            return self.fallback.compile(latex_code, resources=resources, timeout=timeout)
+
+        try:
+            return worker.run(latex_code, resources, timeout)
+        except CompileError:
+            # Fehler im Dokument oder im Format → normaler Lauf liefert saubere Meldung
+            return self.fallback.compile(latex_code, resources=resources, timeout=timeout)
+        finally:
+            worker.beenden()
+            self._auffuellen(fmt_path)
+
+    def shutdown(self):
+        """Alle wartenden Prozesse beenden"""
+        with self._lock:
+            bereit, self._bereit = self._bereit, []
+        for worker in bereit:
+            worker.beenden()
+
+    def _hole_worker(self, fmt_path: Path) -> _WarmProzess:
+        """Wartenden Prozess für dieses Format nehmen (oder neu starten)"""
+        with self._lock:
+            for i, worker in enumerate(self._bereit):
+                if worker.fmt_name == fmt_path.stem and worker.lebt():
+                    return self._bereit.pop(i)
+
+        return _WarmProzess(self.engine, fmt_path)
+
+    def _auffuellen(self, fmt_path: Path):
+        """Warme Prozesse für das aktuelle Format nachstarten, alte verdrängen"""
+        veraltet = []
+        neue = []
+
+        with self._lock:
+            # Tote Prozesse und andere Formate (Header geändert) aussortieren
+            aktuell = []
+            for worker in self._bereit:
+                if worker.fmt_name == fmt_path.stem and worker.lebt():
+                    aktuell.append(worker)
+                else:
+                    veraltet.append(worker)
+            self._bereit = aktuell
+            fehlend = self.groesse - len(aktuell)
+
+        for _ in range(fehlend):
+            try:
+                neue.append(_WarmProzess(self.engine, fmt_path))
+            except OSError as e:
+                print(f"⚠️ Warmer Worker konnte nicht starten: {e}")
+                break
+
+        with self._lock:
+            self._bereit.extend(neue)
+
+        for worker in veraltet:
+            worker.beenden()
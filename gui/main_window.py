@@ -24,6 +24,8 @@ from gui.tabs.klausuren_verwaltung_tab import KlausurenVerwaltungTab
 from gui.tabs.aufgaben_tab import AufgabenTab
 from gui.tabs.grafiken_tab import GrafikenTab
 from gui.tabs.einstellungen_tab import EinstellungenTab
+from gui.preview_service import shutdown_preview_service
+from core.db_pool import close_connection_pools
 
 
 class MainWindow(QMainWindow):
@@ -183,6 +185,10 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            # Warme LaTeX-Prozesse der Vorschau beenden
+            shutdown_preview_service()
+            # Gepoolte SQLite-Verbindungen schließen (WAL-Checkpoint)
+            close_connection_pools()
             event.accept()
         else:
             event.ignore()
@@ -0,0 +1,70 @@
+"""
+Pixmap-Cache
+============
+
+Begrenzter In-Memory-Cache für dekodierte Bilder (QPixmap), damit kürzlich
+angesehene Grafiken beim erneuten Auswählen nicht wieder aus der DB
+gelesen und dekodiert werden müssen.
+
+Verdrängung: least recently used, begrenzt über den geschätzten
+Speicherbedarf (Breite × Höhe × 4 Bytes) statt über die Anzahl.
+"""
+
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from PyQt6.QtGui import QPixmap
+
+
+class PixmapCache:
+    """LRU-Cache für QPixmaps mit Speicher-Obergrenze (nur GUI-Thread)"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Obergrenze für alle Pixmaps zusammen
+        """
+        self.max_bytes = max_bytes
+        self._eintraege: "OrderedDict[Hashable, QPixmap]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _groesse(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * 4
+
+    def get(self, key: Hashable) -> Optional[QPixmap]:
+        """Pixmap holen (None bei Miss) und als zuletzt benutzt markieren"""
+        pixmap = self._eintraege.get(key)
+        if pixmap is not None:
+            self._eintraege.move_to_end(key)
+        return pixmap
+
+    def put(self, key: Hashable, pixmap: QPixmap):
+        """Pixmap ablegen und älteste Einträge verdrängen"""
+        if pixmap.isNull():
+            return
+
+        groesse = self._groesse(pixmap)
+        if groesse > self.max_bytes:
+            return
+
+        self.invalidate(key)
+        self._eintraege[key] = pixmap
+        self._bytes += groesse
+
+        while self._bytes > self.max_bytes:
+            _, alt = self._eintraege.popitem(last=False)
+            self._bytes -= self._groesse(alt)
+
+    def invalidate(self, key: Hashable):
+        """Einen Eintrag entfernen"""
+        pixmap = self._eintraege.pop(key, None)
+        if pixmap is not None:
+            self._bytes -= self._groesse(pixmap)
+
+    def clear(self):
+        self._eintraege.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._eintraege)
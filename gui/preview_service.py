@@ -0,0 +1,275 @@
+"""
+Preview-Service
+===============
+
+Langlebiger Hintergrund-Dienst für Aufgaben-Vorschauen (LaTeX → PNG).
+
+- Jobs laufen in Worker-Threads, nie im GUI-Thread
+- Lokales Backend: warme pdflatex-Prozesse mit geladener Präambel (WarmWorkerPool)
+- Neue Anfrage = ältere Jobs sind veraltet (werden übersprungen/verworfen)
+- Ergebnisse kommen per Qt-Signal zurück in den GUI-Thread
+- Vorwärmen: fehlende Vorschauen einer Aufgabenliste landen mit niedriger
+  Priorität im Preview-Cache (interaktive Anfragen gehen immer vor)
+"""
+
+import itertools
+import queue
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from core.compile_backend import (
+    create_compile_backend, create_format_cache, load_compile_config, wrap_with_cache
+)
+from core.database import Database
+from utils.latex_generator import LaTeXGenerator
+
+
+class PreviewService(QObject):
+    """
+    Vorschau-Warteschlange mit Worker-Threads
+
+    Signale (werden automatisch in den GUI-Thread übergeben):
+        preview_ready(job_id, aufgabe_id, png_bytes)
+        preview_failed(job_id, aufgabe_id, fehlermeldung)
+    """
+
+    preview_ready = pyqtSignal(int, int, bytes)
+    preview_failed = pyqtSignal(int, int, str)
+
+    PRIO_STOP = -1
+    PRIO_INTERAKTIV = 0
+    PRIO_VORWAERMEN = 1
+
+    def __init__(self, db_path: Optional[str] = None, anzahl_worker: Optional[int] = None):
+        super().__init__()
+
+        config = load_compile_config()
+        anzahl_worker = anzahl_worker or int(config.get('preview_workers', 2) or 2)
+
+        self.pool = None
+        backend = None
+
+        if config.get('backend') == 'local':
+            format_cache = create_format_cache(config)
+            if format_cache is not None:
+                from core.warm_pool import WarmWorkerPool
+
+                # Fallback ohne Cache-Hülle - der Pool selbst wird gecacht
+                fallback_config = dict(config, cache=False)
+                self.pool = WarmWorkerPool(
+                    format_cache,
+                    fallback=create_compile_backend(fallback_config),
+                    groesse=anzahl_worker,
+                    timeout=int(config.get('timeout', 120))
+                )
+                backend = wrap_with_cache(self.pool, config)
+
+        if db_path is None:
+            db_path = str(Path(__file__).parent.parent / 'database' / 'sus.db')
+        self.latex_gen = LaTeXGenerator(db_path=db_path, backend=backend)
+        self.db_path = db_path
+        self._db: Optional[Database] = None
+
+        # Einträge: (Priorität, Reihenfolge, Job) - 0 = interaktiv, 1 = Vorwärmen
+        self._jobs: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._reihenfolge = itertools.count()
+        self._lock = threading.Lock()
+        self._naechste_id = 0
+        self._aktueller_job = 0
+        self._prewarm_runde = 0
+        # Vorwärmen kostet pro Aufgabe eine Kompilierung: standardmäßig nur
+        # lokal, bei der geteilten Remote-API höchstens die ersten N Zeilen
+        prewarm = config.get('preview_prewarm')
+        if prewarm is None:
+            prewarm = config.get('backend') == 'local'
+        self.prewarm_aktiv = bool(prewarm)
+        self.prewarm_max: Optional[int] = None
+        if config.get('backend') != 'local':
+            self.prewarm_max = int(config.get('preview_prewarm_remote_max', 20) or 0)
+
+        self._threads = []
+        for i in range(anzahl_worker):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"preview-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        # Präambel schon beim Start laden (Format + warme Prozesse)
+        if self.pool is not None:
+            threading.Thread(target=self._prewarm, daemon=True).start()
+
+    def request_preview(
+        self,
+        aufgabe_id: Optional[int],
+        latex_code: str,
+        mit_loesung: bool = False,
+        dpi: int = 150
+    ) -> int:
+        """
+        Vorschau anfordern - alle vorherigen Jobs werden damit veraltet
+
+        Returns:
+            job_id (zum Abgleich in den Signal-Slots)
+        """
+        with self._lock:
+            self._naechste_id += 1
+            job_id = self._naechste_id
+            self._aktueller_job = job_id
+
+        self._jobs.put((
+            self.PRIO_INTERAKTIV, next(self._reihenfolge),
+            (job_id, aufgabe_id, latex_code, mit_loesung, dpi)
+        ))
+        return job_id
+
+    def prewarm_aufgaben(self, aufgaben: List[Dict], mit_loesung: bool = False, dpi: int = 150):
+        """
+        Vorschauen einer ganzen Liste im Hintergrund in den Preview-Cache legen
+
+        Eine neue Liste (z.B. Filter geändert) ersetzt die vorherige Runde.
+
+        Args:
+            aufgaben: Aufgaben-Dicts mit 'id' - ohne 'latex_code' (Listen-
+                      Ansicht) lädt der Worker den Code selbst aus der DB
+        """
+        if not self.prewarm_aktiv:
+            return
+
+        if self.prewarm_max is not None:
+            aufgaben = aufgaben[:self.prewarm_max]
+
+        with self._lock:
+            self._prewarm_runde += 1
+            runde = self._prewarm_runde
+
+        for aufgabe in aufgaben:
+            if not aufgabe.get('id'):
+                continue
+            self._jobs.put((
+                self.PRIO_VORWAERMEN, next(self._reihenfolge),
+                (-runde, aufgabe['id'], aufgabe.get('latex_code'), mit_loesung, dpi)
+            ))
+
+    def cancel_pending(self):
+        """Alle offenen Jobs verwerfen (z.B. Auswahl geändert)"""
+        with self._lock:
+            self._naechste_id += 1
+            self._aktueller_job = self._naechste_id
+
+    def is_current(self, job_id: int) -> bool:
+        with self._lock:
+            # Vorwärm-Jobs tragen die negative Runden-Nummer als ID
+            if job_id < 0:
+                return -job_id == self._prewarm_runde
+            return job_id == self._aktueller_job
+
+    def shutdown(self):
+        """Worker-Threads und warme Prozesse beenden"""
+        self.cancel_pending()
+        with self._lock:
+            self._prewarm_runde += 1
+        for _ in self._threads:
+            self._jobs.put((self.PRIO_STOP, next(self._reihenfolge), None))
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _prewarm(self):
+        try:
+            self.pool.prewarm(self.latex_gen.build_aufgabe_latex({'latex_code': ''}))
+        except Exception as e:
+            print(f"⚠️ Preview-Prewarm fehlgeschlagen: {e}")
+
+    def _vorwaermen(self, aufgabe_id: int, latex_code: Optional[str], mit_loesung: bool, dpi: int):
+        """Eine Vorschau rendern und nur im Cache ablegen (kein Signal)"""
+        try:
+            if latex_code is None:
+                latex_code = self._lade_latex_code(aufgabe_id)
+            if not latex_code:
+                return
+            if self.latex_gen.is_preview_cached(aufgabe_id, latex_code, mit_loesung, dpi):
+                return
+            self.latex_gen.generate_aufgabe_preview_png(
+                aufgabe={'latex_code': latex_code},
+                mit_loesung=mit_loesung,
+                dpi=dpi,
+                aufgabe_id=aufgabe_id
+            )
+        except Exception as e:
+            print(f"⚠️ Vorwärmen Aufgabe {aufgabe_id} fehlgeschlagen: {e}")
+
+    def _lade_latex_code(self, aufgabe_id: int) -> Optional[str]:
+        """LaTeX-Code einer Aufgabe nachladen (Worker-Thread, eigene Pool-Verbindung)"""
+        if self._db is None:
+            self._db = Database(self.db_path)
+
+        aufgabe = self._db.get_aufgabe_by_id(aufgabe_id)
+        return aufgabe.get('latex_code') if aufgabe else None
+
+    def _worker_loop(self):
+        while True:
+            _, _, job = self._jobs.get()
+            if job is None:
+                return
+
+            job_id, aufgabe_id, latex_code, mit_loesung, dpi = job
+
+            # Veraltet, bevor er dran war → überspringen
+            if not self.is_current(job_id):
+                continue
+
+            if job_id < 0:
+                self._vorwaermen(aufgabe_id, latex_code, mit_loesung, dpi)
+                continue
+
+            try:
+                png_bytes = self.latex_gen.generate_aufgabe_preview_png(
+                    aufgabe={'latex_code': latex_code},
+                    mit_loesung=mit_loesung,
+                    dpi=dpi,
+                    aufgabe_id=aufgabe_id
+                )
+            except Exception as e:
+                if self.is_current(job_id):
+                    self.preview_failed.emit(job_id, aufgabe_id or 0, str(e))
+                continue
+
+            # Ergebnis veralteter Jobs nicht mehr anzeigen
+            if not self.is_current(job_id):
+                continue
+
+            if png_bytes:
+                self.preview_ready.emit(job_id, aufgabe_id or 0, png_bytes)
+            else:
+                self.preview_failed.emit(job_id, aufgabe_id or 0, "Rendering fehlgeschlagen")
+
+
+# Singleton-Instanz
+_service_instance: Optional[PreviewService] = None
+
+
+def get_preview_service() -> PreviewService:
+    """
+    Globalen Preview-Service holen (Singleton-Pattern)
+
+    Returns:
+        PreviewService-Instanz
+    """
+    global _service_instance
+
+    if _service_instance is None:
+        _service_instance = PreviewService()
+
+    return _service_instance
+
+
+def shutdown_preview_service():
+    """Preview-Service beenden (beim Schließen des Hauptfensters)"""
+    global _service_instance
+
+    if _service_instance is not None:
+        _service_instance.shutdown()
+        _service_instance = None
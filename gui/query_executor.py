@@ -0,0 +1,110 @@
+"""
+Query-Executor
+==============
+
+Datenbank-Abfragen für die GUI in einem Hintergrund-Thread.
+
+- Es zählt nur die neueste Anfrage: wartende ältere Anfragen werden
+  verworfen, eine laufende wird per sqlite3 interrupt() abgebrochen
+- Ergebnisse kommen per Qt-Signal zurück in den GUI-Thread
+- Entprellen der Eingabe übernimmt der Aufrufer (QTimer), der Executor
+  sorgt nur dafür, dass überholte Abfragen nicht mehr stören
+
+Verwendung:
+    self.executor = QueryExecutor(self.db, self)
+    self.executor.ergebnis.connect(self.on_ergebnis)
+    job_id = self.executor.submit(self.db.get_klausuren, suchtext="8a")
+"""
+
+import sqlite3
+import threading
+from typing import Any, Callable, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from core.database import Database
+
+
+class QueryExecutor(QObject):
+    """
+    Ein Worker-Thread, eine Abfrage zur Zeit, neueste gewinnt
+
+    Signale (werden automatisch in den GUI-Thread übergeben):
+        ergebnis(job_id, result)
+        fehler(job_id, fehlermeldung)
+    """
+
+    ergebnis = pyqtSignal(int, object)
+    fehler = pyqtSignal(int, str)
+
+    def __init__(self, db: Database, parent=None):
+        super().__init__(parent)
+        self.db = db
+
+        self._bedingung = threading.Condition()
+        self._naechste_id = 0
+        self._aktueller_job = 0
+        self._wartend: Optional[tuple] = None
+        self._laeuft = 0
+        # Verbindung des Worker-Threads (für interrupt aus dem GUI-Thread)
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self._thread = threading.Thread(target=self._worker_loop, name="query", daemon=True)
+        self._thread.start()
+
+    def submit(self, funktion: Callable[..., Any], *args, **kwargs) -> int:
+        """
+        Abfrage einplanen - alle vorherigen werden damit veraltet
+
+        Args:
+            funktion: wird im Worker-Thread aufgerufen (z.B. eine Database-Methode)
+
+        Returns:
+            job_id (zum Abgleich im Signal-Slot)
+        """
+        with self._bedingung:
+            self._naechste_id += 1
+            job_id = self._naechste_id
+            self._aktueller_job = job_id
+
+            # Wartende Anfrage einfach ersetzen, laufende abbrechen
+            self._wartend = (job_id, funktion, args, kwargs)
+            if self._laeuft and self._conn is not None:
+                self._conn.interrupt()
+
+            self._bedingung.notify()
+
+        return job_id
+
+    def ist_aktuell(self, job_id: int) -> bool:
+        """Ist job_id die neueste Anfrage?"""
+        with self._bedingung:
+            return job_id == self._aktueller_job
+
+    def _worker_loop(self):
+        # Gleiche Verbindung wie die Database-Methoden dieses Threads (Pool)
+        self._conn = self.db.pool.connection()
+
+        while True:
+            with self._bedingung:
+                while self._wartend is None:
+                    self._bedingung.wait()
+                job_id, funktion, args, kwargs = self._wartend
+                self._wartend = None
+                self._laeuft = job_id
+
+            try:
+                result = funktion(*args, **kwargs)
+            except Exception as e:
+                # Veraltet = durch interrupt() abgebrochen, neuere Anfrage wartet
+                if self.ist_aktuell(job_id):
+                    self.fehler.emit(job_id, str(e))
+                result = None
+                job_id = 0
+            finally:
+                with self._bedingung:
+                    self._laeuft = 0
+
+            # Veraltete Ergebnisse gar nicht erst in den GUI-Thread schicken
+            if job_id and self.ist_aktuell(job_id):
+                self.ergebnis.emit(job_id, result)
@@ -0,0 +1,306 @@
+"""
+Tabellen-Model
+==============
+
+Gemeinsame Model/View-Schicht für die Listen-Tabellen (Aufgaben,
+Klausuren, Grafiken, Step 2).
+
+- DictTableModel: QAbstractTableModel über kompakten Zeilen (ein Tupel pro
+  Zeile statt eines QTableWidgetItem pro Zelle); Qt fragt nur die
+  sichtbaren Zellen ab
+- Checkboxen als Item-Flag (Qt.CheckStateRole), keine Widgets pro Zeile
+- TabellenFilterProxy: Suche/Filter in Python auf den Tupeln, ohne die
+  Tabelle neu aufzubauen; Sortieren per Klick auf den Spaltenkopf
+
+Verwendung:
+    model = DictTableModel([Spalte("ID", "id"), Spalte("Titel", "titel")])
+    proxy = TabellenFilterProxy()
+    proxy.setSourceModel(model)
+    konfiguriere_tabelle(view, proxy)
+
+    model.set_rows(db.get_aufgaben_liste())
+    proxy.set_filter(text="integral", text_felder=("titel",))
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from PyQt6.QtCore import (
+    QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt, pyqtSignal
+)
+from PyQt6.QtWidgets import QAbstractItemView, QHeaderView, QTableView
+
+
+# Rohwert einer Zelle zum Sortieren (Zahlen numerisch statt als Text)
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+@dataclass
+class Spalte:
+    """Eine Tabellenspalte: Überschrift, Feld im Zeilen-Dict, optionale Formatierung"""
+
+    titel: str
+    feld: str
+    format: Optional[Callable[[Any], str]] = None
+    ausrichtung: Optional[Qt.AlignmentFlag] = None
+
+
+class DictTableModel(QAbstractTableModel):
+    """
+    Tabellen-Model für Listen von Dicts (z.B. Ergebnis von execute_query)
+
+    Zeilen werden intern als Tupel gespeichert; row_dict(row) liefert den
+    Datensatz bei Bedarf wieder als Dict. Mit checkable=True hat Spalte 0
+    eine Checkbox, der Zustand hängt an id_feld (überlebt Neuladen/Filtern).
+    """
+
+    # (ID, angehakt) - nur bei Änderung durch den Benutzer
+    check_changed = pyqtSignal(object, bool)
+
+    def __init__(
+        self,
+        spalten: List[Spalte],
+        checkable: bool = False,
+        id_feld: str = "id",
+        parent=None
+    ):
+        super().__init__(parent)
+        self.spalten = spalten
+        self.checkable = checkable
+        self.id_feld = id_feld
+
+        self._felder: tuple = tuple(spalte.feld for spalte in spalten)
+        self._zeilen: List[tuple] = []
+        self._checked: Set[Any] = set()
+        self._feld_index()
+
+    def _feld_index(self):
+        self._index = {feld: i for i, feld in enumerate(self._felder)}
+        self._spalten_index = [self._index.get(spalte.feld) for spalte in self.spalten]
+
+    # ------------------------------------------------------------------
+    # Daten
+    # ------------------------------------------------------------------
+
+    def set_rows(self, rows: List[Dict[str, Any]]):
+        """Alle Zeilen ersetzen (ein Reset statt Einfügen pro Zeile)"""
+        self.beginResetModel()
+
+        felder = list(rows[0].keys()) if rows else []
+        for spalte in self.spalten:
+            if spalte.feld not in felder:
+                felder.append(spalte.feld)
+        self._felder = tuple(felder)
+        self._feld_index()
+
+        self._zeilen = [tuple(row.get(feld) for feld in self._felder) for row in rows]
+
+        self.endResetModel()
+
+    def row_dict(self, row: int) -> Dict[str, Any]:
+        """Datensatz einer Zeile als Dict"""
+        return dict(zip(self._felder, self._zeilen[row]))
+
+    def wert(self, row: int, feld: str) -> Any:
+        """Einzelnes Feld einer Zeile (ohne Dict-Aufbau)"""
+        i = self._index.get(feld)
+        return self._zeilen[row][i] if i is not None else None
+
+    def feld_position(self, feld: str) -> Optional[int]:
+        """Position eines Felds im Zeilen-Tupel (für schnelle Filter)"""
+        return self._index.get(feld)
+
+    def zeilen(self) -> List[tuple]:
+        return self._zeilen
+
+    # ------------------------------------------------------------------
+    # Checkboxen
+    # ------------------------------------------------------------------
+
+    def checked_ids(self) -> Set[Any]:
+        return set(self._checked)
+
+    def set_checked_ids(self, ids: Iterable[Any]):
+        """Angehakte IDs setzen (ohne check_changed-Signal)"""
+        self._checked = set(ids)
+        if self._zeilen and self.checkable:
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(len(self._zeilen) - 1, 0),
+                [Qt.ItemDataRole.CheckStateRole]
+            )
+
+    # ------------------------------------------------------------------
+    # QAbstractTableModel
+    # ------------------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._zeilen)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.spalten)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.spalten[section].titel
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        zeile = self._zeilen[index.row()]
+        spalte = self.spalten[index.column()]
+        i = self._spalten_index[index.column()]
+        wert = zeile[i] if i is not None else None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if spalte.format is not None:
+                return spalte.format(wert)
+            return "" if wert is None else str(wert)
+
+        if role == SORT_ROLE:
+            return "" if wert is None else wert
+
+        if role == Qt.ItemDataRole.UserRole:
+            return self.row_dict(index.row())
+
+        if role == Qt.ItemDataRole.CheckStateRole and self.checkable and index.column() == 0:
+            zeilen_id = zeile[self._index[self.id_feld]]
+            return Qt.CheckState.Checked if zeilen_id in self._checked else Qt.CheckState.Unchecked
+
+        if role == Qt.ItemDataRole.TextAlignmentRole and spalte.ausrichtung is not None:
+            return spalte.ausrichtung
+
+        return None
+
+    def flags(self, index: QModelIndex):
+        flags = super().flags(index)
+        if self.checkable and index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index: QModelIndex, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if not (self.checkable and index.column() == 0 and role == Qt.ItemDataRole.CheckStateRole):
+            return False
+
+        zeilen_id = self._zeilen[index.row()][self._index[self.id_feld]]
+        angehakt = Qt.CheckState(value) == Qt.CheckState.Checked
+
+        if angehakt:
+            self._checked.add(zeilen_id)
+        else:
+            self._checked.discard(zeilen_id)
+
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.check_changed.emit(zeilen_id, angehakt)
+        return True
+
+
+class TabellenFilterProxy(QSortFilterProxyModel):
+    """
+    Filter auf einem DictTableModel
+
+    - text: Teilstring (ohne Groß-/Kleinschreibung) in einem der text_felder
+    - gleich: Feld -> Wert, None/"Alle" = nicht filtern
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self._text = ""
+        self._text_pos: List[int] = []
+        self._gleich: List[tuple] = []
+        self._text_felder: tuple = ()
+        self._gleich_felder: Dict[str, Any] = {}
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        # Feld-Positionen ändern sich mit set_rows → nach jedem Reset neu bestimmen
+        model.modelReset.connect(self._positionen_aktualisieren)
+
+    def set_filter(
+        self,
+        text: str = "",
+        text_felder: Iterable[str] = (),
+        gleich: Optional[Dict[str, Any]] = None
+    ):
+        """Filter setzen und Ansicht aktualisieren (Tabelle wird nicht neu aufgebaut)"""
+        self._text = (text or "").strip().lower()
+        self._text_felder = tuple(text_felder)
+        self._gleich_felder = {
+            feld: wert for feld, wert in (gleich or {}).items()
+            if wert is not None and wert != "Alle"
+        }
+        self._positionen_aktualisieren(erzwingen=True)
+
+    def _positionen_aktualisieren(self, erzwingen: bool = False):
+        model = self.sourceModel()
+        if model is None:
+            return
+
+        text_pos = [
+            pos for pos in (model.feld_position(feld) for feld in self._text_felder)
+            if pos is not None
+        ]
+        gleich = [
+            (model.feld_position(feld), wert) for feld, wert in self._gleich_felder.items()
+        ]
+
+        # Nach einem Reset hat der Proxy schon gefiltert - nur bei geänderten
+        # Positionen (anderer Spaltensatz) ein zweiter Durchlauf
+        if not erzwingen and text_pos == self._text_pos and gleich == self._gleich:
+            return
+
+        self._text_pos = text_pos
+        self._gleich = gleich
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        zeile = self.sourceModel().zeilen()[source_row]
+
+        for pos, wert in self._gleich:
+            if pos is None or zeile[pos] != wert:
+                return False
+
+        if self._text:
+            return any(
+                self._text in str(zeile[pos]).lower()
+                for pos in self._text_pos
+                if zeile[pos] is not None
+            )
+
+        return True
+
+
+def konfiguriere_tabelle(view: QTableView, model, sortierbar: bool = True):
+    """
+    QTableView wie die bisherigen QTableWidgets einstellen
+
+    Große Listen: Spaltenbreiten nur aus den ersten Zeilen berechnen und
+    feste Zeilenhöhe - sonst misst Qt jede der (bis zu 50.000) Zeilen.
+    """
+    view.setModel(model)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.setSortingEnabled(sortierbar)
+    if sortierbar:
+        # Reihenfolge der DB-Abfrage beibehalten, bis der Benutzer sortiert
+        view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+
+    view.horizontalHeader().setResizeContentsPrecision(200)
+    view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 8)
+
+
+def ausgewaehlte_zeile(view: QTableView) -> Optional[Dict[str, Any]]:
+    """Datensatz der ausgewählten Zeile (durch den Proxy hindurch) oder None"""
+    selection = view.selectionModel()
+    if selection is None:
+        return None
+
+    rows = selection.selectedRows()
+    if not rows:
+        return None
+
+    return rows[0].data(Qt.ItemDataRole.UserRole)
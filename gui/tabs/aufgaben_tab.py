@@ -7,14 +7,17 @@ Vollständige Aufgaben-Verwaltung mit CRUD-Operationen
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QLineEdit, QComboBox,
+    QTableView, QLineEdit, QComboBox,
     QMessageBox, QHeaderView
 )
-from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 
 from core.database import get_database
 from gui.dialogs.aufgabe_dialog import AufgabeDialog
+from gui.table_model import (
+    DictTableModel, Spalte, TabellenFilterProxy,
+    ausgewaehlte_zeile, konfiguriere_tabelle
+)
 
 
 class AufgabenTab(QWidget):
@@ -66,12 +69,21 @@ class AufgabenTab(QWidget):
         
         layout.addLayout(filter_layout)
         
-        # Tabelle
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Titel", "Fach", "Themengebiet", "Schwierigkeit", "Punkte", "AFB"
+        # Tabelle (Model/View: Filtern über den Proxy, ohne Neuaufbau)
+        self.model = DictTableModel([
+            Spalte("ID", "id"),
+            Spalte("Titel", "titel"),
+            Spalte("Fach", "fach"),
+            Spalte("Themengebiet", "themengebiet"),
+            Spalte("Schwierigkeit", "schwierigkeit"),
+            Spalte("Punkte", "punkte", format=lambda p: str(p or 0)),
+            Spalte("AFB", "anforderungsbereich"),
         ])
+        self.proxy = TabellenFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        
+        self.table = QTableView()
+        konfiguriere_tabelle(self.table, self.proxy)
         
         # Header-Größen
         header_table = self.table.horizontalHeader()
@@ -83,8 +95,6 @@ class AufgabenTab(QWidget):
         header_table.setSectionResizeMode(5, QHeaderView.ResizeMode.ResizeToContents)
         header_table.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents)
         
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
         self.table.doubleClicked.connect(self.edit_aufgabe)
         
         layout.addWidget(self.table)
@@ -127,18 +137,11 @@ class AufgabenTab(QWidget):
         """Aufgaben aus DB laden"""
         
         try:
-            aufgaben = self.db.get_aufgaben()
-            
-            self.table.setRowCount(len(aufgaben))
+            # Nur Übersichts-Spalten - Details lädt edit_aufgabe per ID
+            aufgaben = self.db.get_aufgaben_liste()
             
-            for row, aufgabe_dict in enumerate(aufgaben):
-                self.table.setItem(row, 0, QTableWidgetItem(str(aufgabe_dict['id'])))
-                self.table.setItem(row, 1, QTableWidgetItem(aufgabe_dict['titel'] or ''))
-                self.table.setItem(row, 2, QTableWidgetItem(aufgabe_dict['fach'] or ''))
-                self.table.setItem(row, 3, QTableWidgetItem(aufgabe_dict['themengebiet'] or ''))
-                self.table.setItem(row, 4, QTableWidgetItem(aufgabe_dict['schwierigkeit'] or ''))
-                self.table.setItem(row, 5, QTableWidgetItem(str(aufgabe_dict['punkte'] or 0)))
-                self.table.setItem(row, 6, QTableWidgetItem(aufgabe_dict['anforderungsbereich'] or ''))
+            # Aktiver Filter bleibt erhalten (Proxy filtert nach dem Reset neu)
+            self.model.set_rows(aufgaben)
             
             self.update_stats()
             
@@ -148,41 +151,22 @@ class AufgabenTab(QWidget):
     def filter_aufgaben(self):
         """Aufgaben filtern"""
         
-        search_text = self.search_edit.text().lower()
-        fach = self.fach_combo.currentText()
-        schwierigkeit = self.schwierigkeit_combo.currentText()
-        
-        for row in range(self.table.rowCount()):
-            show_row = True
-            
-            # Suche
-            if search_text:
-                titel = self.table.item(row, 1).text().lower()
-                thema = self.table.item(row, 3).text().lower()
-                if search_text not in titel and search_text not in thema:
-                    show_row = False
-            
-            # Fach-Filter
-            if fach != "Alle":
-                row_fach = self.table.item(row, 2).text()
-                if row_fach != fach:
-                    show_row = False
-            
-            # Schwierigkeits-Filter
-            if schwierigkeit != "Alle":
-                row_schwierigkeit = self.table.item(row, 4).text()
-                if row_schwierigkeit != schwierigkeit:
-                    show_row = False
-            
-            self.table.setRowHidden(row, not show_row)
+        self.proxy.set_filter(
+            text=self.search_edit.text(),
+            text_felder=("titel", "themengebiet"),
+            gleich={
+                "fach": self.fach_combo.currentText(),
+                "schwierigkeit": self.schwierigkeit_combo.currentText(),
+            }
+        )
         
         self.update_stats()
         
     def update_stats(self):
         """Statistik aktualisieren"""
         
-        total = self.table.rowCount()
-        visible = sum(1 for row in range(total) if not self.table.isRowHidden(row))
+        total = self.model.rowCount()
+        visible = self.proxy.rowCount()
         
         self.stats_label.setText(f"Angezeigt: {visible} von {total} Aufgaben")
         
@@ -203,13 +187,12 @@ class AufgabenTab(QWidget):
     def edit_aufgabe(self):
         """Aufgabe bearbeiten"""
         
-        selected = self.table.selectedItems()
+        selected = ausgewaehlte_zeile(self.table)
         if not selected:
             QMessageBox.warning(self, "Keine Auswahl", "Bitte wählen Sie eine Aufgabe aus.")
             return
         
-        row = selected[0].row()
-        aufgabe_id = int(self.table.item(row, 0).text())
+        aufgabe_id = selected['id']
         
         # Aufgabe aus DB laden
         aufgabe_dict = self.db.get_aufgabe_by_id(aufgabe_id)
@@ -233,14 +216,13 @@ class AufgabenTab(QWidget):
     def delete_aufgabe(self):
         """Aufgabe löschen"""
         
-        selected = self.table.selectedItems()
+        selected = ausgewaehlte_zeile(self.table)
         if not selected:
             QMessageBox.warning(self, "Keine Auswahl", "Bitte wählen Sie eine Aufgabe aus.")
             return
         
-        row = selected[0].row()
-        aufgabe_id = int(self.table.item(row, 0).text())
-        titel = self.table.item(row, 1).text()
+        aufgabe_id = selected['id']
+        titel = selected['titel'] or ''
         
         reply = QMessageBox.question(
             self,
@@ -15,6 +15,7 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 
 from core.database import get_database
+from gui.query_executor import QueryExecutor
 
 
 class DashboardTab(QWidget):
@@ -24,6 +25,15 @@ class DashboardTab(QWidget):
         super().__init__(parent)
         self.main_window = parent
         self.db = get_database()
+        
+        # Statistik + letzte Klausuren im Hintergrund laden
+        self.executor = QueryExecutor(self.db, self)
+        self.executor.ergebnis.connect(self.on_daten_geladen)
+        self.executor.fehler.connect(self.on_laden_fehlgeschlagen)
+        self._lade_job = 0
+        # Änderungszähler beim letzten Laden (None = noch nie geladen)
+        self._geladene_version = None
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -125,61 +135,66 @@ class DashboardTab(QWidget):
         return group
         
     def load_data(self):
-        """Daten aus Datenbank laden"""
+        """Daten aus Datenbank laden (im Hintergrund, Ergebnis: on_daten_geladen)"""
         
-        try:
-            # Statistiken laden
-            stats = self.db.get_statistics()
-            
-            # Statistik-Widgets aktualisieren
-            self.aufgaben_stat.value_label.setText(str(stats.get('aufgaben', 0)))
-            self.klausuren_stat.value_label.setText(str(stats.get('klausuren', 0)))
-            self.grafiken_stat.value_label.setText(str(stats.get('grafiken', 0)))
-            self.schueler_stat.value_label.setText(str(stats.get('schueler', 0)))
-            
-            # Letzte Klausuren laden
-            self.load_recent_klausuren()
-            
-        except Exception as e:
-            print(f"Fehler beim Laden der Dashboard-Daten: {e}")
-            import traceback
-            traceback.print_exc()
+        # Stand vor der Abfrage merken - spätere Änderungen lösen Neuladen aus
+        self._geladene_version = self.db.get_data_version()
+        self._lade_job = self.executor.submit(self.db.get_dashboard_daten, limit=10)
+        
+    def on_daten_geladen(self, job_id, daten):
+        """Abfrage fertig → Widgets aktualisieren"""
+        
+        if job_id != self._lade_job:
+            return
+        
+        stats = daten['statistik']
+        
+        # Statistik-Widgets aktualisieren
+        self.aufgaben_stat.value_label.setText(str(stats.get('aufgaben', 0)))
+        self.klausuren_stat.value_label.setText(str(stats.get('klausuren', 0)))
+        self.grafiken_stat.value_label.setText(str(stats.get('grafiken', 0)))
+        self.schueler_stat.value_label.setText(str(stats.get('schueler', 0)))
+        
+        # Letzte Klausuren anzeigen
+        self.show_recent_klausuren(daten['letzte_klausuren'])
+        
+    def on_laden_fehlgeschlagen(self, job_id, fehler):
+        """Abfrage fehlgeschlagen"""
+        
+        if job_id != self._lade_job:
+            return
+        
+        print(f"Fehler beim Laden der Dashboard-Daten: {fehler}")
+        # Beim nächsten Anzeigen erneut versuchen
+        self._geladene_version = None
+        self.recent_list.clear()
+        self.recent_list.addItem(f"Fehler beim Laden: {fehler}")
             
-    def load_recent_klausuren(self):
+    def show_recent_klausuren(self, klausuren):
         """
-        Letzte Klausuren aus DB laden
+        Letzte Klausuren anzeigen
         
-        JETZT AUS DER RICHTIGEN TABELLE: klausuren
+        JETZT AUS DER RICHTIGEN TABELLE: klausuren (get_recent_klausuren)
         """
         
-        try:
-            self.recent_list.clear()
-            
-            # Nutze die Methode aus database.py (greift auf 'klausuren' zu!)
-            klausuren = self.db.get_recent_klausuren(limit=10)
-            
-            if klausuren:
-                for klausur in klausuren:
-                    # Format: "Mathematik - Lineare Funktionen (8a, 15.03.2024)"
-                    fach = klausur.get('fach', 'Unbekannt')
-                    titel = klausur.get('titel', 'Ohne Titel')
-                    klasse = klausur.get('klasse', '?')
-                    datum = klausur.get('datum', '?')
-                    
-                    text = f"{fach} - {titel} ({klasse}, {datum})"
-                    
-                    item = QListWidgetItem(text)
-                    # Speichere komplette Klausur-Daten im Item!
-                    item.setData(Qt.ItemDataRole.UserRole, klausur)
-                    self.recent_list.addItem(item)
-            else:
-                self.recent_list.addItem("Noch keine Klausuren erstellt")
+        self.recent_list.clear()
+        
+        if klausuren:
+            for klausur in klausuren:
+                # Format: "Mathematik - Lineare Funktionen (8a, 15.03.2024)"
+                fach = klausur.get('fach', 'Unbekannt')
+                titel = klausur.get('titel', 'Ohne Titel')
+                klasse = klausur.get('klasse', '?')
+                datum = klausur.get('datum', '?')
                 
-        except Exception as e:
-            print(f"Fehler beim Laden der Klausuren: {e}")
-            import traceback
-            traceback.print_exc()
-            self.recent_list.addItem(f"Fehler beim Laden: {e}")
+                text = f"{fach} - {titel} ({klasse}, {datum})"
+                
+                item = QListWidgetItem(text)
+                # Speichere komplette Klausur-Daten im Item!
+                item.setData(Qt.ItemDataRole.UserRole, klausur)
+                self.recent_list.addItem(item)
+        else:
+            self.recent_list.addItem("Noch keine Klausuren erstellt")
             
     def klausur_bearbeiten(self, item):
         """
@@ -217,5 +232,6 @@ class DashboardTab(QWidget):
     def showEvent(self, event):
         """Wird aufgerufen wenn Tab angezeigt wird"""
         super().showEvent(event)
-        # Daten neu laden wenn Tab angezeigt wird
-        self.load_data()
+        # Nur neu laden, wenn seit dem letzten Laden geschrieben wurde
+        if self._geladene_version != self.db.get_data_version():
+            self.load_data()
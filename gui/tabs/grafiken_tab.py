@@ -5,15 +5,21 @@ Grafiken-Tab für Klausurengenerator v2.0
 Zeigt alle Grafiken aus der Datenbank mit Vorschau
 """
 
+import threading
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QSplitter,
+    QTableView, QHeaderView, QSplitter,
     QScrollArea, QMessageBox
 )
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont, QPixmap
 
 from core.database import get_database
+from gui.pixmap_cache import PixmapCache
+from gui.table_model import (
+    DictTableModel, Spalte, ausgewaehlte_zeile, konfiguriere_tabelle
+)
 
 
 class GrafikenTab(QWidget):
@@ -22,9 +28,14 @@ class GrafikenTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.db = get_database()
+        # Zuletzt angesehene Vorschauen (dekodiert, max. 800px breit)
+        self.pixmap_cache = PixmapCache(max_bytes=64 * 1024 * 1024)
         self.setup_ui()
         self.load_grafiken()
         
+        # Fehlende Thumbnails (z.B. Grafiken aus älteren Versionen) im Hintergrund erzeugen
+        threading.Thread(target=self.db.backfill_thumbnails, daemon=True).start()
+        
     def setup_ui(self):
         """UI aufbauen"""
         
@@ -54,16 +65,21 @@ class GrafikenTab(QWidget):
         splitter = QSplitter(Qt.Orientation.Horizontal)
         
         # Links: Tabelle
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Aufgabe", "LaTeX-Name", "Dateiname", "Typ", "Größe (KB)"
+        self.model = DictTableModel([
+            Spalte("ID", "id"),
+            Spalte("Aufgabe", "aufgabe_id"),
+            Spalte("LaTeX-Name", "latex_name"),
+            Spalte("Dateiname", "dateiname"),
+            Spalte("Typ", "dateityp"),
+            Spalte("Größe (KB)", "groesse_bytes", format=lambda b: f"{(b or 0) / 1024:.1f}"),
         ])
+        
+        self.table = QTableView()
+        konfiguriere_tabelle(self.table, self.model, sortierbar=False)
         self.table.horizontalHeader().setStretchLastSection(False)
         self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.table.itemSelectionChanged.connect(self.on_grafik_selected)
+        self.table.selectionModel().selectionChanged.connect(self.on_grafik_selected)
+        self.model.modelReset.connect(self.on_grafik_selected)
         splitter.addWidget(self.table)
         
         # Rechts: Vorschau
@@ -102,28 +118,11 @@ class GrafikenTab(QWidget):
         layout.addWidget(self.status_label)
         
     def load_grafiken(self):
-        """Grafiken aus DB laden"""
+        """Grafiken aus DB laden (nur Metadaten, Bilddaten erst bei Auswahl)"""
         try:
             grafiken = self.db.get_all_grafiken()
             
-            self.table.setRowCount(0)
-            
-            for grafik in grafiken:
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                
-                self.table.setItem(row, 0, QTableWidgetItem(str(grafik['id'])))
-                self.table.setItem(row, 1, QTableWidgetItem(str(grafik['aufgabe_id'])))
-                self.table.setItem(row, 2, QTableWidgetItem(grafik['latex_name']))
-                self.table.setItem(row, 3, QTableWidgetItem(grafik['dateiname']))
-                self.table.setItem(row, 4, QTableWidgetItem(grafik['dateityp']))
-                
-                # Größe in KB
-                groesse_kb = grafik['groesse_bytes'] / 1024 if grafik['groesse_bytes'] else 0
-                self.table.setItem(row, 5, QTableWidgetItem(f"{groesse_kb:.1f}"))
-                
-                # Speichere komplette Grafik als UserRole
-                self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, grafik)
+            self.model.set_rows(grafiken)
             
             # Status aktualisieren
             count = len(grafiken)
@@ -136,17 +135,14 @@ class GrafikenTab(QWidget):
             
     def on_grafik_selected(self):
         """Grafik ausgewählt → Vorschau anzeigen"""
-        selected_rows = self.table.selectedItems()
+        grafik = ausgewaehlte_zeile(self.table)
         
-        if not selected_rows:
+        if not grafik:
             self.preview_label.clear()
             self.preview_label.setText("(Keine Vorschau)")
             self.info_text.setText("(Keine Grafik ausgewählt)")
             return
         
-        row = selected_rows[0].row()
-        grafik = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-        
         # Info anzeigen
         info_html = f"""
         <b>Grafik-ID:</b> {grafik['id']}<br>
@@ -159,12 +155,24 @@ class GrafikenTab(QWidget):
         """
         self.info_text.setText(info_html)
         
-        # Vorschau anzeigen
+        # Vorschau anzeigen (Cache-Schlüssel ändert sich, wenn die Grafik ersetzt wird)
+        cache_key = (grafik['id'], grafik['groesse_bytes'], grafik['erstellt_am'])
+        pixmap = self.pixmap_cache.get(cache_key)
+        
+        if pixmap is not None:
+            self.preview_label.setPixmap(pixmap)
+            self.preview_label.setText("")
+            return
+        
         try:
-            blob = grafik['grafik_blob']
+            # Vorberechnetes 800px-Thumbnail, sonst den Original-BLOB dieser Zeile
+            blob = self.db.get_grafik_thumbnail(grafik['id'], 800)
+            if blob is None:
+                blob = self.db.get_grafik_blob(grafik['id'])
             
             pixmap = QPixmap()
-            pixmap.loadFromData(blob)
+            if blob:
+                pixmap.loadFromData(blob)
             
             if pixmap.isNull():
                 self.preview_label.setText("❌ Kann Bild nicht laden")
@@ -173,6 +181,7 @@ class GrafikenTab(QWidget):
                 if pixmap.width() > 800:
                     pixmap = pixmap.scaledToWidth(800, Qt.TransformationMode.SmoothTransformation)
                 
+                self.pixmap_cache.put(cache_key, pixmap)
                 self.preview_label.setPixmap(pixmap)
                 self.preview_label.setText("")
                 
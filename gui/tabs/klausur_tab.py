@@ -15,10 +15,10 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QStackedWidget, 
     QFrame, QGroupBox, QComboBox, QRadioButton, QButtonGroup, QSpinBox,
     QLineEdit, QDateEdit, QMessageBox, QFormLayout, QScrollArea, QSplitter,
-    QTableWidget, QTableWidgetItem, QTextEdit, QHeaderView, QListWidget,
+    QTableView, QTextEdit, QHeaderView, QListWidget,
     QListWidgetItem, QPlainTextEdit
 )
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtCore import Qt, QDate, QTimer
 from PyQt6.QtGui import QFont, QTextOption, QPixmap
 import json
 from pathlib import Path
@@ -26,6 +26,10 @@ from pathlib import Path
 from core.database import get_database
 from core.models import Klausur, Schule
 from utils.latex_generator import LaTeXGenerator
+from gui.preview_service import get_preview_service
+from gui.table_model import (
+    DictTableModel, Spalte, ausgewaehlte_zeile, konfiguriere_tabelle
+)
 
 from gui.tabs.step3_anordnung import Step3Anordnung
 from gui.tabs.step4_pdf_optionen import Step4PDFOptionen
@@ -720,6 +724,12 @@ class Step2AufgabenAuswahl(QWidget):
         db_path = Path(__file__).parent.parent.parent / 'database' / 'sus.db'
         self.latex_gen = LaTeXGenerator(db_path=str(db_path))
         
+        # Vorschau im Hintergrund (warme Worker, Ergebnis per Signal)
+        self.preview_service = get_preview_service()
+        self.preview_service.preview_ready.connect(self.on_preview_ready)
+        self.preview_service.preview_failed.connect(self.on_preview_failed)
+        self.preview_job_id = None
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -756,8 +766,13 @@ class Step2AufgabenAuswahl(QWidget):
         
         # Suchfeld
         self.search_edit = QLineEdit()
-        self.search_edit.setPlaceholderText("🔍 Suche nach Titel/Thema...")
-        self.search_edit.textChanged.connect(self.load_aufgaben)
+        self.search_edit.setPlaceholderText("🔍 Volltext: Titel, Thema, Schlagwörter, LaTeX...")
+        # Kurz sammeln statt pro Tastendruck abzufragen (Volltext-Index ist schnell)
+        self.such_timer = QTimer(self)
+        self.such_timer.setSingleShot(True)
+        self.such_timer.setInterval(120)
+        self.such_timer.timeout.connect(self.load_aufgaben)
+        self.search_edit.textChanged.connect(self.such_timer.start)
         filter_layout.addWidget(self.search_edit, 2)
         
         # Schwierigkeit
@@ -780,16 +795,21 @@ class Step2AufgabenAuswahl(QWidget):
         pool_split = QSplitter(Qt.Orientation.Horizontal)
         
         # Links: Tabelle
-        self.aufgaben_table = QTableWidget()
-        self.aufgaben_table.setColumnCount(6)
-        self.aufgaben_table.setHorizontalHeaderLabels([
-            "ID", "Titel", "Thema", "Schwierigkeit", "AFB", "Punkte"
+        self.aufgaben_model = DictTableModel([
+            Spalte("ID", "id"),
+            Spalte("Titel", "titel"),
+            Spalte("Thema", "themengebiet"),
+            Spalte("Schwierigkeit", "schwierigkeit"),
+            Spalte("AFB", "anforderungsbereich"),
+            Spalte("Punkte", "punkte", format=lambda p: str(p or 0)),
         ])
+        
+        self.aufgaben_table = QTableView()
+        konfiguriere_tabelle(self.aufgaben_table, self.aufgaben_model, sortierbar=False)
         self.aufgaben_table.horizontalHeader().setStretchLastSection(False)
         self.aufgaben_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.aufgaben_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.aufgaben_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.aufgaben_table.itemSelectionChanged.connect(self.on_aufgabe_selected)
+        self.aufgaben_table.selectionModel().selectionChanged.connect(self.on_aufgabe_selected)
+        self.aufgaben_model.modelReset.connect(self.on_aufgabe_selected)
         self.aufgaben_table.doubleClicked.connect(self.add_aufgabe)
         pool_split.addWidget(self.aufgaben_table)
         
@@ -909,8 +929,8 @@ class Step2AufgabenAuswahl(QWidget):
         schwierigkeit = self.schwierigkeit_combo.currentText()
         afb = self.afb_combo.currentText()
         
-        # DB-Abfrage
-        aufgaben = self.db.get_aufgaben(
+        # DB-Abfrage (nur Übersichts-Spalten, LaTeX-Code wird bei Auswahl geladen)
+        aufgaben = self.db.get_aufgaben_liste(
             fach=klausur.fach,
             jahrgangsstufe=klausur.jahrgangsstufe,
             schwierigkeit=None if schwierigkeit == "Alle" else schwierigkeit,
@@ -918,28 +938,18 @@ class Step2AufgabenAuswahl(QWidget):
             suchtext=suchtext if suchtext else None
         )
         
-        # Tabelle füllen
-        self.aufgaben_table.setRowCount(0)
+        # Tabelle füllen (Übersichts-Daten; Details: lade_aufgabe_details)
+        self.aufgaben_model.set_rows(aufgaben)
         
-        for aufgabe in aufgaben:
-            row = self.aufgaben_table.rowCount()
-            self.aufgaben_table.insertRow(row)
-            
-            self.aufgaben_table.setItem(row, 0, QTableWidgetItem(str(aufgabe['id'])))
-            self.aufgaben_table.setItem(row, 1, QTableWidgetItem(aufgabe['titel'] or ''))
-            self.aufgaben_table.setItem(row, 2, QTableWidgetItem(aufgabe['themengebiet'] or ''))
-            self.aufgaben_table.setItem(row, 3, QTableWidgetItem(aufgabe['schwierigkeit'] or ''))
-            self.aufgaben_table.setItem(row, 4, QTableWidgetItem(aufgabe['anforderungsbereich'] or ''))
-            self.aufgaben_table.setItem(row, 5, QTableWidgetItem(str(aufgabe['punkte'] or 0)))
-            
-            # Speichere komplette Aufgabe als UserRole
-            self.aufgaben_table.item(row, 0).setData(Qt.ItemDataRole.UserRole, aufgabe)
+        # Fehlende Vorschauen der gefilterten Liste im Hintergrund vorrendern
+        self.preview_service.prewarm_aufgaben(aufgaben)
     
     def on_aufgabe_selected(self):
         """Aufgabe in Tabelle ausgewählt → Zeige Detail + LaTeX"""
-        selected_rows = self.aufgaben_table.selectedItems()
+        selected = ausgewaehlte_zeile(self.aufgaben_table)
         
-        if not selected_rows:
+        if not selected:
+            self.cancel_preview()
             self.detail_text.clear()
             self.latex_text.clear()
             self.preview_label.clear()
@@ -948,9 +958,7 @@ class Step2AufgabenAuswahl(QWidget):
             self.render_btn.setEnabled(False)
             return
         
-        # Erste Zelle der Zeile
-        row = selected_rows[0].row()
-        aufgabe = self.aufgaben_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        aufgabe = self.lade_aufgabe_details(selected)
         
         # Metadaten anzeigen
         detail_html = f"""
@@ -964,7 +972,8 @@ class Step2AufgabenAuswahl(QWidget):
         latex_code = aufgabe.get('latex_code', '') or '(Kein LaTeX-Code vorhanden)'
         self.latex_text.setPlainText(latex_code)
         
-        # Preview zurücksetzen
+        # Preview zurücksetzen (laufende Vorschau ist veraltet)
+        self.cancel_preview()
         self.preview_label.clear()
         self.preview_label.setText("(Klicke 'Vorschau generieren')")
         
@@ -972,6 +981,12 @@ class Step2AufgabenAuswahl(QWidget):
         self.add_btn.setEnabled(True)
         self.render_btn.setEnabled(bool(aufgabe.get('latex_code')))
     
+    def lade_aufgabe_details(self, aufgabe: dict) -> dict:
+        """Vollständigen Datensatz (mit LaTeX-Code) zu einem Listen-Eintrag laden"""
+        if 'latex_code' in aufgabe:
+            return aufgabe
+        return self.db.get_aufgabe_by_id(aufgabe['id']) or aufgabe
+    
     def on_selected_aufgabe_clicked(self):
         """Aufgabe in selected_list ausgewählt → Zeige Detail + LaTeX"""
         selected_items = self.selected_list.selectedItems()
@@ -982,8 +997,8 @@ class Step2AufgabenAuswahl(QWidget):
         if not selected_items:
             return
         
-        # Hole Aufgabe aus UserRole
-        aufgabe = selected_items[0].data(Qt.ItemDataRole.UserRole)
+        # Hole Aufgabe aus UserRole (LaTeX-Code ggf. nachladen)
+        aufgabe = self.lade_aufgabe_details(selected_items[0].data(Qt.ItemDataRole.UserRole))
         
         # Metadaten anzeigen
         detail_html = f"""
@@ -997,7 +1012,8 @@ class Step2AufgabenAuswahl(QWidget):
         latex_code = aufgabe.get('latex_code', '') or '(Kein LaTeX-Code vorhanden)'
         self.latex_text.setPlainText(latex_code)
         
-        # Preview zurücksetzen
+        # Preview zurücksetzen (laufende Vorschau ist veraltet)
+        self.cancel_preview()
         self.preview_label.clear()
         self.preview_label.setText("(Klicke 'Vorschau generieren')")
         
@@ -1007,16 +1023,15 @@ class Step2AufgabenAuswahl(QWidget):
     def render_preview(self):
         """LaTeX zu PNG rendern via API - NEU!"""
         # Hole aktuelle Aufgabe
-        selected_rows = self.aufgaben_table.selectedItems()
+        selected = ausgewaehlte_zeile(self.aufgaben_table)
         
-        if not selected_rows:
+        if not selected:
             selected_items = self.selected_list.selectedItems()
             if not selected_items:
                 return
-            aufgabe = selected_items[0].data(Qt.ItemDataRole.UserRole)
+            aufgabe = self.lade_aufgabe_details(selected_items[0].data(Qt.ItemDataRole.UserRole))
         else:
-            row = selected_rows[0].row()
-            aufgabe = self.aufgaben_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            aufgabe = self.lade_aufgabe_details(selected)
         
         latex_code = aufgabe.get('latex_code', '')
         aufgabe_id = aufgabe.get('id')
@@ -1025,50 +1040,59 @@ class Step2AufgabenAuswahl(QWidget):
             self.preview_label.setText("(Kein LaTeX-Code vorhanden)")
             return
         
-        # Rendering läuft
-        self.preview_label.setText("⏳ Rendering via API...")
+        # Rendering läuft (im Hintergrund)
+        self.preview_label.setText("⏳ Rendering...")
         self.render_btn.setEnabled(False)
         
-        try:
-            # API-Call: LaTeX → PNG (mit Grafiken!)
-            png_bytes = self.latex_gen.generate_aufgabe_preview_png(
-                aufgabe={'latex_code': latex_code},
-                mit_loesung=False,
-                dpi=150,
-                aufgabe_id=aufgabe_id
-            )
-            
-            if png_bytes:
-                # Bytes → QPixmap
-                pixmap = QPixmap()
-                pixmap.loadFromData(png_bytes)
-                
-                # Skalieren auf max 600px Breite
-                if pixmap.width() > 600:
-                    pixmap = pixmap.scaledToWidth(600, Qt.TransformationMode.SmoothTransformation)
-                
-                self.preview_label.setPixmap(pixmap)
-                self.preview_label.setText("")
-            else:
-                self.preview_label.setText("❌ Rendering fehlgeschlagen")
-                
-        except Exception as e:
-            self.preview_label.setText(f"❌ Fehler: {str(e)}")
-            print(f"Preview-Fehler: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            self.render_btn.setEnabled(True)
+        self.preview_job_id = self.preview_service.request_preview(
+            aufgabe_id=aufgabe_id,
+            latex_code=latex_code,
+            mit_loesung=False,
+            dpi=150
+        )
+    
+    def cancel_preview(self):
+        """Offene Vorschau verwerfen (Auswahl geändert)"""
+        if self.preview_job_id is not None:
+            self.preview_service.cancel_pending()
+            self.preview_job_id = None
+    
+    def on_preview_ready(self, job_id: int, aufgabe_id: int, png_bytes: bytes):
+        """PNG aus dem Preview-Service (GUI-Thread)"""
+        if job_id != self.preview_job_id:
+            return
+        
+        self.preview_job_id = None
+        self.render_btn.setEnabled(True)
+        
+        # Bytes → QPixmap
+        pixmap = QPixmap()
+        pixmap.loadFromData(png_bytes)
+        
+        # Skalieren auf max 600px Breite
+        if pixmap.width() > 600:
+            pixmap = pixmap.scaledToWidth(600, Qt.TransformationMode.SmoothTransformation)
+        
+        self.preview_label.setPixmap(pixmap)
+        self.preview_label.setText("")
+    
+    def on_preview_failed(self, job_id: int, aufgabe_id: int, fehler: str):
+        """Fehler aus dem Preview-Service (GUI-Thread)"""
+        if job_id != self.preview_job_id:
+            return
+        
+        self.preview_job_id = None
+        self.render_btn.setEnabled(True)
+        self.preview_label.setText(f"❌ Fehler: {fehler}")
+        print(f"Preview-Fehler: {fehler}")
     
     def add_aufgabe(self):
         """Aufgabe zur Auswahl hinzufügen"""
-        selected_rows = self.aufgaben_table.selectedItems()
+        aufgabe = ausgewaehlte_zeile(self.aufgaben_table)
         
-        if not selected_rows:
+        if not aufgabe:
             return
         
-        row = selected_rows[0].row()
-        aufgabe = self.aufgaben_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
         aufgabe_id = aufgabe['id']
         
         # Prüfe ob schon ausgewählt
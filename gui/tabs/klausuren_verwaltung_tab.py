@@ -8,13 +8,25 @@ Vollständiges CRUD (Create, Read, Update, Delete)
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
+    QTableView, QHeaderView, QMessageBox,
     QLineEdit, QComboBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QFont
 
 from core.database import get_database
+from gui.query_executor import QueryExecutor
+from gui.table_model import (
+    DictTableModel, Spalte, TabellenFilterProxy,
+    ausgewaehlte_zeile, konfiguriere_tabelle
+)
+
+
+def _nur_datum(erstellt) -> str:
+    """Zeitstempel 'YYYY-MM-DD HH:MM:SS' → nur Datum"""
+    if not erstellt:
+        return ''
+    return str(erstellt).split(' ')[0]
 
 
 class KlausurenVerwaltungTab(QWidget):
@@ -24,6 +36,15 @@ class KlausurenVerwaltungTab(QWidget):
         super().__init__(parent)
         self.main_window = parent
         self.db = get_database()
+        
+        # Abfragen im Hintergrund, nur die neueste zählt
+        self.executor = QueryExecutor(self.db, self)
+        self.executor.ergebnis.connect(self.on_klausuren_geladen)
+        self.executor.fehler.connect(self.on_laden_fehlgeschlagen)
+        self._lade_job = 0
+        # Änderungszähler beim letzten Laden (None = noch nie geladen)
+        self._geladene_version = None
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -68,7 +89,7 @@ class KlausurenVerwaltungTab(QWidget):
         filter_layout.addWidget(QLabel("Suche:"))
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("Titel oder Thema...")
-        self.search_edit.textChanged.connect(self.filter_klausuren)
+        self.search_edit.textChanged.connect(self.on_search_changed)
         filter_layout.addWidget(self.search_edit)
         
         filter_layout.addWidget(QLabel("Fach:"))
@@ -85,13 +106,28 @@ class KlausurenVerwaltungTab(QWidget):
         
         layout.addLayout(filter_layout)
         
+        # Suche entprellen: erst nach kurzer Tipp-Pause abfragen
+        self.such_timer = QTimer(self)
+        self.such_timer.setSingleShot(True)
+        self.such_timer.setInterval(250)
+        self.such_timer.timeout.connect(self.filter_klausuren)
+        
         # Tabelle
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Titel", "Fach", "Klasse", "Typ", "Datum", 
-            "Schule", "Erstellt"
+        self.model = DictTableModel([
+            Spalte("ID", "id"),
+            Spalte("Titel", "titel"),
+            Spalte("Fach", "fach"),
+            Spalte("Klasse", "klasse"),
+            Spalte("Typ", "typ"),
+            Spalte("Datum", "datum"),
+            Spalte("Schule", "schule"),
+            Spalte("Erstellt", "erstellt_am", format=_nur_datum),
         ])
+        self.proxy = TabellenFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        
+        self.table = QTableView()
+        konfiguriere_tabelle(self.table, self.proxy)
         
         # Spaltenbreiten
         header = self.table.horizontalHeader()
@@ -105,10 +141,9 @@ class KlausurenVerwaltungTab(QWidget):
         header.setSectionResizeMode(7, QHeaderView.ResizeMode.ResizeToContents)
         
         # Selektion
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
-        self.table.itemDoubleClicked.connect(self.edit_klausur)
+        self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        self.model.modelReset.connect(self.on_selection_changed)
+        self.table.doubleClicked.connect(self.edit_klausur)
         
         layout.addWidget(self.table)
         
@@ -120,75 +155,60 @@ class KlausurenVerwaltungTab(QWidget):
         self.load_klausuren()
         
     def load_klausuren(self):
-        """Klausuren aus DB laden"""
+        """Klausuren aus DB laden (im Hintergrund, Ergebnis: on_klausuren_geladen)"""
+        
+        self.such_timer.stop()
+        
+        # Filter-Werte
+        search = self.search_edit.text().strip()
+        fach = self.fach_combo.currentText()
+        typ = self.typ_combo.currentText()
+        
+        # Stand vor der Abfrage merken - spätere Änderungen lösen Neuladen aus
+        self._geladene_version = self.db.get_data_version()
+        
+        self._lade_job = self.executor.submit(
+            self.db.get_klausuren,
+            suchtext=search or None,
+            fach=None if fach == "Alle" else fach,
+            typ=None if typ == "Alle" else typ
+        )
+        
+    def on_klausuren_geladen(self, job_id, result):
+        """Abfrage fertig → Tabelle füllen"""
+        
+        if job_id != self._lade_job:
+            return
+        
+        klausuren, total = result
+        
+        # Tabelle füllen (ein Model-Reset statt insertRow pro Klausur)
+        self.model.set_rows(klausuren)
+        
+        # Statistik
+        self.stats_label.setText(f"Angezeigt: {len(klausuren)} von {total} Klausuren")
+        
+    def on_laden_fehlgeschlagen(self, job_id, fehler):
+        """Abfrage fehlgeschlagen"""
+        
+        if job_id != self._lade_job:
+            return
+        
+        # Beim nächsten Anzeigen erneut versuchen
+        self._geladene_version = None
+        QMessageBox.critical(self, "Fehler", f"Fehler beim Laden:\n{fehler}")
+        
+    def on_search_changed(self):
+        """Sucheingabe geändert → Timer neu starten"""
+        self.such_timer.start()
         
-        try:
-            # Filter-Werte
-            search = self.search_edit.text().strip()
-            fach = self.fach_combo.currentText()
-            typ = self.typ_combo.currentText()
-            
-            # Query bauen
-            query = "SELECT * FROM klausuren WHERE 1=1"
-            params = []
-            
-            if search:
-                query += " AND (titel LIKE ? OR fach LIKE ? OR klasse LIKE ?)"
-                search_pattern = f"%{search}%"
-                params.extend([search_pattern, search_pattern, search_pattern])
-            
-            if fach != "Alle":
-                query += " AND fach = ?"
-                params.append(fach)
-            
-            if typ != "Alle":
-                query += " AND typ = ?"
-                params.append(typ)
-            
-            query += " ORDER BY erstellt_am DESC"
-            
-            klausuren = self.db.execute_query(query, tuple(params))
-            
-            # Tabelle füllen
-            self.table.setRowCount(0)
-            
-            for klausur in klausuren:
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                
-                # ID (versteckt, aber für Referenz)
-                id_item = QTableWidgetItem(str(klausur['id']))
-                id_item.setData(Qt.ItemDataRole.UserRole, klausur)
-                self.table.setItem(row, 0, id_item)
-                
-                # Daten
-                self.table.setItem(row, 1, QTableWidgetItem(klausur.get('titel', '')))
-                self.table.setItem(row, 2, QTableWidgetItem(klausur.get('fach', '')))
-                self.table.setItem(row, 3, QTableWidgetItem(klausur.get('klasse', '')))
-                self.table.setItem(row, 4, QTableWidgetItem(klausur.get('typ', '')))
-                self.table.setItem(row, 5, QTableWidgetItem(klausur.get('datum', '')))
-                self.table.setItem(row, 6, QTableWidgetItem(klausur.get('schule', '')))
-                
-                # Erstellt (nur Datum)
-                erstellt = klausur.get('erstellt_am', '')
-                if erstellt and ' ' in erstellt:
-                    erstellt = erstellt.split(' ')[0]
-                self.table.setItem(row, 7, QTableWidgetItem(erstellt))
-            
-            # Statistik
-            total = self.db.execute_query("SELECT COUNT(*) as count FROM klausuren")[0]['count']
-            self.stats_label.setText(f"Angezeigt: {len(klausuren)} von {total} Klausuren")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Fehler", f"Fehler beim Laden:\n{e}")
-            
     def filter_klausuren(self):
         """Filter anwenden"""
         self.load_klausuren()
         
     def on_selection_changed(self):
         """Selektion geändert"""
-        has_selection = len(self.table.selectedItems()) > 0
+        has_selection = self.table.selectionModel().hasSelection()
         self.edit_btn.setEnabled(has_selection)
         self.delete_btn.setEnabled(has_selection)
         self.pdf_btn.setEnabled(has_selection)
@@ -196,13 +216,10 @@ class KlausurenVerwaltungTab(QWidget):
     def edit_klausur(self):
         """Klausur bearbeiten"""
         
-        selected = self.table.selectedItems()
-        if not selected:
-            return
-        
         # Klausur-Daten holen
-        row = selected[0].row()
-        klausur_data = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        klausur_data = ausgewaehlte_zeile(self.table)
+        if not klausur_data:
+            return
         
         # Öffne Wizard im Edit-Modus
         if self.main_window:
@@ -214,13 +231,10 @@ class KlausurenVerwaltungTab(QWidget):
     def delete_klausur(self):
         """Klausur löschen"""
         
-        selected = self.table.selectedItems()
-        if not selected:
+        klausur_data = ausgewaehlte_zeile(self.table)
+        if not klausur_data:
             return
         
-        row = selected[0].row()
-        klausur_data = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-        
         # Bestätigung
         reply = QMessageBox.question(
             self,
@@ -247,13 +261,10 @@ class KlausurenVerwaltungTab(QWidget):
     def regenerate_pdf(self):
         """PDF neu generieren"""
         
-        selected = self.table.selectedItems()
-        if not selected:
+        klausur_data = ausgewaehlte_zeile(self.table)
+        if not klausur_data:
             return
         
-        row = selected[0].row()
-        klausur_data = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-        
         QMessageBox.information(
             self,
             "PDF neu generieren",
@@ -265,4 +276,7 @@ class KlausurenVerwaltungTab(QWidget):
     def showEvent(self, event):
         """Wird aufgerufen wenn Tab angezeigt wird"""
         super().showEvent(event)
-        self.load_klausuren()
+        
+        # Nur neu laden, wenn seit dem letzten Laden geschrieben wurde
+        if self._geladene_version != self.db.get_data_version():
+            self.load_klausuren()
@@ -7,14 +7,18 @@ Master-Detail-View mit Filter und Preview
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QLineEdit, QSplitter, QTableWidget, QTableWidgetItem,
-    QTextEdit, QCheckBox, QGroupBox, QMessageBox, QHeaderView
+    QLineEdit, QSplitter, QTableView,
+    QTextEdit, QGroupBox, QMessageBox, QHeaderView
 )
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 
 from core.database import get_database
 from core.models import Aufgabe, KlausurAufgabe
+from gui.table_model import (
+    DictTableModel, Spalte, TabellenFilterProxy,
+    ausgewaehlte_zeile, konfiguriere_tabelle
+)
 
 
 class Step2AufgabenAuswahl(QWidget):
@@ -27,6 +31,8 @@ class Step2AufgabenAuswahl(QWidget):
         
         # Alle Aufgaben (werden beim Betreten geladen)
         self.all_aufgaben = []
+        # ID -> Punkte (Statistik ohne Durchlauf über alle Aufgaben)
+        self.punkte_by_id = {}
         
         # Ausgewählte Aufgaben (IDs)
         self.selected_aufgaben_ids = set()
@@ -102,12 +108,22 @@ class Step2AufgabenAuswahl(QWidget):
         left_layout.addWidget(QLabel("<b>Verfügbare Aufgaben</b>"))
         
         # Tabelle
-        self.aufgaben_table = QTableWidget()
-        self.aufgaben_table.setColumnCount(5)
-        self.aufgaben_table.setHorizontalHeaderLabels(["✓", "Titel", "Punkte", "Schwierigkeit", "Thema"])
-        self.aufgaben_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.aufgaben_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.aufgaben_table.itemSelectionChanged.connect(self.on_aufgabe_selected)
+        # Checkbox als Item-Flag der ersten Spalte (kein Widget pro Zeile)
+        self.aufgaben_model = DictTableModel([
+            Spalte("✓", "id", format=lambda _: ""),
+            Spalte("Titel", "titel"),
+            Spalte("Punkte", "punkte", format=lambda p: str(p or 0)),
+            Spalte("Schwierigkeit", "schwierigkeit", format=lambda s: s.capitalize() if s else ""),
+            Spalte("Thema", "themengebiet"),
+        ], checkable=True)
+        self.aufgaben_model.check_changed.connect(self.toggle_aufgabe)
+        
+        self.aufgaben_proxy = TabellenFilterProxy(self)
+        self.aufgaben_proxy.setSourceModel(self.aufgaben_model)
+        
+        self.aufgaben_table = QTableView()
+        konfiguriere_tabelle(self.aufgaben_table, self.aufgaben_proxy)
+        self.aufgaben_table.selectionModel().selectionChanged.connect(self.on_aufgabe_selected)
         
         # Spaltenbreiten
         header = self.aufgaben_table.horizontalHeader()
@@ -162,11 +178,15 @@ class Step2AufgabenAuswahl(QWidget):
         """Aufgaben aus DB laden"""
         try:
             klausur = self.parent_tab.klausur
-            self.all_aufgaben = self.db.get_aufgaben(
+            self.all_aufgaben = self.db.get_aufgaben_liste(
                 fach=klausur.fach,
                 jahrgangsstufe=klausur.jahrgangsstufe
             )
             print(f"Gefunden: {len(self.all_aufgaben)} Aufgaben")
+            self.punkte_by_id = {a['id']: a.get('punkte') or 0 for a in self.all_aufgaben}
+            
+            self.aufgaben_model.set_rows(self.all_aufgaben)
+            self.aufgaben_model.set_checked_ids(self.selected_aufgaben_ids)
             self.filter_aufgaben()
         except Exception as e:
             print(f"Fehler beim Laden der Aufgaben: {e}")
@@ -182,57 +202,18 @@ class Step2AufgabenAuswahl(QWidget):
         self.filter_aufgaben()
     
     def filter_aufgaben(self):
-        """Aufgaben filtern und anzeigen"""
-        search_text = self.search_edit.text().lower()
-        
-        filtered = []
-        for aufgabe in self.all_aufgaben:
-            if self.current_difficulty_filter:
-                if aufgabe.get('schwierigkeit') != self.current_difficulty_filter:
-                    continue
-            
-            if search_text:
-                titel = (aufgabe.get('titel') or '').lower()
-                thema = (aufgabe.get('themengebiet') or '').lower()
-                if search_text not in titel and search_text not in thema:
-                    continue
-            
-            filtered.append(aufgabe)
-        
-        # Tabelle füllen
-        self.aufgaben_table.setRowCount(len(filtered))
-        
-        for row, aufgabe in enumerate(filtered):
-            # Checkbox
-            checkbox_widget = QWidget()
-            checkbox_layout = QHBoxLayout(checkbox_widget)
-            checkbox_layout.setContentsMargins(0, 0, 0, 0)
-            checkbox_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            
-            checkbox = QCheckBox()
-            checkbox.setChecked(aufgabe['id'] in self.selected_aufgaben_ids)
-            checkbox.stateChanged.connect(
-                lambda state, aid=aufgabe['id']: self.toggle_aufgabe(aid, state)
-            )
-            checkbox_layout.addWidget(checkbox)
-            self.aufgaben_table.setCellWidget(row, 0, checkbox_widget)
-            
-            # Andere Spalten
-            self.aufgaben_table.setItem(row, 1, QTableWidgetItem(aufgabe.get('titel', '')))
-            self.aufgaben_table.setItem(row, 2, QTableWidgetItem(str(aufgabe.get('punkte', 0))))
-            
-            schwierigkeit = aufgabe.get('schwierigkeit', '')
-            self.aufgaben_table.setItem(row, 3, QTableWidgetItem(schwierigkeit.capitalize() if schwierigkeit else ''))
-            self.aufgaben_table.setItem(row, 4, QTableWidgetItem(aufgabe.get('themengebiet', '')))
-            
-            # ID speichern
-            self.aufgaben_table.item(row, 1).setData(Qt.ItemDataRole.UserRole, aufgabe['id'])
+        """Aufgaben filtern (Proxy blendet Zeilen aus, Tabelle bleibt bestehen)"""
+        self.aufgaben_proxy.set_filter(
+            text=self.search_edit.text(),
+            text_felder=("titel", "themengebiet"),
+            gleich={"schwierigkeit": self.current_difficulty_filter}
+        )
         
         self.update_stats()
     
-    def toggle_aufgabe(self, aufgabe_id, state):
+    def toggle_aufgabe(self, aufgabe_id, angehakt):
         """Aufgabe aus/abwählen"""
-        if state == Qt.CheckState.Checked.value:
+        if angehakt:
             self.selected_aufgaben_ids.add(aufgabe_id)
         else:
             self.selected_aufgaben_ids.discard(aufgabe_id)
@@ -240,14 +221,13 @@ class Step2AufgabenAuswahl(QWidget):
     
     def on_aufgabe_selected(self):
         """Aufgabe wurde ausgewählt -> Preview"""
-        selected_rows = self.aufgaben_table.selectedIndexes()
-        if not selected_rows:
+        selected = ausgewaehlte_zeile(self.aufgaben_table)
+        if not selected:
             self.preview_text.clear()
             return
         
-        row = selected_rows[0].row()
-        aufgabe_id = self.aufgaben_table.item(row, 1).data(Qt.ItemDataRole.UserRole)
-        aufgabe = next((a for a in self.all_aufgaben if a['id'] == aufgabe_id), None)
+        # Vollständiger Datensatz (mit LaTeX-Code) erst bei Auswahl
+        aufgabe = self.db.get_aufgabe_by_id(selected['id'])
         
         if aufgabe:
             preview = f"<h3>{aufgabe.get('titel', '')}</h3>"
@@ -272,8 +252,7 @@ class Step2AufgabenAuswahl(QWidget):
             return
         
         total_punkte = sum(
-            a.get('punkte', 0) for a in self.all_aufgaben 
-            if a['id'] in self.selected_aufgaben_ids
+            self.punkte_by_id.get(aufgabe_id, 0) for aufgabe_id in self.selected_aufgaben_ids
         )
         total_zeit = total_punkte * 2
         anzahl = len(self.selected_aufgaben_ids)
@@ -296,8 +275,13 @@ class Step2AufgabenAuswahl(QWidget):
         klausur = self.parent_tab.klausur
         klausur.aufgaben.clear()
         
+        # Ausgewählte Aufgaben vollständig nachladen (Liste hat nur Übersichts-Spalten)
+        aufgaben = {
+            a['id']: a for a in self.db.get_aufgaben_by_ids(sorted(self.selected_aufgaben_ids))
+        }
+        
         for i, aufgabe_id in enumerate(sorted(self.selected_aufgaben_ids), start=1):
-            aufgabe_data = next((a for a in self.all_aufgaben if a['id'] == aufgabe_id), None)
+            aufgabe_data = aufgaben.get(aufgabe_id)
             if aufgabe_data:
                 aufgabe = Aufgabe.from_dict(aufgabe_data)
                 klausur_aufgabe = KlausurAufgabe(
@@ -310,6 +294,7 @@ class Step2AufgabenAuswahl(QWidget):
     def reset(self):
         """Zurücksetzen"""
         self.selected_aufgaben_ids.clear()
+        self.aufgaben_model.set_checked_ids(())
         self.search_edit.clear()
         self.set_difficulty_filter(None)
         self.preview_text.clear()
@@ -135,8 +135,13 @@ class Step3Anordnung(QWidget):
         
         total_punkte = 0
         
+        # Nur Übersichts-Spalten, eine Abfrage für alle IDs
+        aufgaben = {
+            a['id']: a for a in db.get_aufgaben_by_ids(klausur.aufgaben_ids, nur_liste=True)
+        }
+        
         for i, aufgabe_id in enumerate(klausur.aufgaben_ids):
-            aufgabe = db.get_aufgabe_by_id(aufgabe_id)
+            aufgabe = aufgaben.get(aufgabe_id)
             
             if aufgabe:
                 punkte = aufgabe.get('punkte', 0) or 0
@@ -116,10 +116,8 @@ class Step4PDFOptionen(QWidget):
         total_punkte = 0
         if hasattr(klausur, 'aufgaben_ids'):
             db = self.parent_tab.db
-            for aufgabe_id in klausur.aufgaben_ids:
-                aufgabe = db.get_aufgabe_by_id(aufgabe_id)
-                if aufgabe:
-                    total_punkte += aufgabe.get('punkte', 0) or 0
+            for aufgabe in db.get_aufgaben_by_ids(klausur.aufgaben_ids, nur_liste=True):
+                total_punkte += aufgabe.get('punkte', 0) or 0
         
         # Seitenumbrüche
         page_breaks = len(klausur.page_breaks) if hasattr(klausur, 'page_breaks') else 0
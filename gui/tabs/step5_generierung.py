@@ -6,6 +6,7 @@ Generiert EINE PDF-Datei für den Klassensatz mit:
 - Optional: 2 Musterklausuren (ohne + mit Lösung)
 - Alle ausgewählten Schüler-Klausuren
 - Automatische Seitenlogik (Reorder 4-1-2-3 wenn nötig)
+- Optional: Einzel-PDFs pro Schüler (+ ZIP) aus derselben Kompilierung
 """
 
 from PyQt6.QtWidgets import (
@@ -26,13 +27,16 @@ class PDFGeneratorThread(QThread):
     progress = pyqtSignal(int, str)  # (value, message)
     finished = pyqtSignal(bool, str, str)  # (success, message, filepath)
     
-    def __init__(self, klausur, selected_schueler, musterklausuren, db, latex_gen):
+    def __init__(self, klausur, selected_schueler, musterklausuren, db, latex_gen,
+                 einzel_pdfs=False, einzel_zip=False):
         super().__init__()
         self.klausur = klausur
         self.selected_schueler = selected_schueler
         self.musterklausuren = musterklausuren
         self.db = db
         self.latex_gen = latex_gen
+        self.einzel_pdfs = einzel_pdfs
+        self.einzel_zip = einzel_zip
         
     def run(self):
         """PDF-Generierung ausführen"""
@@ -46,14 +50,17 @@ class PDFGeneratorThread(QThread):
             filename = f"{datum_str}_{self.klausur.klasse}_{self.klausur.thema.replace(' ', '_')}_Klassensatz.pdf"
             output_path = output_dir / filename
             
+            # Einzel-PDFs: Ordner/ZIP nach dateiname_basis (z.B. Ma-2_8a_20250324)
+            einzel_ordner = output_dir / self.klausur.dateiname_basis if self.einzel_pdfs else None
+            einzel_zip = (
+                output_dir / f"{self.klausur.dateiname_basis}_Einzel.zip"
+                if self.einzel_pdfs and self.einzel_zip else None
+            )
+            
             self.progress.emit(10, "Lade Aufgaben aus DB...")
             
-            # Aufgaben laden
-            aufgaben = []
-            for aufgabe_id in self.klausur.aufgaben_ids:
-                aufgabe = self.db.get_aufgabe_by_id(aufgabe_id)
-                if aufgabe:
-                    aufgaben.append(aufgabe)
+            # Aufgaben laden (vollständig, eine Abfrage in Klausur-Reihenfolge)
+            aufgaben = self.db.get_aufgaben_by_ids(self.klausur.aufgaben_ids)
             
             if not aufgaben:
                 self.finished.emit(False, "Keine Aufgaben gefunden!", "")
@@ -61,27 +68,41 @@ class PDFGeneratorThread(QThread):
             
             self.progress.emit(30, "Generiere LaTeX-Code...")
             
-            # LaTeX Generator aufrufen
-            pdf_bytes = self.latex_gen.generate_klassensatz(
+            # LaTeX Generator aufrufen (schreibt direkt in die Zieldatei)
+            ok = self.latex_gen.generate_klassensatz_datei(
                 klausur=self.klausur,
                 aufgaben=aufgaben,
                 schueler_list=self.selected_schueler,
+                ziel_pfad=output_path,
                 mit_musterklausuren=self.musterklausuren,
-                progress_callback=lambda p, msg: self.progress.emit(p, msg)
+                progress_callback=lambda p, msg: self.progress.emit(p, msg),
+                einzel_ordner=einzel_ordner,
+                einzel_zip=einzel_zip
             )
             
-            if not pdf_bytes:
+            if not ok:
                 self.finished.emit(False, "PDF-Generierung fehlgeschlagen!", "")
                 return
             
-            self.progress.emit(90, "Speichere PDF...")
+            einzel_info = ""
+            if einzel_ordner:
+                einzel_dateien = getattr(self.latex_gen, 'einzel_dateien', [])
+                einzel_info = f"\n{len(einzel_dateien)} Einzel-PDFs in {einzel_ordner}"
+                if einzel_zip and einzel_zip.exists():
+                    einzel_info += f"\nZIP: {einzel_zip.name}"
             
-            # PDF speichern
-            with open(output_path, 'wb') as f:
-                f.write(pdf_bytes)
+            # Parallel-Modus: einzelne Schüler können fehlgeschlagen sein
+            fehlgeschlagen = getattr(self.latex_gen, 'fehlgeschlagene_schueler', [])
+            if fehlgeschlagen:
+                self.finished.emit(
+                    True,
+                    f"Klassensatz erstellt, aber {len(fehlgeschlagen)} Schüler fehlgeschlagen:\n"
+                    + "\n".join(fehlgeschlagen) + einzel_info,
+                    str(output_path)
+                )
+                return
             
-            self.progress.emit(100, "Fertig!")
-            self.finished.emit(True, f"Klassensatz erfolgreich erstellt!", str(output_path))
+            self.finished.emit(True, f"Klassensatz erfolgreich erstellt!{einzel_info}", str(output_path))
             
         except Exception as e:
             import traceback
@@ -184,6 +205,19 @@ class Step5Generierung(QWidget):
         self.status_text.setMaximumHeight(200)
         progress_layout.addWidget(self.status_text)
         
+        # Einzel-PDFs (digitale Rückgabe / LMS-Upload)
+        self.einzel_check = QCheckBox("📑 Zusätzlich Einzel-PDFs pro Schüler")
+        self.einzel_check.setToolTip(
+            "Eine PDF pro Schüler für digitale Rückgabe/LMS-Upload -\n"
+            "aus derselben Kompilierung, ohne erneutes Kompilieren"
+        )
+        progress_layout.addWidget(self.einzel_check)
+        
+        self.zip_check = QCheckBox("🗜️ Einzel-PDFs zusätzlich als ZIP")
+        self.zip_check.setEnabled(False)
+        self.einzel_check.toggled.connect(self.zip_check.setEnabled)
+        progress_layout.addWidget(self.zip_check)
+        
         # Generate-Button
         self.generate_btn = QPushButton("📄 Klassensatz generieren")
         self.generate_btn.setMinimumHeight(50)
@@ -319,10 +353,8 @@ class Step5Generierung(QWidget):
         total_punkte = 0
         if hasattr(klausur, 'aufgaben_ids'):
             db = self.parent_tab.db
-            for aufgabe_id in klausur.aufgaben_ids:
-                aufgabe = db.get_aufgabe_by_id(aufgabe_id)
-                if aufgabe:
-                    total_punkte += aufgabe.get('punkte', 0) or 0
+            for aufgabe in db.get_aufgaben_by_ids(klausur.aufgaben_ids, nur_liste=True):
+                total_punkte += aufgabe.get('punkte', 0) or 0
         
         # Seitenumbrüche
         page_breaks = len(klausur.page_breaks) if hasattr(klausur, 'page_breaks') else 0
@@ -373,7 +405,8 @@ class Step5Generierung(QWidget):
             "Generierung starten?",
             f"Es wird ein Klassensatz generiert:\n"
             f"{muster_text}{len(selected)} Schüler-Klausuren\n\n"
-            f"→ Eine einzelne PDF-Datei\n\n"
+            f"→ Eine einzelne PDF-Datei"
+            f"{' + Einzel-PDFs pro Schüler' if self.einzel_check.isChecked() else ''}\n\n"
             f"Fortfahren?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
@@ -405,7 +438,9 @@ class Step5Generierung(QWidget):
             selected_schueler=selected,
             musterklausuren=musterklausuren,
             db=self.parent_tab.db,
-            latex_gen=latex_gen
+            latex_gen=latex_gen,
+            einzel_pdfs=self.einzel_check.isChecked(),
+            einzel_zip=self.zip_check.isChecked()
         )
         
         self.generator_thread.progress.connect(self.on_progress)
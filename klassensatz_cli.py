@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Klausurengenerator v2.0 - Klassensätze ohne GUI
+===============================================
+
+Erzeugt Klassensätze für eine gespeicherte Klausur (klausuren.id) oder
+eine JSON-Beschreibung - für beliebig viele Klassen, parallel.
+
+Importiert kein PyQt6 (nur core/ und utils/) und läuft damit auch auf
+Servern ohne Display.
+
+Aufruf:
+    python klassensatz_cli.py --klausur-id 12 --klassen 8a 8b 8c
+    python klassensatz_cli.py --spec klausur.json --klassen 9a 9b --workers 4
+    python klassensatz_cli.py --klausur-id 12 --klassen 8a 8b 8c --gesamt jahrgang8.pdf
+    python klassensatz_cli.py --klausur-id 12 --einzeln --zip
+
+JSON-Beschreibung (Felder wie in der Tabelle klausuren):
+    {
+        "titel": "Lineare Funktionen", "fach": "Mathematik",
+        "jahrgangsstufe": 8, "klasse": "8a", "typ": "Klassenarbeit",
+        "datum": "15.03.2025", "schule": "gyd", "schuljahr": "2024/2025",
+        "aufgaben": [17, 4, 23], "seitenumbrueche": [1]
+    }
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Projekt-Root zum Python-Path hinzufügen
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from core.database import Database
+from core.models import Klausur
+from core.pdf_merge import fuege_zusammen
+from utils.latex_generator import LaTeXGenerator
+
+
+def _json_liste(wert) -> list:
+    """aufgaben_json / seitenumbrueche_json: JSON-Text oder schon eine Liste"""
+    if not wert:
+        return []
+    if isinstance(wert, str):
+        wert = json.loads(wert)
+    return list(wert) if isinstance(wert, list) else []
+
+
+def _aufgaben_ids(daten: Dict[str, Any]) -> List[int]:
+    """Aufgaben-IDs aus 'aufgaben' bzw. 'aufgaben_json' (IDs oder Dicts)"""
+    eintraege = _json_liste(daten.get('aufgaben', daten.get('aufgaben_json')))
+
+    ids = []
+    for eintrag in eintraege:
+        if isinstance(eintrag, dict):
+            eintrag = eintrag.get('id') or eintrag.get('aufgabe_id')
+        if eintrag is not None:
+            ids.append(int(eintrag))
+    return ids
+
+
+# Wie die Fach-Auswahl in Step 1 (für Klausur.dateiname_basis)
+FACH_KUERZEL = {"Mathematik": "Ma", "Physik": "Ph", "Informatik": "If"}
+
+
+def lade_klausur_daten(db: Database, klausur_id: Optional[int], spec: Optional[str]) -> Dict[str, Any]:
+    """Klausur-Daten aus der DB (klausuren.id) oder einer JSON-Datei"""
+    if klausur_id is not None:
+        daten = db.get_klausur_by_id(klausur_id)
+        if not daten:
+            raise ValueError(f"Klausur {klausur_id} nicht gefunden")
+        return daten
+
+    with open(spec, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def baue_klausur(daten: Dict[str, Any], klasse: str) -> Klausur:
+    """Klausur-Objekt für eine Klasse (Zuordnung wie KlausurTab.load_klausur_for_edit)"""
+    klausur = Klausur()
+    klausur.schule_kuerzel = daten.get('schule') or 'gyd'
+    klausur.fach = daten.get('fach') or 'Mathematik'
+    klausur.fach_kuerzel = daten.get('fach_kuerzel') or FACH_KUERZEL.get(klausur.fach, klausur.fach[:2])
+    klausur.klasse = klasse
+    klausur.jahrgangsstufe = daten.get('jahrgangsstufe') or 8
+    klausur.typ = daten.get('typ') or 'Klassenarbeit'
+    klausur.nummer = daten.get('nummer') or 1
+    klausur.datum = daten.get('datum') or ''
+    klausur.zeit_minuten = daten.get('zeit_minuten') or 45
+    klausur.thema = daten.get('thema') or daten.get('titel') or ''
+    klausur.schuljahr = daten.get('schuljahr') or klausur.schuljahr
+
+    # Wie Step 3 (save_data): Reihenfolge und Umbrüche als Attribute
+    klausur.aufgaben_ids = _aufgaben_ids(daten)
+    klausur.page_breaks = [
+        int(i) for i in _json_liste(daten.get('seitenumbrueche', daten.get('seitenumbrueche_json')))
+    ]
+    return klausur
+
+
+def klassensatz_dateiname(klausur: Klausur) -> str:
+    """Dateiname wie in Step 5 (PDFGeneratorThread)"""
+    datum_str = klausur.datum.replace('.', '-')
+    return f"{datum_str}_{klausur.klasse}_{klausur.thema.replace(' ', '_')}_Klassensatz.pdf"
+
+
+def erzeuge_klassensatz(
+    db: Database,
+    daten: Dict[str, Any],
+    klasse: str,
+    output_dir: Path,
+    mit_musterklausuren: bool,
+    modus: Optional[str],
+    einzeln: bool = False,
+    als_zip: bool = False
+) -> Tuple[str, Optional[Path], str]:
+    """
+    Einen Klassensatz erzeugen (läuft in einem Worker-Thread)
+
+    Returns:
+        (Klasse, Pfad oder None, Meldung)
+    """
+    klausur = baue_klausur(daten, klasse)
+
+    def progress(_wert, meldung):
+        print(f"   [{klasse}] {meldung}")
+
+    schueler = db.get_schueler_by_klasse(klausur.schuljahr, klausur.schule_kuerzel, klasse)
+    if not schueler:
+        return klasse, None, f"Keine Schüler ({klausur.schuljahr}, {klausur.schule_kuerzel})"
+
+    # Aufgaben vollständig, eine Abfrage in Klausur-Reihenfolge
+    aufgaben = db.get_aufgaben_by_ids(klausur.aufgaben_ids)
+    if not aufgaben:
+        return klasse, None, "Keine Aufgaben gefunden"
+
+    # Eigener Generator pro Klassensatz (fehlgeschlagene_schueler ist Zustand)
+    latex_gen = LaTeXGenerator(db_path=str(db.db_path))
+    output_path = output_dir / klassensatz_dateiname(klausur)
+
+    # Einzel-PDFs pro Schüler: Ordner/ZIP nach dateiname_basis (wie Step 5)
+    einzel_ordner = output_dir / klausur.dateiname_basis if einzeln else None
+    einzel_zip = output_dir / f"{klausur.dateiname_basis}_Einzel.zip" if einzeln and als_zip else None
+
+    ok = latex_gen.generate_klassensatz_datei(
+        klausur=klausur,
+        aufgaben=aufgaben,
+        schueler_list=schueler,
+        ziel_pfad=output_path,
+        mit_musterklausuren=mit_musterklausuren,
+        progress_callback=progress,
+        modus=modus,
+        einzel_ordner=einzel_ordner,
+        einzel_zip=einzel_zip
+    )
+
+    if not ok:
+        return klasse, None, "PDF-Generierung fehlgeschlagen"
+
+    meldung = f"{len(schueler)} Schüler"
+    if einzel_ordner:
+        meldung += f", {len(latex_gen.einzel_dateien)} Einzel-PDFs in {einzel_ordner}"
+    if latex_gen.fehlgeschlagene_schueler:
+        meldung += f", fehlgeschlagen: {', '.join(latex_gen.fehlgeschlagene_schueler)}"
+    return klasse, output_path, meldung
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Klassensätze ohne GUI erzeugen (parallel für mehrere Klassen)"
+    )
+
+    quelle = parser.add_mutually_exclusive_group(required=True)
+    quelle.add_argument("--klausur-id", type=int, help="ID einer gespeicherten Klausur (Tabelle klausuren)")
+    quelle.add_argument("--spec", help="JSON-Datei mit der Klausur-Beschreibung")
+
+    parser.add_argument(
+        "--klassen", nargs="+",
+        help="Klassen, für die ein Klassensatz erzeugt wird (Standard: Klasse der Klausur)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=2,
+        help="Klassensätze gleichzeitig (Standard: 2; innerhalb eines Klassensatzes "
+             "gilt max_workers aus config.json)"
+    )
+    parser.add_argument(
+        "--modus", choices=[
+            LaTeXGenerator.MODUS_EINZELDOKUMENT,
+            LaTeXGenerator.MODUS_PARALLEL,
+            LaTeXGenerator.MODUS_STEMPEL,
+        ],
+        help="Klassensatz-Modus (Standard: klassensatz_modus aus config.json)"
+    )
+    parser.add_argument("--ohne-muster", action="store_true", help="Keine Musterklausuren")
+    parser.add_argument(
+        "--einzeln", action="store_true",
+        help="Zusätzlich eine PDF pro Schüler (Ordner <dateiname_basis> im Ausgabeverzeichnis)"
+    )
+    parser.add_argument("--zip", action="store_true", help="Einzel-PDFs zusätzlich als ZIP (mit --einzeln)")
+    parser.add_argument("--ausgabe", default="outputs", help="Ausgabeverzeichnis (Standard: outputs)")
+    parser.add_argument(
+        "--gesamt",
+        help="Zusätzlich alle Klassensätze in eine Druckdatei (gemeinsame Fonts/Bilder nur einmal)"
+    )
+    parser.add_argument(
+        "--db", default=str(project_root / "database" / "sus.db"),
+        help="Pfad zur Datenbank (Standard: database/sus.db)"
+    )
+    parser.add_argument(
+        "--db-check", action="store_true",
+        help="Vorher Query-Pläne prüfen, Abbruch bei Full Scan (wie KLAUSUR_DB_CHECK=1)"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion - Rückgabe = Exit-Code (0 = alle Klassensätze erzeugt)"""
+
+    args = parse_args(argv)
+
+    try:
+        db = Database(args.db)
+        if args.db_check:
+            db.pruefe_schema()
+        daten = lade_klausur_daten(db, args.klausur_id, args.spec)
+    except Exception as e:
+        print(f"❌ {e}")
+        return 2
+
+    klassen = args.klassen or [daten.get('klasse')]
+    klassen = [k for k in klassen if k]
+    if not klassen:
+        print("❌ Keine Klasse angegeben (--klassen) und keine Klasse in der Klausur")
+        return 2
+
+    if not _aufgaben_ids(daten):
+        print("❌ Die Klausur enthält keine Aufgaben")
+        return 2
+
+    output_dir = Path(args.ausgabe)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    workers = max(1, min(args.workers, len(klassen)))
+    print(f"Erzeuge {len(klassen)} Klassensätze ({workers} parallel) → {output_dir}")
+    start = time.perf_counter()
+
+    fehler = 0
+    erzeugt: Dict[str, Path] = {}
+
+    # Threads genügen: kompiliert wird in pdflatex-Prozessen bzw. per HTTP
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                erzeuge_klassensatz, db, daten, klasse, output_dir,
+                not args.ohne_muster, args.modus, args.einzeln, args.zip
+            ): klasse
+            for klasse in klassen
+        }
+
+        for future in as_completed(futures):
+            klasse = futures[future]
+            try:
+                _, pfad, meldung = future.result()
+            except Exception as e:
+                pfad, meldung = None, str(e)
+
+            if pfad:
+                erzeugt[klasse] = pfad
+                print(f"✅ {klasse}: {pfad} ({meldung})")
+            else:
+                fehler += 1
+                print(f"❌ {klasse}: {meldung}")
+
+    dauer = time.perf_counter() - start
+    print(f"Fertig: {len(klassen) - fehler}/{len(klassen)} Klassensätze in {dauer:.1f} s")
+
+    if args.gesamt and erzeugt:
+        # Reihenfolge wie auf der Kommandozeile, nicht wie fertig geworden
+        pfade = [erzeugt[k] for k in klassen if k in erzeugt]
+        try:
+            seiten, gespart = fuege_zusammen(pfade, args.gesamt)
+            print(f"✅ Druckdatei: {args.gesamt} ({seiten} Seiten, {gespart} doppelte Objekte eingespart)")
+        except Exception as e:
+            fehler += 1
+            print(f"❌ Druckdatei {args.gesamt}: {e}")
+
+    return 1 if fehler else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
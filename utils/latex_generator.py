@@ -14,31 +14,73 @@ Version 2.5.0: ERWEITERT mit Klassensatz-Generierung
 Basierend auf klassensatz_generator_v1_8.py
 """
 
-import requests
 import json
 from pathlib import Path
-import sqlite3
 from typing import Optional, Dict, List, Tuple, Callable
 import hashlib
 import io
 import base64
 import re
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PyPDF2 import PdfReader, PdfWriter
 
-
-LATEX_API_URL = "https://latex.ytotech.com/builds/sync"
+from core.compile_backend import (
+    CompileBackend, CompileError, RemoteCompileBackend,
+    LATEX_API_URL, get_compile_backend, load_compile_config
+)
+from core.database import Database
+from core.db_pool import get_connection_pool
+from core.imposition import (
+    LAYOUT_BROSCHUERE, LAYOUT_DUPLEX, bereiche_aus_marken,
+    gleiche_bereiche, impositioniere, impositioniere_datei, seitenfolge
+)
+from core.pdf_merge import fuege_zusammen
+from core.pdf_split import packe_zip, sicherer_dateiname, teile_auf
+from core.pdf_stamper import PDFStamper, Stempel, CM
+from core.pdf_stream import atomar_schreiben, mmap_reader, schreibe_pdf
+from core.preview_cache import PreviewCache, get_preview_cache
+from utils.pdf_raster import rasterize_first_page
+from utils.latex_helper import generate_qr_code_data
 
 
 class LaTeXGenerator:
     """
-    Service-Klasse für LaTeX-PDF-Generierung via latex.ytotech.com
+    Service-Klasse für LaTeX-PDF-Generierung (API oder lokales pdflatex)
     MIT Klassensatz-Support!
     """
     
-    def __init__(self, api_url: str = LATEX_API_URL, db_path: str = None):
+    # Modi für generate_klassensatz
+    MODUS_EINZELDOKUMENT = "einzeldokument"  # Ein .tex für alle Schüler
+    MODUS_PARALLEL = "parallel"              # Ein .tex pro Schüler, parallel kompiliert
+    MODUS_STEMPEL = "stempel"                # Vorlage einmal kompilieren, Schüler aufstempeln
+    
+    def __init__(
+        self,
+        api_url: str = LATEX_API_URL,
+        db_path: str = None,
+        backend: Optional[CompileBackend] = None
+    ):
         self.api_url = api_url
+        # Eigene API-URL → explizites Remote-Backend, sonst Konfiguration
+        if backend is None and api_url != LATEX_API_URL:
+            backend = RemoteCompileBackend(api_url=api_url)
+        self.backend = backend or get_compile_backend()
         self.header = self.get_default_header()
+        
+        config = load_compile_config()
+        self.klassensatz_modus = config.get('klassensatz_modus', self.MODUS_EINZELDOKUMENT)
+        self.max_workers = int(config.get('max_workers', 0) or 0)
+        
+        # Schüler, deren Einzel-PDF im Parallel-Modus fehlgeschlagen ist
+        self.fehlgeschlagene_schueler: List[str] = []
+        # Seitenbereich jedes Schülers in der zuletzt kompilierten PDF
+        self.schueler_bereiche: List[range] = []
+        # Einzel-PDFs pro Schüler (nur mit einzel_ordner)
+        self.einzel_dateien: List[Path] = []
         self.db_path = Path(db_path) if db_path else (Path(__file__).parent.parent / 'database' / 'sus.db')
+        self._db: Optional[Database] = None
     
     # ========================================================================
     # KLASSENSATZ-GENERIERUNG (NEU!)
@@ -50,22 +92,83 @@ class LaTeXGenerator:
         aufgaben: List[Dict],
         schueler_list: List[Dict],
         mit_musterklausuren: bool = True,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        modus: Optional[str] = None,
+        max_workers: Optional[int] = None
     ) -> Optional[bytes]:
         """
-        Generiert Klassensatz-PDF (EINE Datei für alle Schüler)
+        Generiert Klassensatz-PDF (EINE Datei für alle Schüler) als bytes
+        
+        Für große Klassensätze besser generate_klassensatz_datei - dort
+        liegt die PDF nie komplett im Speicher.
+        
+        Args: wie generate_klassensatz_datei (ohne ziel_pfad)
+        
+        Returns:
+            PDF als bytes oder None bei Fehler
+        """
+        with tempfile.TemporaryDirectory(prefix="klassensatz_") as tmp:
+            ziel = Path(tmp) / "klassensatz.pdf"
+            
+            if not self.generate_klassensatz_datei(
+                klausur=klausur,
+                aufgaben=aufgaben,
+                schueler_list=schueler_list,
+                ziel_pfad=ziel,
+                mit_musterklausuren=mit_musterklausuren,
+                progress_callback=progress_callback,
+                modus=modus,
+                max_workers=max_workers
+            ):
+                return None
+            
+            return ziel.read_bytes()
+    
+    def generate_klassensatz_datei(
+        self,
+        klausur,
+        aufgaben: List[Dict],
+        schueler_list: List[Dict],
+        ziel_pfad,
+        mit_musterklausuren: bool = True,
+        progress_callback: Optional[Callable] = None,
+        modus: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        einzel_ordner=None,
+        einzel_zip=None
+    ) -> bool:
+        """
+        Generiert Klassensatz-PDF direkt in eine Datei
+        
+        Kompilieren → Umsortieren → Zieldatei läuft über Temp-Dateien im
+        Zielordner: Zwischenstände werden per mmap gelesen und direkt in
+        die nächste Datei geschrieben, die Zieldatei entsteht atomar.
         
         Args:
             klausur: Klausur-Objekt mit Metadaten
             aufgaben: Liste der Aufgaben-Dicts
             schueler_list: Liste der Schüler-Dicts
+            ziel_pfad: Ausgabe-PDF (wird nur bei Erfolg angelegt/ersetzt)
             mit_musterklausuren: Musterklausuren vor dem Klassensatz?
             progress_callback: Callback(value, message) für Progress
+            modus: MODUS_EINZELDOKUMENT, MODUS_PARALLEL oder MODUS_STEMPEL
+                   (Standard: "klassensatz_modus" aus config.json)
+            max_workers: Optional - Anzahl paralleler Kompilierungen
+            einzel_ordner: Optional - zusätzlich eine PDF pro Schüler in diesen
+                           Ordner (aus derselben Kompilierung, unsortiert)
+            einzel_zip: Optional - die Einzel-PDFs zusätzlich als ZIP
         
         Returns:
-            PDF als bytes oder None bei Fehler
+            True bei Erfolg
         """
         
+        modus = modus or self.klassensatz_modus
+        self.fehlgeschlagene_schueler = []
+        self.schueler_bereiche = []
+        self.einzel_dateien = []
+        ziel_pfad = Path(ziel_pfad)
+        ziel_pfad.parent.mkdir(parents=True, exist_ok=True)
+        
         try:
             if progress_callback:
                 progress_callback(10, "Lade Logo und Grafiken...")
@@ -77,51 +180,102 @@ class LaTeXGenerator:
             aufgaben_ids = [a['id'] for a in aufgaben]
             grafiken = self._hole_aufgaben_grafiken(aufgaben_ids)
             
-            if progress_callback:
-                progress_callback(30, "Generiere LaTeX-Code...")
-            
-            # LaTeX Code generieren
-            latex_code = self._baue_klassensatz_latex(
-                klausur=klausur,
-                aufgaben=aufgaben,
-                schueler_list=schueler_list,
-                mit_musterklausuren=mit_musterklausuren
-            )
-            
-            if progress_callback:
-                progress_callback(50, "Kompiliere PDF mit API (kann 10-30 Sek dauern)...")
-            
-            # PDF kompilieren
-            pdf_bytes = self._kompiliere_mit_api(
-                latex_code=latex_code,
-                logo_blob=logo_blob,
-                grafiken=grafiken
-            )
-            
-            if not pdf_bytes:
-                return None
-            
-            # Page Reordering (wenn nötig)
-            page_breaks = len(klausur.page_breaks) if hasattr(klausur, 'page_breaks') else 0
-            
-            if page_breaks >= 2:
-                if progress_callback:
-                    progress_callback(70, "Sortiere Seiten um (4-1-2-3)...")
+            # Zwischendateien im Zielordner (os.replace ohne Kopie)
+            with tempfile.TemporaryDirectory(prefix=".klassensatz_", dir=ziel_pfad.parent) as tmp:
+                roh_pfad = Path(tmp) / "roh.pdf"
+                
+                if modus == self.MODUS_PARALLEL:
+                    ok = self._kompiliere_klassensatz_parallel(
+                        klausur=klausur,
+                        aufgaben=aufgaben,
+                        schueler_list=schueler_list,
+                        logo_blob=logo_blob,
+                        grafiken=grafiken,
+                        ziel_pfad=roh_pfad,
+                        max_workers=max_workers,
+                        progress_callback=progress_callback
+                    )
+                elif modus == self.MODUS_STEMPEL:
+                    ok = self._kompiliere_klassensatz_stempel(
+                        klausur=klausur,
+                        aufgaben=aufgaben,
+                        schueler_list=schueler_list,
+                        logo_blob=logo_blob,
+                        grafiken=grafiken,
+                        ziel_pfad=roh_pfad,
+                        progress_callback=progress_callback
+                    )
+                else:
+                    if progress_callback:
+                        progress_callback(30, "Generiere LaTeX-Code...")
+                    
+                    # LaTeX Code generieren
+                    latex_code = self._baue_klassensatz_latex(
+                        klausur=klausur,
+                        aufgaben=aufgaben,
+                        schueler_list=schueler_list,
+                        mit_musterklausuren=mit_musterklausuren
+                    )
+                    
+                    if progress_callback:
+                        progress_callback(50, f"Kompiliere PDF ({self.backend.name})...")
+                    
+                    # PDF kompilieren und sofort auf die Platte
+                    pdf_bytes = self._kompiliere_mit_api(
+                        latex_code=latex_code,
+                        logo_blob=logo_blob,
+                        grafiken=grafiken
+                    )
+                    
+                    ok = bool(pdf_bytes)
+                    if ok:
+                        schreibe_pdf(pdf_bytes, roh_pfad)
+                    del pdf_bytes
+                    
+                    if ok:
+                        with mmap_reader(roh_pfad) as reader:
+                            self.schueler_bereiche = self._lese_schueler_bereiche(
+                                reader, len(schueler_list),
+                                getattr(klausur, 'page_breaks', [])
+                            )
+                
+                if not ok:
+                    return False
+                
+                # Einzel-PDFs aus der unsortierten Gesamt-PDF schneiden
+                if einzel_ordner or einzel_zip:
+                    if progress_callback:
+                        progress_callback(65, "Schreibe Einzel-PDFs pro Schüler...")
+                    
+                    ordner = Path(einzel_ordner) if einzel_ordner else Path(tmp) / "einzeln"
+                    dateien = self._schreibe_einzel_pdfs(
+                        klausur, schueler_list, roh_pfad, ordner, einzel_zip
+                    )
+                    if einzel_ordner:
+                        self.einzel_dateien = dateien
+                
+                # Page Reordering nach den tatsächlichen Seiten pro Schüler
+                layout = self._druck_layout(self.schueler_bereiche)
                 
-                pdf_bytes = self._sortiere_pdf_seiten(pdf_bytes, pages_per_student=4)
-                if not pdf_bytes:
-                    return None
+                if layout:
+                    if progress_callback:
+                        progress_callback(70, f"Sortiere Seiten um ({layout})...")
+                    
+                    if not self._sortiere_pdf_datei(roh_pfad, ziel_pfad, self.schueler_bereiche, layout):
+                        return False
+                else:
+                    os.replace(roh_pfad, ziel_pfad)
             
             if progress_callback:
                 progress_callback(100, "Fertig!")
             
-            return pdf_bytes
+            return True
             
         except Exception as e:
             print(f"Fehler in generate_klassensatz: {e}")
             import traceback
             traceback.print_exc()
-            return None
+            return False
     
     def _baue_klassensatz_latex(
         self,
@@ -133,7 +287,167 @@ class LaTeXGenerator:
         """Baut kompletten LaTeX-Code für Klassensatz"""
         
         # Header
-        latex = r"""\documentclass[a4paper,12pt]{exam}
+        latex = self._klassensatz_praeambel()
+        
+        # TODO: Musterklausuren (falls aktiviert)
+        if mit_musterklausuren:
+            latex += "% TODO: Musterklausuren (ohne QR, ohne/mit Lösung)\n\n"
+        
+        # Seitenumbrüche aus Klausur
+        page_breaks = klausur.page_breaks if hasattr(klausur, 'page_breaks') else []
+        
+        # KaSuSIds für die ganze Klasse in einem Schritt reservieren
+        kasusids = self._reserviere_kasusids(len(schueler_list))
+        
+        # Für jeden Schüler
+        for idx, schueler in enumerate(schueler_list, start=1):
+            kasusid = kasusids[idx - 1]
+            
+            latex += self._baue_schueler_latex(
+                klausur, aufgaben, schueler, idx, kasusid, page_breaks
+            )
+            
+            # Nächster Schüler
+            if idx < len(schueler_list):
+                latex += r"\newpage" + "\n\n"
+        
+        latex += r"\end{document}" + "\n"
+        return latex
+    
+    def _kompiliere_klassensatz_parallel(
+        self,
+        klausur,
+        aufgaben: List[Dict],
+        schueler_list: List[Dict],
+        logo_blob: Optional[bytes],
+        grafiken: Optional[Dict[str, bytes]],
+        ziel_pfad: Path,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable] = None
+    ) -> bool:
+        """
+        Kompiliert jeden Schüler als eigenes Dokument (gemeinsame Präambel)
+        auf einem begrenzten Worker-Pool und fügt die PDFs in Reihenfolge zusammen.
+        
+        Fertige Einzel-PDFs landen sofort als Datei neben ziel_pfad und
+        werden beim Zusammenfügen per mmap gelesen.
+        
+        Ein fehlerhafter Schüler bricht nicht mehr den ganzen Klassensatz ab;
+        betroffene Schüler stehen danach in self.fehlgeschlagene_schueler.
+        """
+        
+        if not schueler_list:
+            return False
+        
+        if progress_callback:
+            progress_callback(30, "Generiere LaTeX-Code pro Schüler...")
+        
+        praeambel = self._klassensatz_praeambel()
+        page_breaks = klausur.page_breaks if hasattr(klausur, 'page_breaks') else []
+        
+        # KaSuSIds in Schüler-Reihenfolge vergeben (vor dem Parallel-Teil)
+        kasusids = self._reserviere_kasusids(len(schueler_list))
+        dokumente = []
+        for idx, schueler in enumerate(schueler_list, start=1):
+            kasusid = kasusids[idx - 1]
+            body = self._baue_schueler_latex(
+                klausur, aufgaben, schueler, idx, kasusid, page_breaks
+            )
+            dokumente.append(praeambel + body + r"\end{document}" + "\n")
+        
+        workers = max_workers or self.max_workers or self._standard_worker_anzahl()
+        workers = max(1, min(workers, len(dokumente)))
+        
+        if progress_callback:
+            progress_callback(
+                50,
+                f"Kompiliere {len(dokumente)} Schüler-PDFs ({self.backend.name}, {workers} parallel)..."
+            )
+        
+        # Threads genügen: die eigentliche Arbeit läuft im pdflatex-Prozess
+        # bzw. wartet auf HTTP - beides blockiert den GIL nicht.
+        einzel_pfade: List[Optional[Path]] = [None] * len(dokumente)
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._kompiliere_mit_api, code, logo_blob, grafiken): i
+                for i, code in enumerate(dokumente)
+            }
+            
+            for fertig, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                schueler = schueler_list[i]
+                name = f"{schueler['rufname']} {schueler['nachname']}"
+                
+                try:
+                    pdf = future.result()
+                    if pdf:
+                        einzel_pfade[i] = ziel_pfad.parent / f"schueler_{i:04d}.pdf"
+                        schreibe_pdf(pdf, einzel_pfade[i])
+                except Exception as e:
+                    print(f"Fehler bei Schüler {name}: {e}")
+                
+                if einzel_pfade[i]:
+                    status = "✅"
+                else:
+                    status = "❌ fehlgeschlagen"
+                
+                if progress_callback:
+                    progress_callback(
+                        50 + int(20 * fertig / len(dokumente)),
+                        f"Schüler {fertig}/{len(dokumente)}: {name} {status}"
+                    )
+        
+        for i, pfad in enumerate(einzel_pfade):
+            if not pfad:
+                schueler = schueler_list[i]
+                self.fehlgeschlagene_schueler.append(
+                    f"{schueler['rufname']} {schueler['nachname']}"
+                )
+        
+        if self.fehlgeschlagene_schueler:
+            print(f"⚠️ Fehlgeschlagen: {', '.join(self.fehlgeschlagene_schueler)}")
+        
+        vorhanden = [pfad for pfad in einzel_pfade if pfad]
+        if not vorhanden:
+            return False
+        
+        # Zusammenfügen in Original-Reihenfolge - Fonts und Schul-Logo der
+        # Einzel-PDFs nur einmal in der Druckdatei (core.pdf_merge)
+        bereiche: List[range] = []
+        
+        def anordnen(reader: PdfReader, writer: PdfWriter):
+            start = len(writer.pages)
+            for page in reader.pages:
+                writer.add_page(page)
+            bereiche.append(range(start, len(writer.pages)))
+        
+        fuege_zusammen(vorhanden, ziel_pfad, anordnen=anordnen)
+        
+        # Leerer Bereich für fehlgeschlagene Schüler: Zuordnung Bereich ↔ Schüler bleibt erhalten
+        naechster = iter(bereiche)
+        ende = 0
+        for pfad in einzel_pfade:
+            bereich = next(naechster) if pfad else range(ende, ende)
+            self.schueler_bereiche.append(bereich)
+            ende = bereich.stop
+        
+        return True
+    
+    def _standard_worker_anzahl(self) -> int:
+        """Standard-Parallelität: lokal = CPU-Kerne, remote = 4 Requests"""
+        if self.backend.name == "local":
+            return os.cpu_count() or 2
+        return 4
+    
+    def _klassensatz_praeambel(self, zusatz: str = "") -> str:
+        """
+        Gemeinsame Präambel aller Klassensatz-Dokumente (bis \\begin{document})
+        
+        Args:
+            zusatz: Optional - weitere Makros vor \\begin{document}
+        """
+        return r"""\documentclass[a4paper,12pt]{exam}
 % Pakete
 \usepackage[utf8]{inputenc}
 \usepackage[T1]{fontenc}
@@ -170,6 +484,11 @@ class LaTeXGenerator:
   \end{adjustwidth}
 }
 
+% Schüler-Marke: benanntes PDF-Ziel auf der ersten Seite jedes Schülers
+% (nur pdfTeX, sonst wirkungslos) - daraus liest der Generator die Seitenbereiche
+\newcommand{\schuelermarke}[1]{}
+\ifdefined\pdfdest\renewcommand{\schuelermarke}[1]{\pdfdest name{schueler#1} xyz\relax}\fi
+
 \renewcommand{\questionlabel}{{\large\textcircled{\normalsize \texttt{\thequestion}}}}
 \renewcommand{\solutiontitle}{Lösung: }
 
@@ -195,122 +514,266 @@ class LaTeXGenerator:
   \end{tikzpicture}
 }
 
-\begin{document}
+""" + zusatz + r"""\begin{document}
 
 """
+    
+    def _baue_schueler_latex(
+        self,
+        klausur,
+        aufgaben: List[Dict],
+        schueler: Dict,
+        idx: int,
+        kasusid: int,
+        page_breaks: List[int]
+    ) -> str:
+        """Baut den LaTeX-Body für EINEN Schüler (ohne Präambel)"""
         
-        # TODO: Musterklausuren (falls aktiviert)
-        if mit_musterklausuren:
-            latex += "% TODO: Musterklausuren (ohne QR, ohne/mit Lösung)\n\n"
+        schueler_name = f"{schueler['rufname']} {schueler['nachname']}"
+        
+        # Running Header (Seiten 2+)
+        running_header = f"{klausur.nummer if hasattr(klausur, 'nummer') else '1'}. {klausur.typ} in der {klausur.klasse} von {schueler_name} ({idx})"
+        
+        latex = f"% Schüler {idx}: {schueler_name}\n"
+        latex += f"\\schuelermarke{{{idx}}}\n"
+        latex += f"\\fancyhead[L]{{{self._tex_escape(running_header)}}}\n"
+        latex += r"\renewcommand{\headrulewidth}{0.4pt}" + "\n"
+        
+        # Seite 1: Ohne fancyhdr
+        latex += r"\thispagestyle{empty}" + "\n"
+        
+        # Header (voller Header auf Seite 1)
+        latex += (
+            f"\\customheader"
+            f"{{{self._tex_escape(klausur.fach)}}}"
+            f"{{{self._tex_escape(schueler_name)}}}"
+            f"{{{self._qr_daten(kasusid, schueler, idx)}}}"
+            f"{{{getattr(klausur, 'nummer', 1)}}}"
+            f"{{{self._tex_escape(klausur.klasse)}}}"
+            f"{{{self._tex_escape(klausur.datum)}}}"
+            f"{{{self._tex_escape(klausur.thema)}}}"
+            f"{{{idx}}}\n\n"
+        )
+        
+        # Aufgaben
+        latex += self._baue_aufgaben_latex(aufgaben, page_breaks)
+        
+        # Falls 2 Umbrüche → Leere Seite 4
+        if len(page_breaks) == 2:
+            latex += r"\newpage" + "\n"
+            latex += r"\vspace*{\fill}" + "\n"
+            latex += r"\begin{center}" + "\n"
+            latex += r"\Large" + "\n"
+            latex += f"Viel Erfolg, {self._tex_escape(schueler['rufname'])}!\n"
+            latex += r"\end{center}" + "\n"
+            latex += r"\vspace*{\fill}" + "\n"
+        else:
+            # Abschluss (bei 0-1 oder 3+ Umbrüchen)
+            latex += r"\vfill" + "\n"
+            latex += r"\begin{flushright}" + "\n"
+            latex += f"Viel Erfolg, {self._tex_escape(schueler['rufname'])}!\n"
+            latex += r"\end{flushright}" + "\n"
+        
+        return latex
+    
+    def _baue_aufgaben_latex(self, aufgaben: List[Dict], page_breaks: List[int]) -> str:
+        """questions-Umgebung mit allen Aufgaben und Seitenumbrüchen"""
+        
+        latex = r"\begin{questions}" + "\n\n"
+        
+        for aufgaben_idx, aufgabe in enumerate(aufgaben):
+            latex_code = aufgabe.get('latex_code', '') or ''
+            latex += latex_code + "\n"
+            
+            # Seitenumbruch nach dieser Aufgabe?
+            if aufgaben_idx in page_breaks:
+                latex += r"\newpage" + "\n\n"
+        
+        latex += r"\end{questions}" + "\n\n"
+        
+        return latex
+    
+    # ========================================================================
+    # STEMPEL-MODUS: Vorlage einmal kompilieren, Schüler-Daten aufstempeln
+    # ========================================================================
+    
+    # Marken-Makros: benannte PDF-Ziele (pdfTeX) in leeren Feldern fester
+    # Größe - dort setzt PDFStamper später Name, QR-Code und Kopfzeile ein
+    STEMPEL_MAKROS = r"""% Stempel-Felder (Vorlage für PDFStamper)
+\newcommand{\stempelfeld}[2]{\leavevmode\pdfdest name{#1} xyz\hspace*{#2}}
+\newcommand{\stempelbox}[3]{\leavevmode\pdfdest name{#1} xyz\rule{0pt}{#3}\hspace*{#2}}
+
+% Header-Makro der Vorlage (ohne Name/QR/Index)
+\newcommand{\customheadervorlage}[5]{%
+  \parindent 0pt
+  \begin{tikzpicture}
+    \draw[rounded corners=15pt, line width=0.75pt, color=blue] (0,0) rectangle (\textwidth,-2cm);
+    \node[anchor=north west] at (0,-0.2) {\includegraphics[height=1.5cm]{logo.png}};
+    \node[anchor=north east] at (\textwidth,-0.2) {\stempelbox{qr}{1.5cm}{1.5cm}};
+    \draw[color=blue, line width=0.75pt] (\textwidth-2.5cm,-1cm) circle (0.7cm);
+    \node[anchor=north, text width=\textwidth-6cm, align=center] at (\textwidth/2, -0.6cm) {%
+      \textbf{#2. #1arbeit in der #3 am #4}\\
+      \textbf{#5 von \stempelfeld{name}{5cm}}
+    };
+  \end{tikzpicture}
+}
+
+"""
+    
+    def _baue_vorlagen_latex(self, klausur, aufgaben: List[Dict], page_breaks: List[int]) -> str:
+        """
+        Komplettes Vorlagen-Dokument: wie _baue_schueler_latex, aber mit
+        leeren Stempel-Feldern statt Schüler-Daten
+        """
+        
+        latex = self._klassensatz_praeambel(zusatz=self.STEMPEL_MAKROS)
+        
+        latex += "% Vorlage (Stempel-Modus)\n"
+        latex += r"\fancyhead[L]{\stempelfeld{kopf-\thepage}{0.9\textwidth}}" + "\n"
+        latex += r"\renewcommand{\headrulewidth}{0.4pt}" + "\n"
+        latex += r"\thispagestyle{empty}" + "\n"
+        
+        latex += (
+            f"\\customheadervorlage"
+            f"{{{self._tex_escape(klausur.fach)}}}"
+            f"{{{getattr(klausur, 'nummer', 1)}}}"
+            f"{{{self._tex_escape(klausur.klasse)}}}"
+            f"{{{self._tex_escape(klausur.datum)}}}"
+            f"{{{self._tex_escape(klausur.thema)}}}\n\n"
+        )
+        
+        latex += self._baue_aufgaben_latex(aufgaben, page_breaks)
+        
+        if len(page_breaks) == 2:
+            latex += r"\newpage" + "\n"
+            latex += r"\vspace*{\fill}" + "\n"
+            latex += r"\begin{center}" + "\n"
+            latex += r"\Large" + "\n"
+            latex += r"\stempelfeld{erfolg}{10cm}" + "\n"
+            latex += r"\end{center}" + "\n"
+            latex += r"\vspace*{\fill}" + "\n"
+        else:
+            latex += r"\vfill" + "\n"
+            latex += r"\begin{flushright}" + "\n"
+            latex += r"\stempelfeld{erfolg}{8cm}" + "\n"
+            latex += r"\end{flushright}" + "\n"
+        
+        latex += r"\end{document}" + "\n"
+        
+        return latex
+    
+    def _kompiliere_klassensatz_stempel(
+        self,
+        klausur,
+        aufgaben: List[Dict],
+        schueler_list: List[Dict],
+        logo_blob: Optional[bytes],
+        grafiken: Optional[Dict[str, bytes]],
+        ziel_pfad: Path,
+        progress_callback: Optional[Callable] = None
+    ) -> bool:
+        """
+        Kompiliert den Aufgaben-Teil EINMAL als Vorlage und erzeugt die
+        Schüler-Exemplare per PDF-Overlay (Name, QR-Code, Kopfzeile).
+        
+        Die Vorlage enthält keine Schüler-Daten und ist damit auch über
+        mehrere Klassensätze hinweg cachebar (CompileCache).
+        """
+        
+        if not schueler_list:
+            return False
+        
+        if progress_callback:
+            progress_callback(30, "Generiere LaTeX-Vorlage...")
         
-        # Seitenumbrüche aus Klausur
         page_breaks = klausur.page_breaks if hasattr(klausur, 'page_breaks') else []
+        vorlage_latex = self._baue_vorlagen_latex(klausur, aufgaben, page_breaks)
+        
+        if progress_callback:
+            progress_callback(50, f"Kompiliere Vorlage ({self.backend.name})...")
+        
+        vorlage_pdf = self._kompiliere_mit_api(vorlage_latex, logo_blob, grafiken)
+        if not vorlage_pdf:
+            return False
+        
+        stamper = PDFStamper(vorlage_pdf)
+        
+        fehlend = stamper.fehlende_felder(["qr", "name", "erfolg"])
+        if fehlend:
+            # z.B. Engine ohne \pdfdest (nur pdflatex unterstützt die Marken)
+            print(f"❌ Stempel-Felder fehlen in der Vorlage: {', '.join(fehlend)}")
+            return False
+        
+        nummer = klausur.nummer if hasattr(klausur, 'nummer') else '1'
+        kasusids = self._reserviere_kasusids(len(schueler_list))
         
-        # Für jeden Schüler
         for idx, schueler in enumerate(schueler_list, start=1):
-            kasusid = self._hole_naechste_kasusid()
-            
+            kasusid = kasusids[idx - 1]
             schueler_name = f"{schueler['rufname']} {schueler['nachname']}"
+            running_header = f"{nummer}. {klausur.typ} in der {klausur.klasse} von {schueler_name} ({idx})"
             
-            # Running Header (Seiten 2+)
-            running_header = f"{klausur.nummer if hasattr(klausur, 'nummer') else '1'}. {klausur.typ} in der {klausur.klasse} von {schueler_name} ({idx})"
-            
-            latex += f"% Schüler {idx}: {schueler_name}\n"
-            latex += f"\\fancyhead[L]{{{self._tex_escape(running_header)}}}\n"
-            latex += r"\renewcommand{\headrulewidth}{0.4pt}" + "\n"
-            
-            # Seite 1: Ohne fancyhdr
-            latex += r"\thispagestyle{empty}" + "\n"
-            
-            # Header (voller Header auf Seite 1)
-            latex += (
-                f"\\customheader"
-                f"{{{self._tex_escape(klausur.fach)}}}"
-                f"{{{self._tex_escape(schueler_name)}}}"
-                f"{{{kasusid}}}"
-                f"{{{getattr(klausur, 'nummer', 1)}}}"
-                f"{{{self._tex_escape(klausur.klasse)}}}"
-                f"{{{self._tex_escape(klausur.datum)}}}"
-                f"{{{self._tex_escape(klausur.thema)}}}"
-                f"{{{idx}}}\n\n"
-            )
-            
-            # Aufgaben
-            latex += r"\begin{questions}" + "\n\n"
+            stempel = [
+                Stempel("qr", qr_daten=self._qr_daten(kasusid, schueler, idx),
+                        breite=1.5 * CM, hoehe=1.5 * CM),
+                Stempel("name", f"{schueler_name} ({idx})", fett=True),
+            ]
             
-            for aufgaben_idx, aufgabe in enumerate(aufgaben):
-                latex_code = aufgabe.get('latex_code', '') or ''
-                latex += latex_code + "\n"
-                
-                # Seitenumbruch nach dieser Aufgabe?
-                if aufgaben_idx in page_breaks:
-                    latex += r"\newpage" + "\n\n"
-            
-            latex += r"\end{questions}" + "\n\n"
-            
-            # Falls 2 Umbrüche → Leere Seite 4
             if len(page_breaks) == 2:
-                latex += r"\newpage" + "\n"
-                latex += r"\vspace*{\fill}" + "\n"
-                latex += r"\begin{center}" + "\n"
-                latex += r"\Large" + "\n"
-                latex += f"Viel Erfolg, {self._tex_escape(schueler['rufname'])}!\n"
-                latex += r"\end{center}" + "\n"
-                latex += r"\vspace*{\fill}" + "\n"
+                stempel.append(Stempel(
+                    "erfolg", f"Viel Erfolg, {schueler['rufname']}!",
+                    groesse=17.28, ausrichtung="mitte", breite=10 * CM
+                ))
             else:
-                # Abschluss (bei 0-1 oder 3+ Umbrüchen)
-                latex += r"\vfill" + "\n"
-                latex += r"\begin{flushright}" + "\n"
-                latex += f"Viel Erfolg, {self._tex_escape(schueler['rufname'])}!\n"
-                latex += r"\end{flushright}" + "\n"
+                stempel.append(Stempel(
+                    "erfolg", f"Viel Erfolg, {schueler['rufname']}!",
+                    ausrichtung="rechts", breite=8 * CM
+                ))
             
-            # Nächster Schüler
-            if idx < len(schueler_list):
-                latex += r"\newpage" + "\n\n"
+            # Kopfzeile auf allen Folgeseiten (Marken kopf-2, kopf-3, ...)
+            for seite in range(2, stamper.seitenanzahl + 1):
+                stempel.append(Stempel(f"kopf-{seite}", running_header))
+            
+            stamper.add_exemplar(stempel)
+            
+            if progress_callback:
+                progress_callback(
+                    50 + int(20 * idx / len(schueler_list)),
+                    f"Schüler {idx}/{len(schueler_list)}: {schueler_name} ✅"
+                )
         
-        latex += r"\end{document}" + "\n"
-        return latex
-    
-    def _hole_naechste_kasusid(self) -> int:
-        """Holt nächste KaSuSId aus DB und inkrementiert Counter"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Jedes Exemplar hat genau die Seiten der Vorlage
+        seiten = stamper.seitenanzahl
+        self.schueler_bereiche = gleiche_bereiche(seiten * len(schueler_list), seiten)
         
-        cursor.execute("SELECT letzter_wert FROM kasusid_counter WHERE id = 1")
-        row = cursor.fetchone()
+        with atomar_schreiben(ziel_pfad) as out:
+            stamper.write_to(out)
+        return True
+    
+    @staticmethod
+    def _qr_daten(kasusid: int, schueler: Dict, idx: int) -> str:
+        """
+        QR-Inhalt eines Schüler-Exemplars - in allen Klassensatz-Modi gleich
         
-        if row:
-            aktueller_wert = row[0]
-            naechster_wert = aktueller_wert + 1
-            
-            cursor.execute("""
-                UPDATE kasusid_counter
-                SET letzter_wert = ?, aktualisiert_am = CURRENT_TIMESTAMP
-                WHERE id = 1
-            """, (naechster_wert,))
-            
-            conn.commit()
-            conn.close()
-            return naechster_wert
-        else:
-            # Initialisiere
-            cursor.execute("""
-                INSERT INTO kasusid_counter (id, letzter_wert)
-                VALUES (1, 100001)
-            """)
-            conn.commit()
-            conn.close()
-            return 100001
+        Format wie generate_qr_code_data: "KASUSID-SCHUELERID" (ohne
+        Schüler-ID aus der DB: laufende Nummer in der Klasse)
+        """
+        return generate_qr_code_data(kasusid, schueler.get('id', idx))
+    
+    def _reserviere_kasusids(self, anzahl: int) -> range:
+        """Reserviert KaSuSIds für alle Schüler in einer DB-Transaktion"""
+        # Eine Database pro Generator (Pool-Verbindung des Threads)
+        if self._db is None:
+            self._db = Database(self.db_path)
+        return self._db.reserve_kasusid_range(anzahl)
     
     def _hole_schul_logo(self, schule_kuerzel: str) -> Optional[bytes]:
         """Holt Logo-BLOB aus DB"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection_pool(self.db_path).connection()
         cursor = conn.cursor()
         
         cursor.execute("SELECT logo FROM schulen WHERE kuerzel = ?", (schule_kuerzel,))
         row = cursor.fetchone()
         
-        conn.close()
         return row[0] if row and row[0] else None
     
     def _hole_aufgaben_grafiken(self, aufgaben_ids: List[int]) -> Dict[str, bytes]:
@@ -318,7 +781,7 @@ class LaTeXGenerator:
         if not aufgaben_ids:
             return {}
         
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection_pool(self.db_path).connection()
         cursor = conn.cursor()
         
         placeholders = ','.join('?' * len(aufgaben_ids))
@@ -333,7 +796,6 @@ class LaTeXGenerator:
             if latex_name and blob:
                 grafiken[latex_name] = blob
         
-        conn.close()
         return grafiken
     
     def _kompiliere_mit_api(
@@ -342,48 +804,111 @@ class LaTeXGenerator:
         logo_blob: Optional[bytes],
         grafiken: Optional[Dict[str, bytes]] = None
     ) -> Optional[bytes]:
-        """Kompiliert LaTeX zu PDF via API"""
+        """Kompiliert LaTeX zu PDF via Compile-Backend"""
         
         # Resources
-        resources = [{"main": True, "content": latex_code}]
+        resources = {}
         
         if logo_blob:
-            logo_b64 = base64.b64encode(logo_blob).decode("utf-8")
-            resources.append({"path": "logo.png", "file": logo_b64})
+            resources["logo.png"] = logo_blob
         
         if grafiken:
             for latex_name, blob in grafiken.items():
-                grafik_b64 = base64.b64encode(blob).decode("utf-8")
-                resources.append({"path": f"{latex_name}.png", "file": grafik_b64})
-        
-        payload = {
-            "compiler": "pdflatex",
-            "resources": resources
-        }
+                resources[f"{latex_name}.png"] = blob
         
         try:
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/pdf",
-                },
-                timeout=120,
-            )
-            
-            if response.status_code in (200, 201):
-                ct = response.headers.get("Content-Type", "")
-                if ("application/pdf" in ct) or response.content.startswith(b"%PDF"):
-                    return response.content
+            return self.backend.compile(latex_code, resources=resources, timeout=120)
             
-            print(f"API-Fehler: Status {response.status_code}")
+        except CompileError as e:
+            print(f"Kompilier-Fehler ({self.backend.name}): {e}")
             return None
-            
         except Exception as e:
-            print(f"Fehler beim API-Call: {e}")
+            print(f"Fehler beim Kompilieren: {e}")
             return None
     
+    def _lese_schueler_bereiche(
+        self,
+        reader: PdfReader,
+        anzahl: int,
+        page_breaks: List[int]
+    ) -> List[range]:
+        """
+        Seitenbereiche der Schüler aus den \\schuelermarke-Zielen
+        
+        Ohne Marken (Engine ohne \\pdfdest) nur dann feste Bereiche, wenn die
+        Seitenzahl genau der aus den Seitenumbrüchen erwarteten entspricht -
+        sonst leer (= nicht umsortieren, kein verschobenes Heft).
+        """
+        bereiche = bereiche_aus_marken(reader, "schueler")
+        if len(bereiche) == anzahl:
+            return bereiche
+        
+        total_pages = len(reader.pages)
+        seiten = self._erwartete_seiten(page_breaks)
+        if anzahl and total_pages == seiten * anzahl:
+            print(f"⚠️ Keine Schüler-Marken in der PDF - {seiten} Seiten pro Schüler laut Seitenumbrüchen")
+            return gleiche_bereiche(total_pages, seiten)
+        
+        print(f"⚠️ Seitenbereiche unbekannt ({total_pages} Seiten, {anzahl} Schüler) - keine Umsortierung")
+        return []
+    
+    @staticmethod
+    def _erwartete_seiten(page_breaks: List[int]) -> int:
+        """Seiten pro Schüler laut Seitenumbrüchen (bei 2 Umbrüchen + "Viel Erfolg"-Seite)"""
+        return len(page_breaks) + 1 + (1 if len(page_breaks) == 2 else 0)
+    
+    @staticmethod
+    def _druck_layout(bereiche: List[range]) -> Optional[str]:
+        """
+        Druck-Layout aus den tatsächlichen Seitenzahlen pro Schüler
+        
+        - mehr als 2 Seiten: Broschüre (4 Seiten = 4-1-2-3, sonst aufgefüllt)
+        - bis 2 Seiten, aber unterschiedlich viele: Duplex mit Leerseiten,
+          damit jeder Schüler auf einem neuen Blatt beginnt
+        - sonst: Reihenfolge bleibt (None)
+        """
+        laengen = {len(bereich) for bereich in bereiche if bereich}
+        if not laengen:
+            return None
+        
+        if max(laengen) > 2:
+            return LAYOUT_BROSCHUERE
+        if len(laengen) > 1:
+            return LAYOUT_DUPLEX
+        return None
+    
+    def _schreibe_einzel_pdfs(
+        self,
+        klausur,
+        schueler_list: List[Dict],
+        roh_pfad: Path,
+        ordner: Path,
+        zip_pfad=None
+    ) -> List[Path]:
+        """Eine PDF pro Schüler per Seitenbereich (optional zusätzlich als ZIP)"""
+        
+        if len(self.schueler_bereiche) != len(schueler_list):
+            print("⚠️ Seitenbereiche der Schüler unbekannt - keine Einzel-PDFs")
+            return []
+        
+        ziele = [
+            ordner / self._einzel_dateiname(klausur, schueler, idx)
+            for idx, schueler in enumerate(schueler_list, start=1)
+        ]
+        dateien = teile_auf(roh_pfad, self.schueler_bereiche, ziele)
+        
+        if zip_pfad and dateien:
+            packe_zip(dateien, zip_pfad)
+        
+        return dateien
+    
+    @staticmethod
+    def _einzel_dateiname(klausur, schueler: Dict, idx: int) -> str:
+        """z.B. Ma-2_8a_20250324_03_Muster_Max.pdf (Index hält Namensgleiche auseinander)"""
+        return sicherer_dateiname(
+            f"{klausur.dateiname_basis}_{idx:02d}_{schueler['nachname']}_{schueler['rufname']}"
+        ) + ".pdf"
+    
     def _sortiere_pdf_seiten(
         self,
         input_pdf_bytes: bytes,
@@ -392,29 +917,42 @@ class LaTeXGenerator:
         """Sortiert PDF-Seiten: 1-2-3-4 → 4-1-2-3 (für Duplex-Druck)"""
         
         try:
-            reader = PdfReader(io.BytesIO(input_pdf_bytes))
-            writer = PdfWriter()
-            total_pages = len(reader.pages)
-            
-            total_students = total_pages // pages_per_student
-            
-            # Für jeden Schüler: 4-1-2-3
-            for student in range(total_students):
-                base = student * pages_per_student
-                order = [base + 3, base + 0, base + 1, base + 2]
-                
-                for p in order:
-                    if p < total_pages:
-                        writer.add_page(reader.pages[p])
-            
             out = io.BytesIO()
-            writer.write(out)
+            self._sortiere_seiten(PdfReader(io.BytesIO(input_pdf_bytes)), out, pages_per_student)
             return out.getvalue()
             
         except Exception as e:
             print(f"Fehler beim Umsortieren: {e}")
             return None
     
+    def _sortiere_pdf_datei(
+        self,
+        quelle: Path,
+        ziel: Path,
+        bereiche: List[range],
+        layout: str = LAYOUT_BROSCHUERE
+    ) -> bool:
+        """Datei → Datei nach Seitenbereichen umsortieren (Quelle per mmap)"""
+        
+        try:
+            impositioniere_datei(quelle, ziel, bereiche, layout)
+            return True
+            
+        except Exception as e:
+            print(f"Fehler beim Umsortieren: {e}")
+            return False
+    
+    @staticmethod
+    def _sortiere_seiten(reader: PdfReader, out, pages_per_student: int):
+        """Broschüren-Reihenfolge pro Schüler (bei 4 Seiten: 4-1-2-3) in den Stream out schreiben"""
+        
+        total_pages = len(reader.pages)
+        if total_pages % pages_per_student != 0:
+            print(f"Warnung: Seitenzahl ({total_pages}) ist kein Vielfaches von {pages_per_student}")
+        
+        folge = seitenfolge(gleiche_bereiche(total_pages, pages_per_student), LAYOUT_BROSCHUERE)
+        impositioniere(reader.pages, folge).write(out)
+    
     @staticmethod
     def _tex_escape(s: str) -> str:
         """Escape LaTeX-Sonderzeichen"""
@@ -453,30 +991,100 @@ class LaTeXGenerator:
         Returns:
             PNG als bytes (gecroppt)
         """
-        # Lade Grafiken als API-Resources (Base64)
-        grafik_resources = []
+        latex_code = aufgabe.get('latex_code', '') or ''
+        
+        # Grafiken der Aufgabe (Dateiname -> Bytes), EINE DB-Abfrage
+        grafiken = {}
         if aufgabe_id and self.db_path:
-            grafik_resources = self.lade_grafiken_als_resources(aufgabe_id)
+            grafiken = self._hole_preview_grafiken(aufgabe_id)
+        
+        # Preview-Cache: Aufgabe + LaTeX + Grafiken + DPI + Lösung
+        cache = get_preview_cache() if aufgabe_id else None
+        cache_key = None
+        if cache is not None:
+            cache_key = PreviewCache.make_key(
+                latex_code, grafiken, dpi=dpi, mit_loesung=mit_loesung, header=self.header
+            )
+            cached = cache.get(aufgabe_id, cache_key)
+            if cached is not None:
+                return cached
         
         # Passe LaTeX-Code an (Namen → Dateinamen mit Extension)
         aufgabe = aufgabe.copy()
-        if aufgabe_id and self.db_path:
-            aufgabe['latex_code'] = self.ersetze_grafik_namen_api(
-                aufgabe['latex_code'], 
-                aufgabe_id
-            )
+        if grafiken:
+            aufgabe['latex_code'] = self._ersetze_grafik_namen(latex_code, grafiken)
         
         # Baue LaTeX
-        latex_code = self.build_aufgabe_latex(aufgabe, mit_loesung)
+        dokument = self.build_aufgabe_latex(aufgabe, mit_loesung)
         
-        # Sende an API mit Grafik-Resources
-        pdf_normal = self.send_to_api(latex_code, resources=grafik_resources)
+        # Kompilieren mit Grafik-Resources
+        try:
+            pdf_normal = self.backend.compile(dokument, resources=grafiken, timeout=30)
+        except CompileError as e:
+            raise Exception(f"LaTeX-Fehler: {e}\n{e.log}")
         
         # PDF → PNG + Trim
         png_data = self.pdf_to_png_trimmed(pdf_normal, dpi=dpi)
         
+        if cache is not None and png_data:
+            cache.put(aufgabe_id, cache_key, png_data)
+        
         return png_data
     
+    def is_preview_cached(self, aufgabe_id: int, latex_code: str,
+                          mit_loesung: bool = False, dpi: int = 150) -> bool:
+        """Liegt die Vorschau bereits im Preview-Cache?"""
+        cache = get_preview_cache()
+        if cache is None or not aufgabe_id:
+            return False
+        
+        grafiken = self._hole_preview_grafiken(aufgabe_id) if self.db_path else {}
+        key = PreviewCache.make_key(
+            latex_code or '', grafiken, dpi=dpi, mit_loesung=mit_loesung, header=self.header
+        )
+        return cache.contains(aufgabe_id, key)
+    
+    def _hole_preview_grafiken(self, aufgabe_id: int) -> Dict[str, bytes]:
+        """Grafiken einer Aufgabe als Dateiname (mit Endung) -> Bytes"""
+        try:
+            conn = get_connection_pool(self.db_path).connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT latex_name, grafik_blob, dateityp
+                FROM aufgaben_grafiken
+                WHERE aufgabe_id = ?
+            """, (aufgabe_id,))
+            
+            grafiken = {}
+            for latex_name, blob, typ in cursor.fetchall():
+                ext = typ.lower()
+                if ext == 'jpg':
+                    ext = 'jpeg'
+                grafiken[f"{latex_name}.{ext}"] = blob
+            
+            return grafiken
+            
+        except Exception:
+            return {}
+    
+    @staticmethod
+    def _ersetze_grafik_namen(latex_code: str, grafiken: Dict[str, bytes]) -> str:
+        """\\includegraphics{name} → \\includegraphics{name.ext} (wie ersetze_grafik_namen_api)"""
+        name_map = {Path(dateiname).stem: dateiname for dateiname in grafiken}
+        
+        pattern = r'\\includegraphics(\[[^\]]*\])?\{([^}]+)\}'
+        
+        def replacer(match):
+            optionen = match.group(1) or ''
+            name = match.group(2)
+            
+            if name in name_map:
+                return f'\\includegraphics{optionen}{{{name_map[name]}}}'
+            return match.group(0)
+        
+        return re.sub(pattern, replacer, latex_code)
+    
     def pdf_to_png_trimmed(self, pdf_data: bytes, dpi: int = 150) -> bytes:
         """
         Konvertiert PDF zu PNG und trimmt weißen Rand
@@ -489,16 +1097,10 @@ class LaTeXGenerator:
             PNG als bytes (gecroppt)
         """
         try:
-            from pdf2image import convert_from_bytes
             from PIL import Image, ImageChops
             
-            # PDF → PNG
-            images = convert_from_bytes(pdf_data, dpi=dpi, first_page=1, last_page=1)
-            
-            if not images:
-                raise Exception("Keine Seiten im PDF")
-            
-            image = images[0]
+            # PDF → Bild (In-Process, nur Inhaltsbereich der ersten Seite)
+            image = rasterize_first_page(pdf_data, dpi=dpi)
             
             # Automatisch trimmen
             bg = Image.new(image.mode, image.size, (255, 255, 255))
@@ -526,7 +1128,7 @@ class LaTeXGenerator:
             return png_buffer.read()
             
         except ImportError:
-            raise Exception("Benötigte Pakete fehlen. Installiere: pip install pdf2image pillow")
+            raise Exception("Benötigte Pakete fehlen. Installiere: pip install pypdfium2 pillow")
     
     def build_aufgabe_latex(self, aufgabe: Dict, mit_loesung: bool = False) -> str:
         """
@@ -569,7 +1171,7 @@ class LaTeXGenerator:
             return []
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection_pool(self.db_path).connection()
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -595,7 +1197,6 @@ class LaTeXGenerator:
                     "file": b64  # "file" für Base64!
                 })
             
-            conn.close()
             return resources
             
         except Exception:
@@ -616,7 +1217,7 @@ class LaTeXGenerator:
             return latex_code
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection_pool(self.db_path).connection()
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -633,8 +1234,6 @@ class LaTeXGenerator:
                     ext = 'jpeg'
                 name_map[name] = f"{name}.{ext}"
             
-            conn.close()
-            
             pattern = r'\\includegraphics(\[[^\]]*\])?\{([^}]+)\}'
             
             def replacer(match):
@@ -654,7 +1253,7 @@ class LaTeXGenerator:
     
     def send_to_api(self, latex_code: str, resources: List[Dict] = None) -> bytes:
         """
-        Sendet LaTeX an API mit optionalen Grafik-Resources
+        Sendet LaTeX an das Compile-Backend mit optionalen Grafik-Resources
         
         Args:
             latex_code: LaTeX-Code
@@ -663,31 +1262,19 @@ class LaTeXGenerator:
         Returns:
             PDF als bytes
         """
-        payload_resources = [{"main": True, "path": "main.tex", "content": latex_code}]
+        files = {}
         
-        if resources:
-            payload_resources.extend(resources)
-        
-        payload = {
-            "compiler": "pdflatex",
-            "resources": payload_resources
-        }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/pdf"
-        }
+        # API-Resources (Base64) → Dateien für das Backend
+        for resource in resources or []:
+            if 'file' in resource:
+                files[resource['path']] = base64.b64decode(resource['file'])
+            elif 'content' in resource:
+                files[resource['path']] = resource['content'].encode('utf-8')
         
         try:
-            response = requests.post(self.api_url, data=json.dumps(payload), 
-                                    headers=headers, timeout=30)
-            
-            if response.status_code not in [200, 201]:
-                raise Exception(f"LaTeX-API Error: HTTP {response.status_code}\n{response.text}")
-            
-            return response.content
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Network Error: {str(e)}")
+            return self.backend.compile(latex_code, resources=files, timeout=30)
+        except CompileError as e:
+            raise Exception(f"LaTeX-Fehler: {e}\n{e.log}")
     
     def get_default_header(self) -> str:
         """Standard-Header für alle PDFs (MARGIN = 1cm wie Klausuren!)"""
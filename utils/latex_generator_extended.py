@@ -5,23 +5,25 @@ LaTeX Generator - ERWEITERT mit Klassensatz-Generierung
 Basierend auf klassensatz_generator_v1_8.py
 """
 
-import sqlite3
-import base64
-import requests
 import io
 from pathlib import Path
 from typing import Dict, List, Optional, Callable
-from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2 import PdfReader
 
-
-LATEX_API_URL = "https://latex.ytotech.com/builds/sync"
+from core.compile_backend import CompileBackend, CompileError, get_compile_backend
+from core.database import Database
+from core.db_pool import get_connection_pool
+from core.imposition import LAYOUT_BROSCHUERE, gleiche_bereiche, impositioniere, seitenfolge
+from utils.latex_helper import generate_qr_code_data
 
 
 class LaTeXGenerator:
-    """LaTeX Generator mit API-Integration und Klassensatz-Support"""
+    """LaTeX Generator mit Compile-Backend und Klassensatz-Support"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, backend: Optional[CompileBackend] = None):
         self.db_path = Path(db_path)
+        self.backend = backend or get_compile_backend()
+        self._db: Optional[Database] = None
         
     # ========================================================================
     # KLASSENSATZ-GENERIERUNG (NEU!)
@@ -72,7 +74,7 @@ class LaTeXGenerator:
             )
             
             if progress_callback:
-                progress_callback(50, "Kompiliere PDF mit API...")
+                progress_callback(50, "Kompiliere PDF...")
             
             # PDF kompilieren
             pdf_bytes = self._kompiliere_mit_api(
@@ -176,9 +178,12 @@ class LaTeXGenerator:
         if mit_musterklausuren:
             latex += "% TODO: Musterklausuren\n\n"
         
+        # KaSuSIds für die ganze Klasse in einem Schritt reservieren
+        kasusids = self._reserviere_kasusids(len(schueler_list))
+        
         # Für jeden Schüler
         for idx, schueler in enumerate(schueler_list, start=1):
-            kasusid = self._hole_naechste_kasusid()
+            kasusid = kasusids[idx - 1]
             
             schueler_name = f"{schueler['rufname']} {schueler['nachname']}"
             
@@ -197,7 +202,7 @@ class LaTeXGenerator:
                 f"\\customheader"
                 f"{{{self._tex_escape(klausur.fach)}}}"
                 f"{{{self._tex_escape(schueler_name)}}}"
-                f"{{{kasusid}}}"
+                f"{{{generate_qr_code_data(kasusid, schueler.get('id', idx))}}}"
                 f"{{{klausur.nummer}}}"
                 f"{{{self._tex_escape(klausur.klasse)}}}"
                 f"{{{self._tex_escape(klausur.datum)}}}"
@@ -230,46 +235,21 @@ class LaTeXGenerator:
         latex += r"\end{document}" + "\n"
         return latex
     
-    def _hole_naechste_kasusid(self) -> int:
-        """Holt nächste KaSuSId aus DB"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT letzter_wert FROM kasusid_counter WHERE id = 1")
-        row = cursor.fetchone()
-        
-        if row:
-            aktueller_wert = row[0]
-            naechster_wert = aktueller_wert + 1
-            
-            cursor.execute("""
-                UPDATE kasusid_counter
-                SET letzter_wert = ?, aktualisiert_am = CURRENT_TIMESTAMP
-                WHERE id = 1
-            """, (naechster_wert,))
-            
-            conn.commit()
-            conn.close()
-            return naechster_wert
-        else:
-            # Initialisiere
-            cursor.execute("""
-                INSERT INTO kasusid_counter (id, letzter_wert)
-                VALUES (1, 100001)
-            """)
-            conn.commit()
-            conn.close()
-            return 100001
+    def _reserviere_kasusids(self, anzahl: int) -> range:
+        """Reserviert KaSuSIds für alle Schüler in einer DB-Transaktion"""
+        # Eine Database pro Generator (Pool-Verbindung des Threads)
+        if self._db is None:
+            self._db = Database(self.db_path)
+        return self._db.reserve_kasusid_range(anzahl)
     
     def _hole_schul_logo(self, schule_kuerzel: str) -> Optional[bytes]:
         """Holt Logo aus DB"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection_pool(self.db_path).connection()
         cursor = conn.cursor()
         
         cursor.execute("SELECT logo FROM schulen WHERE kuerzel = ?", (schule_kuerzel,))
         row = cursor.fetchone()
         
-        conn.close()
         return row[0] if row and row[0] else None
     
     def _hole_aufgaben_grafiken(self, aufgaben_ids: List[int]) -> Dict[str, bytes]:
@@ -277,7 +257,7 @@ class LaTeXGenerator:
         if not aufgaben_ids:
             return {}
         
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection_pool(self.db_path).connection()
         cursor = conn.cursor()
         
         placeholders = ','.join('?' * len(aufgaben_ids))
@@ -292,7 +272,6 @@ class LaTeXGenerator:
             if latex_name and blob:
                 grafiken[latex_name] = blob
         
-        conn.close()
         return grafiken
     
     def _kompiliere_mit_api(
@@ -301,46 +280,26 @@ class LaTeXGenerator:
         logo_blob: Optional[bytes],
         grafiken: Optional[Dict[str, bytes]] = None
     ) -> Optional[bytes]:
-        """Kompiliert LaTeX zu PDF via API"""
+        """Kompiliert LaTeX zu PDF via Compile-Backend"""
         
         # Resources
-        resources = [{"main": True, "content": latex_code}]
+        resources = {}
         
         if logo_blob:
-            logo_b64 = base64.b64encode(logo_blob).decode("utf-8")
-            resources.append({"path": "logo.png", "file": logo_b64})
+            resources["logo.png"] = logo_blob
         
         if grafiken:
             for latex_name, blob in grafiken.items():
-                grafik_b64 = base64.b64encode(blob).decode("utf-8")
-                resources.append({"path": f"{latex_name}.png", "file": grafik_b64})
-        
-        payload = {
-            "compiler": "pdflatex",
-            "resources": resources
-        }
+                resources[f"{latex_name}.png"] = blob
         
         try:
-            response = requests.post(
-                LATEX_API_URL,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/pdf",
-                },
-                timeout=120,
-            )
-            
-            if response.status_code in (200, 201):
-                ct = response.headers.get("Content-Type", "")
-                if ("application/pdf" in ct) or response.content.startswith(b"%PDF"):
-                    return response.content
+            return self.backend.compile(latex_code, resources=resources, timeout=120)
             
-            print(f"API-Fehler: Status {response.status_code}")
+        except CompileError as e:
+            print(f"Kompilier-Fehler ({self.backend.name}): {e}")
             return None
-            
         except Exception as e:
-            print(f"Fehler beim API-Call: {e}")
+            print(f"Fehler beim Kompilieren: {e}")
             return None
     
     def _sortiere_pdf_seiten(
@@ -348,26 +307,18 @@ class LaTeXGenerator:
         input_pdf_bytes: bytes,
         pages_per_student: int = 4
     ) -> Optional[bytes]:
-        """Sortiert PDF-Seiten: 1-2-3-4 → 4-1-2-3"""
+        """Sortiert PDF-Seiten: 1-2-3-4 → 4-1-2-3 (andere Seitenzahlen: Broschüre mit Leerseiten)"""
         
         try:
             reader = PdfReader(io.BytesIO(input_pdf_bytes))
-            writer = PdfWriter()
             total_pages = len(reader.pages)
             
             if total_pages % pages_per_student != 0:
                 print(f"Warnung: Seitenzahl ({total_pages}) ist kein Vielfaches von {pages_per_student}")
             
-            total_students = total_pages // pages_per_student
-            
-            # Für jeden Schüler: 4-1-2-3
-            for student in range(total_students):
-                base = student * pages_per_student
-                order = [base + 3, base + 0, base + 1, base + 2]
-                
-                for p in order:
-                    if p < total_pages:
-                        writer.add_page(reader.pages[p])
+            # Für jeden Schüler: Broschüren-Reihenfolge (bei 4 Seiten 4-1-2-3)
+            folge = seitenfolge(gleiche_bereiche(total_pages, pages_per_student), LAYOUT_BROSCHUERE)
+            writer = impositioniere(reader.pages, folge)
             
             out = io.BytesIO()
             writer.write(out)
@@ -9,9 +9,12 @@ import os
 import tempfile
 import subprocess
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageChops
 from typing import Optional
 
+from core.compile_backend import CompileError, get_compile_backend
+from utils.pdf_raster import rasterize_first_page, in_process_verfuegbar
+
 
 def render_latex_to_png(
     latex_code: str,
@@ -32,108 +35,42 @@ def render_latex_to_png(
         Pfad zur generierten PNG-Datei oder None bei Fehler
     """
     
-    # Temporäres Verzeichnis erstellen
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        
-        # LaTeX-Dokument erstellen
-        tex_content = create_latex_document(latex_code)
-        tex_file = tmpdir / "aufgabe.tex"
-        
-        with open(tex_file, 'w', encoding='utf-8') as f:
-            f.write(tex_content)
-        
-        # LaTeX kompilieren (pdflatex)
+    # LaTeX-Dokument erstellen
+    tex_content = create_latex_document(latex_code)
+    
+    # LaTeX kompilieren (über konfiguriertes Compile-Backend)
+    try:
+        pdf_data = get_compile_backend().compile(tex_content)
+    except CompileError as e:
+        print(f"LaTeX Fehler: {e}\n{e.log}")
+        return None
+    except Exception as e:
+        print(f"FEHLER beim Kompilieren: {e}")
+        return None
+    
+    # PDF → Bild (In-Process, ohne Ghostscript-Aufruf und Temp-Dateien)
+    try:
+        img = rasterize_first_page(pdf_data, dpi=dpi, nur_inhalt=crop)
+    except Exception as e:
+        print(f"FEHLER beim Rastern: {e}")
+        return None
+    
+    # Cropping
+    if crop:
         try:
-            result = subprocess.run(
-                ['pdflatex', '-interaction=nonstopmode', 'aufgabe.tex'],
-                cwd=tmpdir,
-                capture_output=True,
-                timeout=10
-            )
-            
-            if result.returncode != 0:
-                print(f"pdflatex Fehler:\n{result.stdout.decode('utf-8', errors='ignore')}")
-                return None
-                
-        except FileNotFoundError:
-            print("FEHLER: pdflatex nicht gefunden! Bitte LaTeX installieren.")
-            return None
-        except subprocess.TimeoutExpired:
-            print("FEHLER: LaTeX-KompilierungTimeout")
-            return None
+            img = autocrop_image(img)
         except Exception as e:
-            print(f"FEHLER beim Kompilieren: {e}")
-            return None
-        
-        # PDF zu PNG konvertieren
-        pdf_file = tmpdir / "aufgabe.pdf"
-        
-        if not pdf_file.exists():
-            print("FEHLER: PDF wurde nicht erstellt")
-            return None
-        
-        # PDF → PNG mit Ghostscript
-        png_file = tmpdir / "aufgabe.png"
-        
-        try:
-            subprocess.run(
-                [
-                    'gswin64c',  # Windows
-                    '-dNOPAUSE',
-                    '-dBATCH',
-                    '-sDEVICE=png16m',
-                    f'-r{dpi}',
-                    f'-sOutputFile={png_file}',
-                    str(pdf_file)
-                ],
-                capture_output=True,
-                timeout=10
-            )
-        except FileNotFoundError:
-            # Versuche gs (Linux/Mac)
-            try:
-                subprocess.run(
-                    [
-                        'gs',
-                        '-dNOPAUSE',
-                        '-dBATCH',
-                        '-sDEVICE=png16m',
-                        f'-r{dpi}',
-                        f'-sOutputFile={png_file}',
-                        str(pdf_file)
-                    ],
-                    capture_output=True,
-                    timeout=10
-                )
-            except Exception as e:
-                print(f"FEHLER: Ghostscript nicht gefunden: {e}")
-                return None
-        
-        if not png_file.exists():
-            print("FEHLER: PNG wurde nicht erstellt")
-            return None
-        
-        # Cropping
-        if crop:
-            try:
-                img = Image.open(png_file)
-                img = autocrop_image(img)
-                img.save(png_file)
-            except Exception as e:
-                print(f"FEHLER beim Croppen: {e}")
-        
-        # PNG in finalen Pfad kopieren
-        if output_path is None:
-            # Temporäre Datei in system temp
-            import uuid
-            output_path = Path(tempfile.gettempdir()) / f"latex_{uuid.uuid4().hex}.png"
-        
-        # Kopieren
-        import shutil
-        shutil.copy(png_file, output_path)
-        
-        return str(output_path)
+            print(f"FEHLER beim Croppen: {e}")
+    
+    # PNG in finalen Pfad schreiben
+    if output_path is None:
+        # Temporäre Datei in system temp
+        import uuid
+        output_path = Path(tempfile.gettempdir()) / f"latex_{uuid.uuid4().hex}.png"
+    
+    img.save(output_path, format='PNG')
+    
+    return str(output_path)
 
 
 def create_latex_document(latex_code: str) -> str:
@@ -185,28 +122,22 @@ def autocrop_image(img: Image.Image, threshold: int = 250) -> Image.Image:
     if img.mode != 'RGB':
         img = img.convert('RGB')
     
-    # Pixel-Daten
-    pixels = img.load()
     width, height = img.size
     
-    # Finde Grenzen
-    left = width
-    right = 0
-    top = height
-    bottom = 0
+    # Maske "nicht-weiß": Kanal < threshold → 255, sonst 0 (in C statt Pixel-Schleife)
+    lut = [255 if v < threshold else 0 for v in range(256)] * 3
+    r, g, b = img.point(lut).split()
+    maske = ImageChops.lighter(ImageChops.lighter(r, g), b)
     
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y]
-            
-            # Nicht-weiß?
-            if r < threshold or g < threshold or b < threshold:
-                left = min(left, x)
-                right = max(right, x)
-                top = min(top, y)
-                bottom = max(bottom, y)
+    bbox = maske.getbbox()
     
     # Falls nichts gefunden → Original zurückgeben
+    if bbox is None:
+        return img
+    
+    # getbbox liefert exklusive rechte/untere Grenze
+    left, top, right, bottom = bbox[0], bbox[1], bbox[2] - 1, bbox[3] - 1
+    
     if left >= right or top >= bottom:
         return img
     
@@ -223,7 +154,7 @@ def autocrop_image(img: Image.Image, threshold: int = 250) -> Image.Image:
 
 def test_latex_installation() -> dict:
     """
-    Testet ob LaTeX und Ghostscript installiert sind
+    Testet ob LaTeX und ein PDF-Renderer (pypdfium2/PyMuPDF oder Ghostscript) installiert sind
     
     Returns:
         Dictionary mit Status-Informationen
@@ -232,6 +163,7 @@ def test_latex_installation() -> dict:
     status = {
         'pdflatex': False,
         'ghostscript': False,
+        'in_process': in_process_verfuegbar(),
         'ready': False
     }
     
@@ -260,7 +192,7 @@ def test_latex_installation() -> dict:
         except:
             pass
     
-    status['ready'] = status['pdflatex'] and status['ghostscript']
+    status['ready'] = status['pdflatex'] and (status['in_process'] or status['ghostscript'])
     
     return status
 
@@ -271,6 +203,7 @@ if __name__ == '__main__':
     print(f"LaTeX Installation Status:")
     print(f"  pdflatex: {'✓' if status['pdflatex'] else '✗'}")
     print(f"  Ghostscript: {'✓' if status['ghostscript'] else '✗'}")
+    print(f"  In-Process-Renderer: {'✓' if status['in_process'] else '✗'}")
     print(f"  Ready: {'✓' if status['ready'] else '✗'}")
     
     if status['ready']:
@@ -0,0 +1,194 @@
+"""
+PDF-Rasterung für Vorschauen
+============================
+
+Rendert die erste Seite eines PDFs (bytes) zu einem PIL-Image - im
+eigenen Prozess, ohne Temp-Dateien:
+
+1. pypdfium2 (bevorzugt) oder PyMuPDF, falls installiert
+   - Grob-Durchlauf mit niedriger Auflösung findet den Inhaltsbereich
+   - Nur dieser Bereich wird in der Ziel-Auflösung gerendert
+2. Fallback: pdf2image (poppler) bzw. Ghostscript über stdin/stdout
+
+Gemeinsam genutzt von LaTeXGenerator.pdf_to_png_trimmed und
+utils.latex_renderer.render_latex_to_png.
+"""
+
+import io
+import subprocess
+import threading
+from typing import Optional, Tuple
+
+from PIL import Image, ImageChops
+
+
+# Auflösung des Grob-Durchlaufs (nur zur Bestimmung des Inhaltsbereichs)
+GROB_DPI = 36
+
+# Weißer Rand (Ziel-Pixel) um den gefundenen Inhalt - größer als das
+# Padding der Aufrufer (10 bzw. 15 px), damit deren Trimmen unverändert bleibt
+RAND_PX = 20
+
+# pdfium und MuPDF sind nicht thread-sicher (Preview-Service nutzt Threads)
+_render_lock = threading.Lock()
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+
+def in_process_verfuegbar() -> bool:
+    """Ist eine In-Process-Rendering-Bibliothek installiert?"""
+    return pdfium is not None or fitz is not None
+
+
+def rasterize_first_page(pdf_data: bytes, dpi: int = 150, nur_inhalt: bool = True) -> Image.Image:
+    """
+    Erste PDF-Seite als RGB-Image
+
+    Args:
+        pdf_data: PDF als bytes
+        dpi: Ziel-Auflösung
+        nur_inhalt: True = nur den Bereich mit Inhalt (plus Rand) rendern;
+                    der Aufrufer trimmt danach wie gewohnt pixelgenau
+
+    Returns:
+        PIL.Image (RGB)
+
+    Raises:
+        Exception: wenn kein Renderer verfügbar ist oder das PDF leer ist
+    """
+    if pdfium is not None:
+        render = _render_pdfium
+    elif fitz is not None:
+        render = _render_pymupdf
+    else:
+        return _render_subprocess(pdf_data, dpi)
+
+    with _render_lock:
+        return render(pdf_data, dpi, nur_inhalt)
+
+
+def _inhalts_clip(
+    grob: Image.Image,
+    seite: Tuple[float, float],
+    dpi: int
+) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Inhaltsbereich aus dem Grob-Bild (GROB_DPI) in PDF-Punkten (links, oben,
+    rechts, unten; Ursprung oben links) - None = ganze Seite
+
+    dpi ist die Ziel-Auflösung (für den Rand in Pixeln)
+    """
+    # Jede Abweichung von reinem Weiß zählt (auch blasse Kantenglättung)
+    diff = ImageChops.difference(grob, Image.new('RGB', grob.size, (255, 255, 255)))
+    r, g, b = diff.split()
+    bbox = ImageChops.lighter(ImageChops.lighter(r, g), b).getbbox()
+    if bbox is None:
+        return None
+
+    pt_pro_px = 72.0 / GROB_DPI
+    breite, hoehe = seite
+
+    # Ein Grob-Pixel Sicherheit + RAND_PX in der Ziel-Auflösung
+    rand = pt_pro_px + RAND_PX * 72.0 / dpi
+
+    links = max(0.0, bbox[0] * pt_pro_px - rand)
+    oben = max(0.0, bbox[1] * pt_pro_px - rand)
+    rechts = min(breite, bbox[2] * pt_pro_px + rand)
+    unten = min(hoehe, bbox[3] * pt_pro_px + rand)
+
+    return (links, oben, rechts, unten)
+
+
+def _render_pdfium(pdf_data: bytes, dpi: int, nur_inhalt: bool) -> Image.Image:
+    """Rendering mit pypdfium2 (crop = abzuschneidende Ränder in Punkten)"""
+    pdf = pdfium.PdfDocument(pdf_data)
+    try:
+        if len(pdf) == 0:
+            raise Exception("Keine Seiten im PDF")
+
+        page = pdf[0]
+        breite, hoehe = page.get_size()
+
+        crop = (0, 0, 0, 0)
+        if nur_inhalt:
+            grob = page.render(scale=GROB_DPI / 72.0).to_pil().convert('RGB')
+            clip = _inhalts_clip(grob, (breite, hoehe), dpi)
+            if clip is not None:
+                links, oben, rechts, unten = clip
+                # pdfium: (links, unten, rechts, oben) vom jeweiligen Seitenrand
+                crop = (links, hoehe - unten, breite - rechts, oben)
+
+        bitmap = page.render(scale=dpi / 72.0, crop=crop)
+        return bitmap.to_pil().convert('RGB')
+    finally:
+        pdf.close()
+
+
+def _render_pymupdf(pdf_data: bytes, dpi: int, nur_inhalt: bool) -> Image.Image:
+    """Rendering mit PyMuPDF (clip in Punkten, Ursprung oben links)"""
+    doc = fitz.open(stream=pdf_data, filetype="pdf")
+    try:
+        if doc.page_count == 0:
+            raise Exception("Keine Seiten im PDF")
+
+        page = doc[0]
+
+        clip = None
+        if nur_inhalt:
+            pix = page.get_pixmap(dpi=GROB_DPI, alpha=False)
+            grob = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            clip = _inhalts_clip(grob, (page.rect.width, page.rect.height), dpi)
+
+        pix = page.get_pixmap(
+            dpi=dpi,
+            clip=fitz.Rect(*clip) if clip is not None else None,
+            alpha=False
+        )
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    finally:
+        doc.close()
+
+
+def _render_subprocess(pdf_data: bytes, dpi: int) -> Image.Image:
+    """Fallback ohne In-Process-Renderer: pdf2image, sonst Ghostscript (Pipe)"""
+    try:
+        from pdf2image import convert_from_bytes
+
+        images = convert_from_bytes(pdf_data, dpi=dpi, first_page=1, last_page=1)
+        if not images:
+            raise Exception("Keine Seiten im PDF")
+        return images[0].convert('RGB')
+    except ImportError:
+        pass
+
+    for gs_cmd in ('gswin64c', 'gs'):
+        try:
+            result = subprocess.run(
+                [
+                    gs_cmd, '-q', '-dSAFER', '-dNOPAUSE', '-dBATCH',
+                    '-sDEVICE=png16m', f'-r{dpi}',
+                    '-dFirstPage=1', '-dLastPage=1',
+                    '-sOutputFile=-', '-'
+                ],
+                input=pdf_data,
+                capture_output=True,
+                timeout=10
+            )
+        except FileNotFoundError:
+            continue
+
+        if result.returncode == 0 and result.stdout:
+            return Image.open(io.BytesIO(result.stdout)).convert('RGB')
+
+    raise Exception(
+        "Kein PDF-Renderer gefunden. Installiere: pip install pypdfium2 "
+        "(oder pdf2image + poppler bzw. Ghostscript)"
+    )